@@ -0,0 +1,256 @@
+"""End-to-end session benchmark against the local mock LMS.
+
+Runs complete attendance sessions (real Chrome, mock_lms.MockLMS as the
+server) and reports the session time and the time spent in each phase. The
+report is saved as JSON under logs/bench/ named after the current commit, so
+two commits can be compared:
+
+    python bench_session.py --runs 5 --classes 8 --latency-ms 100
+    python bench_session.py --compare logs/bench/session_1a2b3c4.json --max-regression 10
+    python bench_session.py --scenario scenarios/stalled_lms.json
+    python bench_session.py --replay recordings/2026-10-lms-layout
+    python bench_session.py --setting page_load_strategy=normal --setting blocked_resources=
+
+With --scenario, traffic goes through fault_proxy.FaultProxy and the report's
+max columns give the worst-case session time and how long the browser was
+held open under that scenario. --setting overrides a [Settings] value, e.g.
+to measure a run without request blocking as the baseline for --compare.
+
+The random delay before each attendance click is set to zero so that the
+numbers measure the automation rather than the deliberate pause.
+"""
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+from datetime import datetime
+from configparser import ConfigParser
+
+from config import Config, DEFAULT_CONFIG
+from logger import Logger, get_logs_dir
+from metrics import PHASE_SECONDS
+from mock_lms import MockLMS
+from fault_proxy import Scenario, FaultProxy
+from session_replay import ReplayServer, class_result_totals, result_changes
+from notifications import EmailNotifier, WhatsAppNotifier
+from web_automation import AttendanceAutomation
+
+DEFAULT_RUNS = 3
+
+def current_commit(repo_dir):
+    """Return the short commit hash, with -dirty if the tree has changes"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=str(repo_dir),
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=str(repo_dir),
+                               capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def write_config(path, url, proxy_server="", **settings):
+    """Write an INI file pointing the automation at the mock server
+
+    Extra keyword arguments override [Settings] values.
+    """
+    parser = ConfigParser()
+    parser.read_dict(DEFAULT_CONFIG)
+    parser["Credentials"].update(url=url, username="bench", password="bench")
+    parser["Settings"].update(
+        attendance_delay_min="0", attendance_delay_max="0",
+        metrics_file="false", trace_sessions="false", log_index="false",
+        proxy_server=proxy_server
+    )
+    parser["Settings"].update({key: str(value) for key, value in settings.items()})
+    with open(path, "w") as config_file:
+        parser.write(config_file)
+
+def create_automation(config_file, logger, temp_dir):
+    """AttendanceAutomation for config_file that keeps its attendance log in temp_dir"""
+    config = Config(config_file)
+    automation = AttendanceAutomation(
+        config, logger, EmailNotifier(config, logger), WhatsAppNotifier(config, logger))
+    isolate_state(automation, temp_dir)
+    return automation
+
+def isolate_state(automation, temp_dir):
+    """Keep what a run against a mock or replayed LMS learns in temp_dir, away from production state"""
+    from latency_model import LATENCY_MODEL, MODEL_FILE_NAME
+    from chrome_profile import TEMPLATE_NAME
+
+    # Keep benchmark attendance out of ~/attendance_log.txt
+    automation.attendance_logger.log_file_path = Path(temp_dir) / "attendance_log.txt"
+    # Timeouts learned from a stalled mock would otherwise be used by real sessions
+    LATENCY_MODEL.path = Path(temp_dir) / MODEL_FILE_NAME
+    LATENCY_MODEL.samples = None
+    LATENCY_MODEL.negative_checks = {}
+    automation.driver_manager.profiles.template_dir = Path(temp_dir) / TEMPLATE_NAME
+    automation.catalog.path = Path(temp_dir) / "class_catalog.json"
+
+def phase_totals():
+    """Return {phase: (total seconds, count)} observed so far"""
+    with PHASE_SECONDS.lock:
+        return {key[0]: (state[1], state[2]) for key, state in PHASE_SECONDS.values.items()}
+
+def run_once(automation):
+    """Run one session and return its timings"""
+    before = phase_totals()
+    results_before = class_result_totals()
+    start = time.perf_counter()
+    outcome = "success"
+    try:
+        automation.run_session()
+    except Exception as e:
+        outcome = f"failure: {e}"
+    total = time.perf_counter() - start
+
+    phases = {}
+    for phase, (seconds, count) in phase_totals().items():
+        previous_seconds, previous_count = before.get(phase, (0.0, 0))
+        if count > previous_count:
+            phases[phase] = {"seconds": round(seconds - previous_seconds, 4), "count": count - previous_count}
+    hold = automation.driver_manager.last_hold_seconds
+    automation.driver_manager.last_hold_seconds = None
+    return {"outcome": outcome, "total": round(total, 4), "phases": phases,
+            "driver_hold": round(hold, 4) if hold is not None else None,
+            "class_results": result_changes(results_before, class_result_totals()),
+            "resources": automation.last_resources}
+
+def summarize(runs):
+    """Median, min and max of the session total and each phase across runs"""
+    series = {"session": [run["total"] for run in runs]}
+    holds = [run["driver_hold"] for run in runs if run["driver_hold"] is not None]
+    if holds:
+        series["driver_hold"] = holds
+    page_waits = [run["resources"]["page_wait_seconds"] for run in runs
+                  if run["resources"] and "page_wait_seconds" in run["resources"]]
+    if page_waits:
+        series["page_wait"] = page_waits
+    for run in runs:
+        for phase, timing in run["phases"].items():
+            series.setdefault(phase, []).append(timing["seconds"])
+    return {
+        name: {"median": round(statistics.median(values), 4), "min": min(values), "max": max(values)}
+        for name, values in series.items()
+    }
+
+def compare(baseline, report, max_regression):
+    """Print per-phase median changes; return True if a regression exceeds max_regression percent"""
+    print(f"\nCompared with {baseline['commit']} ({baseline['created']}):")
+    if baseline["scenario"] != report["scenario"]:
+        print(f"  warning: scenarios differ: {baseline['scenario']} vs {report['scenario']}")
+    regressed = False
+    for name, current in report["summary"].items():
+        previous = baseline["summary"].get(name)
+        if not previous:
+            print(f"  {name:<20} {current['median']:8.3f} s  (new)")
+            continue
+        change = (current["median"] - previous["median"]) / previous["median"] * 100 if previous["median"] else 0.0
+        marker = ""
+        if max_regression is not None and change > max_regression:
+            marker = "  REGRESSION"
+            regressed = True
+        print(f"  {name:<20} {previous['median']:8.3f} s -> {current['median']:8.3f} s  ({change:+.1f}%){marker}")
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full sessions against the local mock LMS")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS,
+                        help=f"Number of sessions to run (default {DEFAULT_RUNS})")
+    parser.add_argument("--classes", type=int, default=5, help="Classes served by the mock (default 5)")
+    parser.add_argument("--attended", type=int, default=0, help="Classes that are already attended")
+    parser.add_argument("--no-button", type=int, default=0, help="Classes without an attendance button")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Delay added to every mock response")
+    parser.add_argument("--replay", help="Serve a recording from session_replay.py instead of the mock")
+    parser.add_argument("--scenario", help="Fault scenario file for fault_proxy, e.g. scenarios/drops.json")
+    parser.add_argument("--setting", action="append", default=[], metavar="KEY=VALUE",
+                        help="Override a [Settings] value of the benchmark config (repeatable)")
+    parser.add_argument("--output", help="Report path (default logs/bench/session_<commit>[_<replay/scenario>].json)")
+    parser.add_argument("--compare", help="Earlier report to compare against")
+    parser.add_argument("--max-regression", type=float,
+                        help="With --compare, fail if a median got slower by more than this percent")
+    args = parser.parse_args()
+
+    repo_dir = Path(__file__).parent
+    overrides = dict(setting.partition("=")[::2] for setting in args.setting)
+    scenario = {"classes": args.classes, "attended": args.attended,
+                "no_button": args.no_button, "latency_ms": args.latency_ms}
+    if args.replay:
+        scenario = {"replay": Path(args.replay).name}
+        lms = ReplayServer(args.replay)
+    else:
+        lms = MockLMS(args.classes, args.attended, args.no_button, args.latency_ms)
+        initially_attended = set(lms.attended)
+    url = lms.start()
+
+    proxy = None
+    proxy_server = ""
+    if args.scenario:
+        scenario_faults = Scenario.load(args.scenario)
+        scenario["faults"] = scenario_faults.name
+        proxy = FaultProxy(scenario_faults)
+        proxy_server = proxy.start()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_file = Path(temp_dir) / "bench_config.ini"
+        write_config(config_file, url, proxy_server, **overrides)
+        logger = Logger(index=False)
+        automation = create_automation(config_file, logger, temp_dir)
+
+        runs = []
+        try:
+            for number in range(1, args.runs + 1):
+                # Every run sees the same classes in the same state
+                if args.replay:
+                    lms.reset()
+                else:
+                    lms.reset(initially_attended)
+                with logger.context(session=f"bench-{number}"):
+                    run = run_once(automation)
+                runs.append(run)
+                print(f"run {number}: {run['total']:.2f} s, {run['outcome']}")
+        finally:
+            if proxy:
+                proxy.stop()
+            lms.stop()
+            logger.shutdown()
+
+    report = {
+        "commit": current_commit(repo_dir),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "scenario": scenario,
+        "settings": overrides,
+        "runs": runs,
+        "summary": summarize(runs),
+        "proxy": proxy.stats if proxy else None
+    }
+
+    print(f"\n{'phase':<20} {'median':>9} {'min':>9} {'max':>9}")
+    for name, stats in report["summary"].items():
+        print(f"{name:<20} {stats['median']:8.3f}s {stats['min']:8.3f}s {stats['max']:8.3f}s")
+
+    if proxy:
+        print(f"\nInjected faults: {proxy.stats}")
+
+    name = f"session_{report['commit']}"
+    if args.replay:
+        name += f"_replay_{scenario['replay']}"
+    if proxy:
+        name += f"_{scenario['faults']}"
+    output = Path(args.output) if args.output else get_logs_dir() / "bench" / f"{name}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\nReport written to {output}")
+
+    failed = any(run["outcome"] != "success" for run in runs)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            failed = compare(json.load(baseline_file), report, args.max_regression) or failed
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
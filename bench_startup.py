@@ -0,0 +1,93 @@
+"""Cold-start import benchmark for main.py.
+
+Imports ``main`` in a fresh interpreter several times and fails (exit code 1)
+when the median import time goes over the budget, or when any of the heavy
+modules that should only load on first use end up imported at startup.
+
+    python bench_startup.py
+    python bench_startup.py --budget-ms 150 --runs 10
+"""
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+# Modules that must not be imported just by importing main.py
+HEAVY_MODULES = ["selenium", "webdriver_manager", "PIL", "pystray", "smtplib"]
+
+DEFAULT_BUDGET_MS = 200
+DEFAULT_RUNS = 5
+
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+loaded = sorted(m for m in {heavy!r} if m in sys.modules)
+print(json.dumps({{"import_ms": elapsed * 1000, "loaded": loaded}}))
+"""
+
+def measure_once(repo_dir):
+    """Import main in a fresh interpreter and return its timing report"""
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(heavy=HEAVY_MODULES)],
+        cwd=str(repo_dir),
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def slowest_imports(repo_dir, limit=10):
+    """Return the slowest modules imported by main according to -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=str(repo_dir),
+        capture_output=True,
+        text=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # Format: "import time:  <self us> | <cumulative us> | <module>"
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import time of main.py")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"Maximum median import time in milliseconds (default {DEFAULT_BUDGET_MS})")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS,
+                        help=f"Number of fresh interpreters to measure (default {DEFAULT_RUNS})")
+    args = parser.parse_args()
+
+    repo_dir = Path(__file__).parent
+    reports = [measure_once(repo_dir) for _ in range(args.runs)]
+    timings = [report["import_ms"] for report in reports]
+    median_ms = statistics.median(timings)
+    loaded = sorted({name for report in reports for name in report["loaded"]})
+
+    print(f"import main: median {median_ms:.1f} ms, min {min(timings):.1f} ms, "
+          f"max {max(timings):.1f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+    print("Slowest imports (cumulative):")
+    for cumulative_us, name in slowest_imports(repo_dir):
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    failed = False
+    if loaded:
+        print(f"FAIL: heavy modules imported at startup: {', '.join(loaded)}")
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f"FAIL: median import time {median_ms:.1f} ms exceeds budget of {args.budget_ms:.0f} ms")
+        failed = True
+
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
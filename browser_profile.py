@@ -0,0 +1,69 @@
+"""Chrome command-line profiles: the default one and a low-memory one for small VMs.
+
+With browser_profile = low_memory, Chrome runs as chrome-headless-shell when
+it can be found (no full browser UI stack), with a single renderer process,
+a capped V8 heap and background networking, component updates and other
+optional features switched off. The attendance browser and the WhatsApp
+browser are then never alive at the same time: WhatsApp messages sent during
+a session are held back until the session's browser has quit.
+
+driver_memory_budget_mb is enforced by ResourceMonitor for each driver, in
+either profile.
+"""
+import shutil
+
+PROFILES = ("standard", "low_memory")
+HEADLESS_SHELL_NAMES = ("chrome-headless-shell", "chrome-headless-shell.exe")
+# V8 old-space cap per renderer; WhatsApp Web needs more than the LMS pages
+LMS_JS_HEAP_MB = 128
+WHATSAPP_JS_HEAP_MB = 512
+
+LOW_MEMORY_ARGUMENTS = (
+    "--renderer-process-limit=1",
+    "--process-per-site",
+    "--disable-site-isolation-trials",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--no-first-run",
+    "--disable-breakpad",
+    "--metrics-recording-only",
+    "--mute-audio",
+    "--aggressive-cache-discard",
+    "--disable-features=Translate,OptimizationHints,MediaRouter,AutofillServerCommunication,"
+    "CalculateNativeWinOcclusion,InterestFeedContentSuggestions,site-per-process"
+)
+
+def is_low_memory(settings):
+    return settings.browser_profile == "low_memory"
+
+def find_headless_shell(settings):
+    """Path of chrome-headless-shell from headless_shell_path or PATH, or None"""
+    if settings.headless_shell_path:
+        return settings.headless_shell_path
+    for name in HEADLESS_SHELL_NAMES:
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+def apply_browser_profile(options, settings, js_heap_mb, logger, headless_shell=True):
+    """Add the selected profile's arguments to ChromeOptions"""
+    if not is_low_memory(settings):
+        return
+    for argument in LOW_MEMORY_ARGUMENTS:
+        options.add_argument(argument)
+    options.add_argument(f"--js-flags=--max-old-space-size={js_heap_mb}")
+    if headless_shell:
+        binary = find_headless_shell(settings)
+        if binary:
+            options.binary_location = binary
+        else:
+            logger.debug("chrome-headless-shell not found; using the regular Chrome binary")
+
+def memory_budget_bytes(settings):
+    """Per-driver memory budget in bytes, or None if unlimited"""
+    if not settings.driver_memory_budget_mb:
+        return None
+    return settings.driver_memory_budget_mb * 1024 * 1024
@@ -0,0 +1,115 @@
+"""Per-session Chrome profiles seeded from a warm template.
+
+A fresh, empty --user-data-dir makes Chrome run its first-run profile setup
+and fetch every static asset of the LMS again. Instead, the profile of the
+first session is saved (after Chrome has quit, without cookies, logins or
+session state) as ~/temp/chrome_template, and later sessions start from a
+copy of it with a warm HTTP cache. The copies go to /dev/shm when it has room,
+so they cost no disk writes and are removed with the session. The template is
+rebuilt from a session once it is older than TEMPLATE_MAX_AGE_DAYS.
+"""
+import json
+import time
+import shutil
+
+from reaper import PROFILE_PREFIX, MEMORY_PROFILES_DIR, get_profiles_dir
+
+TEMPLATE_NAME = "chrome_template"
+TEMPLATE_INFO = "template.json"
+TEMPLATE_MAX_AGE_DAYS = 7
+# Leave room in /dev/shm for the session's cache growth and for other programs
+MIN_FREE_MEMORY_BYTES = 512 * 1024 * 1024
+# Keeps a profile on /dev/shm from growing without bound
+MEMORY_DISK_CACHE_BYTES = 64 * 1024 * 1024
+# State that must not carry over between sessions: the login would be skipped
+# or a previous session restored
+EXCLUDED_NAMES = {
+    "Cookies", "Cookies-journal", "Login Data", "Login Data-journal", "Web Data", "Web Data-journal",
+    "History", "History-journal", "Sessions", "Session Storage", "Local Storage", "IndexedDB",
+    "Current Session", "Current Tabs", "Last Session", "Last Tabs",
+    "SingletonLock", "SingletonCookie", "SingletonSocket", "lockfile", "Crashpad"
+}
+
+def _directory_size(directory):
+    return sum(path.stat().st_size for path in directory.rglob("*") if path.is_file())
+
+class ChromeProfiles:
+    """Creates session profiles from the template and keeps the template fresh"""
+
+    def __init__(self, config, logger):
+        self.config = config
+        self.logger = logger
+        self.template_dir = get_profiles_dir() / TEMPLATE_NAME
+
+    def in_memory(self):
+        """True if new profiles go to /dev/shm"""
+        if not self.config.settings.general.chrome_profile_in_memory:
+            return False
+        try:
+            MEMORY_PROFILES_DIR.mkdir(parents=True, exist_ok=True)
+            return shutil.disk_usage(MEMORY_PROFILES_DIR).free >= MIN_FREE_MEMORY_BYTES + self._template_size()
+        except OSError:
+            return False
+
+    def _template_info(self):
+        """Contents of the template's info file, or None if there is no usable template"""
+        try:
+            info = json.loads((self.template_dir / TEMPLATE_INFO).read_text(encoding="utf-8"))
+            return info if "created" in info else None
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def _template_size(self):
+        """Size of the template in bytes, as recorded when it was saved"""
+        info = self._template_info()
+        return info.get("size", 0) if info else 0
+
+    def _template_age_days(self):
+        info = self._template_info()
+        return (time.time() - info["created"]) / 86400 if info else None
+
+    def needs_template(self):
+        """True if the next closed session should be saved as the template"""
+        if not self.config.settings.general.chrome_template_profile:
+            return False
+        age = self._template_age_days()
+        return age is None or age > TEMPLATE_MAX_AGE_DAYS
+
+    def create(self, unique_id, in_memory):
+        """Create a profile directory for one session, copied from the template if there is one"""
+        base_dir = MEMORY_PROFILES_DIR if in_memory else get_profiles_dir()
+        profile = base_dir / f"{PROFILE_PREFIX}{unique_id}"
+        if self.config.settings.general.chrome_template_profile and self._template_age_days() is not None:
+            start = time.perf_counter()
+            try:
+                shutil.copytree(self.template_dir, profile, symlinks=True,
+                                ignore=shutil.ignore_patterns(TEMPLATE_INFO))
+                self.logger.debug("Copied the Chrome template profile in %.0f ms",
+                                  (time.perf_counter() - start) * 1000)
+                return profile
+            except (OSError, shutil.Error) as e:
+                self.logger.warning("Failed to copy the Chrome template profile: %s", e)
+                shutil.rmtree(profile, ignore_errors=True)
+        profile.mkdir(parents=True, exist_ok=True)
+        return profile
+
+    def save_template(self, profile):
+        """Replace the template with a closed session's profile, minus per-session state"""
+        partial = self.template_dir.with_name(TEMPLATE_NAME + ".tmp")
+        previous = self.template_dir.with_name(TEMPLATE_NAME + ".old")
+        try:
+            shutil.rmtree(partial, ignore_errors=True)
+            shutil.copytree(profile, partial, symlinks=True,
+                            ignore=lambda directory, names: [name for name in names if name in EXCLUDED_NAMES])
+            size = _directory_size(partial)
+            (partial / TEMPLATE_INFO).write_text(json.dumps({"created": time.time(), "size": size}),
+                                                 encoding="utf-8")
+            shutil.rmtree(previous, ignore_errors=True)
+            if self.template_dir.exists():
+                self.template_dir.rename(previous)
+            partial.rename(self.template_dir)
+            shutil.rmtree(previous, ignore_errors=True)
+            self.logger.info("Saved the Chrome template profile (%.1f MB)", size / (1024 * 1024))
+        except (OSError, shutil.Error) as e:
+            self.logger.warning("Failed to save the Chrome template profile: %s", e)
+            shutil.rmtree(partial, ignore_errors=True)
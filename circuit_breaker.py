@@ -0,0 +1,115 @@
+"""Pre-flight reachability probe and circuit breaker for LMS outages.
+
+Before a session starts Chrome, probe() sends one plain HTTP request to the
+LMS url. Any response below 500 counts as up; a connection error, timeout
+or 5xx counts as down and the session is skipped. The CircuitBreaker then
+opens: instead of waiting the full check_interval, the loop probes again
+after outage_retry_seconds, doubling the wait after every further failed
+probe up to check_interval. A probe made once the wait is over runs with the
+breaker half-open; if it succeeds the breaker closes, the session runs and
+the normal cadence resumes.
+"""
+import threading
+
+from metrics import REGISTRY
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+PROBE_READ_BYTES = 1024
+
+CIRCUIT_STATE = REGISTRY.gauge(
+    "lms_circuit_state",
+    "LMS circuit breaker state (0 closed, 1 half-open, 2 open)"
+)
+PROBES = REGISTRY.counter(
+    "lms_probe_total",
+    "Pre-flight probes of the LMS by result",
+    ("result",)
+)
+
+def probe(url, timeout, proxy_server=""):
+    """Check that the LMS answers; returns (reachable, detail)"""
+    import urllib.request
+    import urllib.error
+
+    handlers = []
+    if proxy_server:
+        proxy = proxy_server if "://" in proxy_server else f"http://{proxy_server}"
+        handlers.append(urllib.request.ProxyHandler({"http": proxy, "https": proxy}))
+    opener = urllib.request.build_opener(*handlers)
+    request = urllib.request.Request(url, headers={"User-Agent": "lms-automation-probe"})
+    try:
+        with opener.open(request, timeout=timeout) as response:
+            response.read(PROBE_READ_BYTES)
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        PROBES.inc(result="unreachable")
+        return False, str(getattr(e, "reason", e))
+    if status >= 500:
+        PROBES.inc(result="server_error")
+        return False, f"HTTP {status}"
+    PROBES.inc(result="up")
+    return True, f"HTTP {status}"
+
+class CircuitBreaker:
+    """Closed, open and half-open states with exponential backoff between probes"""
+
+    def __init__(self, clock, failure_threshold=1):
+        self.clock = clock
+        self.failure_threshold = failure_threshold
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.retry_delay = None
+        self.lock = threading.Lock()
+        CIRCUIT_STATE.set(STATE_VALUES[CLOSED])
+
+    def _set_state(self, state):
+        self.state = state
+        CIRCUIT_STATE.set(STATE_VALUES[state])
+
+    def allow(self, force=False):
+        """True if a probe may be made now; moves an open breaker to half-open once its wait is over
+
+        force allows a probe before then, e.g. for a manual run.
+        """
+        with self.lock:
+            if self.state == OPEN:
+                if not force and self.clock.monotonic() - self.opened_at < self.retry_delay:
+                    return False
+                self._set_state(HALF_OPEN)
+            return True
+
+    def record_success(self):
+        """Close the breaker; returns True if it was not closed before"""
+        with self.lock:
+            recovered = self.state != CLOSED
+            self.failures = 0
+            self.retry_delay = None
+            self._set_state(CLOSED)
+            return recovered
+
+    def record_failure(self, base_delay, max_delay):
+        """Count a failed probe, opening the breaker with a doubled delay once past the threshold"""
+        with self.lock:
+            self.failures += 1
+            if self.state != HALF_OPEN and self.failures < self.failure_threshold:
+                return
+            if self.retry_delay is None:
+                self.retry_delay = base_delay
+            else:
+                self.retry_delay = self.retry_delay * 2
+            self.retry_delay = min(self.retry_delay, max(max_delay, base_delay))
+            self.opened_at = self.clock.monotonic()
+            self._set_state(OPEN)
+
+    def wait_seconds(self, default):
+        """How long the loop should wait before the next attempt"""
+        with self.lock:
+            if self.state == OPEN:
+                return self.retry_delay
+            return default
@@ -0,0 +1,169 @@
+"""Persistent catalog of an account's V-Class classes.
+
+Classes are keyed by a stable ID taken from the link on their card, so a
+class keeps its history when the list is reordered and across restarts.
+Each entry records the class name, the dates it was first and last seen in
+the list, its position in the current list, the times its attendance button
+was found open and the outcome of the last visit. The catalog also keeps
+the fingerprint of the last class list read, so an unchanged list is not
+read again after a restart either.
+
+Each account has its own file, logs/classes/<username>.json.
+"""
+import os
+import re
+import json
+import threading
+from urllib.parse import urlsplit
+
+from clock import SYSTEM_CLOCK
+
+CATALOG_DIR_NAME = "classes"
+MAX_OPEN_TIMES = 50
+
+NAME_PREFIX = "name:"
+
+def class_id(name, href=None):
+    """Stable ID of a class: the path and query of its link, or its name if the link has no path
+
+    Links such as "#", "#kelas" or "javascript:void(0)" would give every
+    class the same ID, so they count as no link.
+    """
+    parts = urlsplit(href or "")
+    path = parts.path.rstrip("/")
+    if parts.scheme not in ("", "http", "https") or not (path or parts.query):
+        return f"{NAME_PREFIX}{name}"
+    path = path or "/"
+    return f"{path}?{parts.query}" if parts.query else path
+
+class ClassCatalog:
+    """Known classes of one account by stable ID, with their history"""
+
+    def __init__(self, account, path=None, clock=SYSTEM_CLOCK):
+        self.account = account
+        self.path = path
+        self.clock = clock
+        self.classes = None
+        self.order = []
+        self.fingerprint = None
+        self.dirty = False
+        self.lock = threading.Lock()
+
+    def _get_path(self):
+        if self.path is None:
+            from logger import get_logs_dir
+            directory = get_logs_dir() / CATALOG_DIR_NAME
+            directory.mkdir(exist_ok=True)
+            file_name = re.sub(r"[^\w.-]", "_", self.account) or "default"
+            self.path = directory / f"{file_name}.json"
+        return self.path
+
+    def _load(self):
+        """Read the saved catalog on first use; must hold the lock"""
+        if self.classes is not None:
+            return
+        self.classes = {}
+        try:
+            with open(self._get_path(), encoding="utf-8") as catalog_file:
+                saved = json.load(catalog_file)
+            self.classes = dict(saved["classes"])
+            self.order = [key for key in saved.get("order", []) if key in self.classes]
+            self.fingerprint = saved.get("fingerprint")
+        except (OSError, ValueError, TypeError, KeyError):
+            pass
+
+    def save(self):
+        """Write the catalog if it changed since the last save"""
+        with self.lock:
+            if not self.dirty:
+                return
+            data = {"fingerprint": self.fingerprint, "order": self.order, "classes": self.classes}
+            text = json.dumps(data, indent=1, ensure_ascii=False)
+            self.dirty = False
+        path = self._get_path()
+        partial = path.with_name(path.name + ".tmp")
+        partial.write_text(text, encoding="utf-8")
+        os.replace(partial, path)
+
+    def unchanged(self, fingerprint):
+        """True if fingerprint is that of the last list read; marks its classes as seen today"""
+        with self.lock:
+            self._load()
+            if fingerprint is None or fingerprint != self.fingerprint:
+                return False
+            today = self.clock.now().date().isoformat()
+            for key in self.order:
+                if self.classes[key]["last_seen"] != today:
+                    self.classes[key]["last_seen"] = today
+                    self.dirty = True
+            return True
+
+    def update(self, cards, fingerprint):
+        """Record a freshly read list of (name, href) cards, in order; returns the IDs of new classes"""
+        today = self.clock.now().date().isoformat()
+        with self.lock:
+            self._load()
+            for key in self.order:
+                self.classes[key]["position"] = None
+            # Without a usable link a class is matched to a known one by name
+            by_name = {}
+            for key, entry in self.classes.items():
+                if by_name.get(entry["name"]) not in self.order:
+                    by_name[entry["name"]] = key
+            new_ids = []
+            self.order = []
+            for position, (name, href) in enumerate(cards, start=1):
+                key = class_id(name, href)
+                if key.startswith(NAME_PREFIX) and key not in self.classes and name in by_name:
+                    key = by_name[name]
+                if key in self.order:
+                    # Two cards with the same link: tell them apart by name, then by position
+                    key = class_id(name)
+                    if key in self.order:
+                        key = f"{key}#{position}"
+                entry = self.classes.get(key)
+                if entry is None:
+                    entry = self.classes[key] = {
+                        "first_seen": today, "open_times": [], "last_outcome": None, "last_checked": None
+                    }
+                    new_ids.append(key)
+                entry.update(name=name, last_seen=today, position=position)
+                self.order.append(key)
+            self.fingerprint = fingerprint
+            self.dirty = True
+            return new_ids
+
+    def id_at(self, position):
+        """ID of the class at a 1-based position in the current list, or None"""
+        with self.lock:
+            self._load()
+            if 1 <= position <= len(self.order):
+                return self.order[position - 1]
+            return None
+
+    def get(self, key):
+        """Copy of a class's entry, or None"""
+        with self.lock:
+            self._load()
+            entry = self.classes.get(key)
+            return dict(entry, open_times=list(entry["open_times"])) if entry else None
+
+    def names(self):
+        """Names of the classes in the current list, in order"""
+        with self.lock:
+            self._load()
+            return [self.classes[key]["name"] for key in self.order]
+
+    def record_visit(self, key, outcome, button_open=False):
+        """Record the outcome of checking a class and whether its attendance button was open"""
+        now = self.clock.now().isoformat(timespec="seconds")
+        with self.lock:
+            self._load()
+            entry = self.classes.get(key)
+            if entry is None:
+                return
+            entry["last_outcome"] = outcome
+            entry["last_checked"] = now
+            if button_open:
+                entry["open_times"] = (entry["open_times"] + [now])[-MAX_OPEN_TIMES:]
+            self.dirty = True
@@ -0,0 +1,48 @@
+"""Clocks used by the automation loop and the delays inside a session.
+
+The controller and AttendanceAutomation take a clock instead of calling the
+time module directly. SystemClock is the real thing; VirtualClock advances
+instantly when slept on, so simulate.py can run weeks of scheduling in
+seconds.
+"""
+import time
+import threading
+from datetime import datetime
+
+class SystemClock:
+    """Wall-clock time and real sleeps"""
+
+    def time(self):
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def now(self):
+        return datetime.now()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+class VirtualClock:
+    """Simulated time that only moves when someone sleeps on it"""
+
+    def __init__(self, start=None):
+        self.current = (start or datetime.now()).timestamp()
+        self.lock = threading.Lock()
+
+    def time(self):
+        with self.lock:
+            return self.current
+
+    def monotonic(self):
+        return self.time()
+
+    def now(self):
+        return datetime.fromtimestamp(self.time())
+
+    def sleep(self, seconds):
+        with self.lock:
+            self.current += max(seconds, 0)
+
+SYSTEM_CLOCK = SystemClock()
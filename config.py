@@ -1,49 +1,311 @@
 import sys
+import threading
 from pathlib import Path
 from configparser import ConfigParser
-import webbrowser
+from dataclasses import dataclass
+
+DEFAULT_CONFIG = {
+    "Credentials": {
+        "url": "https://lms.thamrin.ac.id/",
+        "username": "",
+        "password": ""
+    },
+    "Email": {
+        "enabled": "false",
+        "smtp_server": "smtp.gmail.com",
+        "smtp_port": "587",
+        "sender_email": "",
+        "sender_password": "",
+        "recipient_email": ""
+    },
+    "WhatsApp": {
+        "enabled": "false",
+        "recipient_number": ""
+    },
+    "Settings": {
+        "check_interval": "3600",
+        "notification_level": "all",
+        "log_format": "text",
+        "log_max_mb": "5",
+        "log_retention_days": "14",
+        "log_index": "true",
+        "metrics_file": "true",
+        "metrics_port": "0",
+        "trace_sessions": "false",
+        "profile_cpu": "false",
+        "profile_memory": "false",
+        "profile_retention": "20",
+        "attendance_delay_min": "0.1",
+        "attendance_delay_max": "0.3",
+        "proxy_server": "",
+        "record_sessions": "false",
+        "chrome_template_profile": "true",
+        "chrome_profile_in_memory": "true",
+        "page_load_strategy": "eager",
+        "blocked_resources": "image, font, media",
+        "blocked_hosts": "google-analytics.com, googletagmanager.com, doubleclick.net, facebook.net, hotjar.com",
+        "allowed_hosts": "",
+        "browser_profile": "standard",
+        "headless_shell_path": "",
+        "driver_memory_budget_mb": "0",
+        "adaptive_timeouts": "true",
+        "preflight_probe": "true",
+        "probe_timeout": "10",
+        "outage_retry_seconds": "120",
+        "class_retry_attempts": "2",
+        "class_retry_delay": "60"
+    }
+}
+
+@dataclass(frozen=True)
+class EmailSettings:
+    enabled: bool
+    smtp_server: str
+    smtp_port: int
+    sender_email: str
+    sender_password: str
+    recipient_email: str
+
+@dataclass(frozen=True)
+class WhatsAppSettings:
+    enabled: bool
+    recipient_number: str
+
+@dataclass(frozen=True)
+class GeneralSettings:
+    check_interval: int
+    notification_level: str
+    log_format: str
+    log_max_mb: float
+    log_retention_days: int
+    log_index: bool
+    metrics_file: bool
+    metrics_port: int
+    trace_sessions: bool
+    profile_cpu: bool
+    profile_memory: bool
+    profile_retention: int
+    attendance_delay_min: float
+    attendance_delay_max: float
+    proxy_server: str
+    record_sessions: bool
+    chrome_template_profile: bool
+    chrome_profile_in_memory: bool
+    page_load_strategy: str
+    blocked_resources: tuple
+    blocked_hosts: tuple
+    allowed_hosts: tuple
+    browser_profile: str
+    headless_shell_path: str
+    driver_memory_budget_mb: int
+    adaptive_timeouts: bool
+    preflight_probe: bool
+    probe_timeout: float
+    outage_retry_seconds: int
+    class_retry_attempts: int
+    class_retry_delay: float
+
+@dataclass(frozen=True)
+class Settings:
+    """Validated, immutable snapshot of the configuration file"""
+    url: str
+    username: str
+    password: str
+    email: EmailSettings
+    whatsapp: WhatsAppSettings
+    general: GeneralSettings
+
+    @classmethod
+    def from_parser(cls, parser):
+        """Build a snapshot from a ConfigParser, raising ValueError on invalid values"""
+        reader = _SectionReader(parser)
+        return cls(
+            url=reader.get("Credentials", "url"),
+            username=reader.get("Credentials", "username"),
+            password=reader.get("Credentials", "password"),
+            email=EmailSettings(
+                enabled=reader.get_bool("Email", "enabled"),
+                smtp_server=reader.get("Email", "smtp_server"),
+                smtp_port=reader.get_int("Email", "smtp_port", minimum=1, maximum=65535),
+                sender_email=reader.get("Email", "sender_email"),
+                sender_password=reader.get("Email", "sender_password"),
+                recipient_email=reader.get("Email", "recipient_email")
+            ),
+            whatsapp=WhatsAppSettings(
+                enabled=reader.get_bool("WhatsApp", "enabled"),
+                recipient_number=reader.get("WhatsApp", "recipient_number")
+            ),
+            general=GeneralSettings(
+                check_interval=reader.get_int("Settings", "check_interval", minimum=1),
+                notification_level=reader.get_choice("Settings", "notification_level", ("all", "errors", "none")),
+                log_format=reader.get_choice("Settings", "log_format", ("text", "json")),
+                log_max_mb=reader.get_float("Settings", "log_max_mb", minimum=0),
+                log_retention_days=reader.get_int("Settings", "log_retention_days", minimum=0),
+                log_index=reader.get_bool("Settings", "log_index"),
+                metrics_file=reader.get_bool("Settings", "metrics_file"),
+                metrics_port=reader.get_int("Settings", "metrics_port", minimum=0, maximum=65535),
+                trace_sessions=reader.get_bool("Settings", "trace_sessions"),
+                profile_cpu=reader.get_bool("Settings", "profile_cpu"),
+                profile_memory=reader.get_bool("Settings", "profile_memory"),
+                profile_retention=reader.get_int("Settings", "profile_retention", minimum=1),
+                attendance_delay_min=reader.get_float("Settings", "attendance_delay_min", minimum=0),
+                attendance_delay_max=reader.get_float("Settings", "attendance_delay_max", minimum=0),
+                proxy_server=reader.get("Settings", "proxy_server"),
+                record_sessions=reader.get_bool("Settings", "record_sessions"),
+                chrome_template_profile=reader.get_bool("Settings", "chrome_template_profile"),
+                chrome_profile_in_memory=reader.get_bool("Settings", "chrome_profile_in_memory"),
+                page_load_strategy=reader.get_choice("Settings", "page_load_strategy", ("normal", "eager")),
+                blocked_resources=reader.get_list("Settings", "blocked_resources",
+                                                  ("image", "font", "media", "stylesheet", "script")),
+                blocked_hosts=reader.get_list("Settings", "blocked_hosts"),
+                allowed_hosts=reader.get_list("Settings", "allowed_hosts"),
+                browser_profile=reader.get_choice("Settings", "browser_profile", ("standard", "low_memory")),
+                headless_shell_path=reader.get("Settings", "headless_shell_path"),
+                driver_memory_budget_mb=reader.get_int("Settings", "driver_memory_budget_mb", minimum=0),
+                adaptive_timeouts=reader.get_bool("Settings", "adaptive_timeouts"),
+                preflight_probe=reader.get_bool("Settings", "preflight_probe"),
+                probe_timeout=reader.get_float("Settings", "probe_timeout", minimum=0.1),
+                outage_retry_seconds=reader.get_int("Settings", "outage_retry_seconds", minimum=1),
+                class_retry_attempts=reader.get_int("Settings", "class_retry_attempts", minimum=0),
+                class_retry_delay=reader.get_float("Settings", "class_retry_delay", minimum=0)
+            )
+        )
+
+class _SectionReader:
+    """Typed access to a ConfigParser with fallbacks from DEFAULT_CONFIG"""
+
+    def __init__(self, parser):
+        self.parser = parser
+
+    def get(self, section, key):
+        return self.parser.get(section, key, fallback=DEFAULT_CONFIG[section][key]).strip()
+
+    def get_bool(self, section, key):
+        value = self.get(section, key).lower()
+        if value not in ConfigParser.BOOLEAN_STATES:
+            raise ValueError(f"[{section}] {key} must be true or false, got {value!r}")
+        return ConfigParser.BOOLEAN_STATES[value]
+
+    def get_int(self, section, key, minimum=None, maximum=None):
+        return int(self._get_number(section, key, int, minimum, maximum))
+
+    def get_float(self, section, key, minimum=None, maximum=None):
+        return self._get_number(section, key, float, minimum, maximum)
+
+    def get_choice(self, section, key, choices):
+        value = self.get(section, key).lower()
+        if value not in choices:
+            raise ValueError(f"[{section}] {key} must be one of {', '.join(choices)}, got {value!r}")
+        return value
+
+    def get_list(self, section, key, choices=None):
+        items = tuple(item.strip().lower() for item in self.get(section, key).split(",") if item.strip())
+        for item in items:
+            if choices is not None and item not in choices:
+                raise ValueError(f"[{section}] {key} items must be among {', '.join(choices)}, got {item!r}")
+        return items
+
+    def _get_number(self, section, key, number_type, minimum, maximum):
+        value = self.get(section, key)
+        try:
+            number = number_type(value)
+        except ValueError:
+            raise ValueError(f"[{section}] {key} must be a number, got {value!r}") from None
+        if (minimum is not None and number < minimum) or (maximum is not None and number > maximum):
+            raise ValueError(f"[{section}] {key} is out of range: {number}")
+        return number
 
 class Config:
-    """Configuration management class"""
+    """Configuration management class
 
-    def __init__(self):
-        self.config_file = Path.home() / "lms_automation_config.ini"
-        self.config = ConfigParser()
+    ``settings`` holds an immutable Settings snapshot. When the watcher is
+    running, edits to the INI file are validated and swapped in atomically,
+    and subscribers are called with the new snapshot.
+    """
+
+    def __init__(self, config_file=None):
+        self.config_file = Path(config_file) if config_file else Path.home() / "lms_automation_config.ini"
+        self.config = self._create_parser()
+        self.settings = None
+        self.subscribers = []
+        self.watcher_thread = None
+        self.watch_stop = threading.Event()
         self.load_config()
 
+    @staticmethod
+    def _create_parser():
+        # Allow "check_interval = 3600  # 1 hour" style comments
+        return ConfigParser(inline_comment_prefixes=("#", ";"))
+
     def load_config(self):
         """Load configuration from file or create default"""
         if self.config_file.exists():
             self.config.read(self.config_file)
+            self.settings = Settings.from_parser(self.config)
         else:
             # Create default configuration with empty credentials
-            self.config["Credentials"] = {
-                "url": "https://lms.thamrin.ac.id/",
-                "username": "",
-                "password": ""
-            }
-            self.config["Email"] = {
-                "enabled": "false",
-                "smtp_server": "smtp.gmail.com",
-                "smtp_port": "587",
-                "sender_email": "",
-                "sender_password": "",
-                "recipient_email": ""
-            }
-            self.config["WhatsApp"] = {
-                "enabled": "false",
-                "recipient_number": ""
-            }
-            self.config["Settings"] = {
-                "check_interval": "3600",
-                "notification_level": "all"
-            }
+            self.config.read_dict(DEFAULT_CONFIG)
             self.save_config()
             self.first_run_message()
             sys.exit("Please configure the INI file and restart the application.")
 
+    def reload(self):
+        """Re-read the INI file and swap in a new snapshot if it is valid
+
+        Returns the new Settings; raises ValueError (or a configparser error)
+        and keeps the current snapshot if the file is invalid.
+        """
+        parser = self._create_parser()
+        parser.read(self.config_file)
+        settings = Settings.from_parser(parser)
+
+        self.config = parser
+        self.settings = settings
+        for callback in list(self.subscribers):
+            callback(settings)
+        return settings
+
+    def subscribe(self, callback):
+        """Call callback(settings) whenever a new snapshot is loaded"""
+        self.subscribers.append(callback)
+
+    def start_watching(self, logger, interval=2.0):
+        """Poll the INI file for changes and reload it in a background thread"""
+        if self.watcher_thread:
+            return
+        self.watch_stop.clear()
+        self.watcher_thread = threading.Thread(
+            target=self._watch, args=(logger, interval), daemon=True)
+        self.watcher_thread.start()
+
+    def stop_watching(self):
+        """Stop the file watcher"""
+        self.watch_stop.set()
+        self.watcher_thread = None
+
+    def _watch(self, logger, interval):
+        last_mtime = self._get_mtime()
+        while not self.watch_stop.wait(interval):
+            mtime = self._get_mtime()
+            if mtime == last_mtime or mtime is None:
+                continue
+            last_mtime = mtime
+            try:
+                self.reload()
+                logger.info("Configuration reloaded from %s", self.config_file)
+            except Exception as e:
+                logger.error("Ignoring invalid configuration change: %s", e)
+
+    def _get_mtime(self):
+        try:
+            return self.config_file.stat().st_mtime_ns
+        except OSError:
+            return None
+
     def first_run_message(self):
         """Display a message for first-time users"""
+        import webbrowser
+
         config_path = str(self.config_file)
         help_file = Path.home() / "lms_automation_setup.html"
         
@@ -75,11 +337,8 @@ class Config:
 
     def get_credentials(self):
         """Get LMS credentials"""
-        return (
-            self.config["Credentials"]["url"],
-            self.config["Credentials"]["username"],
-            self.config["Credentials"]["password"]
-        )
+        settings = self.settings
+        return settings.url, settings.username, settings.password
 
     def get_email_settings(self):
         """Get email notification settings"""
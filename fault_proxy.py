@@ -0,0 +1,313 @@
+"""Local proxy that injects latency and faults, driven by scenario files.
+
+Chrome (the LMS session and the WhatsApp notifier) is pointed at the proxy
+with the proxy_server setting; SMTP goes through a plain TCP forward
+(--forward) by pointing smtp_server/smtp_port at it. Each connection is
+matched against the scenario's rules by target host, and the first matching
+rule decides what happens to it:
+
+    {
+      "name": "flaky_lms",
+      "description": "One in five LMS requests fails with 503",
+      "seed": 1,
+      "rules": [
+        {"match": "lms.thamrin.ac.id", "error_rate": 0.2, "error_status": 503},
+        {"match": "*", "latency_ms": 100}
+      ]
+    }
+
+Rule fields (all optional):
+    match             host glob, default "*"
+    latency_ms        added before each HTTP request is forwarded, and before
+                      each chunk relayed back through an HTTPS tunnel or forward
+    jitter_ms         random extra latency, up to this value
+    connect_delay_ms  delay before the upstream connection is set up (slow
+                      TCP/TLS handshakes)
+    drop_rate         fraction of connections closed without any response
+    error_rate        fraction of requests answered with error_status
+                      (HTTPS tunnels get it as the CONNECT response)
+    error_status      default 503
+    bandwidth_kbps    throttle responses to this many kilobytes per second
+
+    python fault_proxy.py scenarios/slow_network.json --port 8899
+    python fault_proxy.py scenarios/drops.json --forward 2525:smtp.gmail.com:587
+"""
+import json
+import time
+import select
+import socket
+import random
+import argparse
+import threading
+import socketserver
+from fnmatch import fnmatch
+from pathlib import Path
+
+BUFFER_SIZE = 64 * 1024
+UPSTREAM_TIMEOUT = 30
+IDLE_TIMEOUT = 120
+MAX_HEADER_BYTES = 64 * 1024
+
+class FaultRule:
+    """Faults applied to connections whose target host matches `match`"""
+
+    FIELDS = ("match", "latency_ms", "jitter_ms", "connect_delay_ms", "drop_rate",
+              "error_rate", "error_status", "bandwidth_kbps")
+
+    def __init__(self, match="*", latency_ms=0, jitter_ms=0, connect_delay_ms=0, drop_rate=0.0,
+                 error_rate=0.0, error_status=503, bandwidth_kbps=0):
+        self.match = match
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.connect_delay_ms = connect_delay_ms
+        self.drop_rate = drop_rate
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.bandwidth_kbps = bandwidth_kbps
+
+    @classmethod
+    def from_dict(cls, data):
+        unknown = set(data) - set(cls.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fault rule fields: {', '.join(sorted(unknown))}")
+        return cls(**data)
+
+    def matches(self, host):
+        return fnmatch(host.lower(), self.match.lower())
+
+NO_FAULTS = FaultRule()
+
+class Scenario:
+    """A named list of fault rules"""
+
+    def __init__(self, name, rules, description="", seed=None):
+        self.name = name
+        self.rules = rules
+        self.description = description
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        """Load a scenario from a JSON file, raising ValueError if it is invalid"""
+        path = Path(path)
+        with open(path, encoding="utf-8") as scenario_file:
+            data = json.load(scenario_file)
+        rules = [FaultRule.from_dict(rule) for rule in data.get("rules", [])]
+        return cls(data.get("name", path.stem), rules, data.get("description", ""), data.get("seed"))
+
+    def rule_for(self, host):
+        for rule in self.rules:
+            if rule.matches(host):
+                return rule
+        return NO_FAULTS
+
+    def chance(self, rate):
+        """Return True with probability rate, from the scenario's seeded generator"""
+        if rate <= 0:
+            return False
+        with self.lock:
+            return self.random.random() < rate
+
+    def latency(self, rule):
+        """Seconds of latency to add for one request or chunk"""
+        if not rule.latency_ms and not rule.jitter_ms:
+            return 0.0
+        with self.lock:
+            jitter = self.random.uniform(0, rule.jitter_ms) if rule.jitter_ms else 0
+        return (rule.latency_ms + jitter) / 1000
+
+class FaultProxy:
+    """HTTP/HTTPS proxy and TCP forwarder applying a Scenario's faults"""
+
+    def __init__(self, scenario, logger=None):
+        self.scenario = scenario
+        self.logger = logger
+        self.servers = []
+        self.lock = threading.Lock()
+        self.stats = {"connections": 0, "requests": 0, "dropped": 0, "errors": 0, "delayed_seconds": 0.0}
+
+    def start(self, port=0):
+        """Start the proxy on 127.0.0.1; returns "127.0.0.1:<port>" for proxy_server"""
+        server = self._serve(port, forward_to=None)
+        return "%s:%d" % server.server_address[:2]
+
+    def add_forward(self, port, target_host, target_port):
+        """Forward 127.0.0.1:port to target_host:target_port with the scenario's faults"""
+        server = self._serve(port, forward_to=(target_host, target_port))
+        return server.server_address[1]
+
+    def stop(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        self.servers = []
+
+    def _serve(self, port, forward_to):
+        proxy = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                try:
+                    if forward_to:
+                        proxy._handle_forward(self.request, *forward_to)
+                    else:
+                        proxy._handle_proxy(self.request)
+                except OSError:
+                    pass
+
+        server = socketserver.ThreadingTCPServer(("127.0.0.1", port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.servers.append(server)
+        return server
+
+    def _count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def _sleep(self, seconds):
+        if seconds > 0:
+            self._count("delayed_seconds", seconds)
+            time.sleep(seconds)
+
+    def _log(self, message, *args):
+        if self.logger:
+            self.logger.debug(message, *args)
+
+    def _handle_forward(self, client, host, port):
+        self._count("connections")
+        rule = self.scenario.rule_for(host)
+        self._sleep(rule.connect_delay_ms / 1000)
+        if self.scenario.chance(rule.drop_rate):
+            self._count("dropped")
+            self._log("Dropped connection to %s:%d", host, port)
+            return
+        with socket.create_connection((host, port), timeout=UPSTREAM_TIMEOUT) as upstream:
+            self._relay(client, upstream, rule)
+
+    def _handle_proxy(self, client):
+        self._count("connections")
+        head, body = self._read_head(client)
+        if not head:
+            return
+        request_line, _, header_block = head.partition(b"\r\n")
+        try:
+            method, target, version = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            client.sendall(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+            return
+
+        try:
+            if method == "CONNECT":
+                host, _, port = target.rpartition(":")
+                host, port = host.strip("[]"), int(port or 443)
+            else:
+                # Absolute-form request: http://host[:port]/path
+                if not target.startswith("http://"):
+                    raise ValueError(f"not an absolute http URL: {target}")
+                authority, _, path = target[len("http://"):].partition("/")
+                host, _, port = authority.partition(":")
+                port = int(port or 80)
+                target = "/" + path
+            if not host or not 0 < port < 65536:
+                raise ValueError(f"bad target: {target}")
+        except ValueError as e:
+            self._log("Rejected %s request: %s", method, e)
+            client.sendall(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+            return
+
+        self._count("requests")
+        rule = self.scenario.rule_for(host)
+        self._sleep(rule.connect_delay_ms / 1000)
+        if self.scenario.chance(rule.drop_rate):
+            self._count("dropped")
+            self._log("Dropped %s %s:%d", method, host, port)
+            return
+        if self.scenario.chance(rule.error_rate):
+            self._count("errors")
+            self._log("Injected %d for %s %s:%d", rule.error_status, method, host, port)
+            client.sendall(b"HTTP/1.1 %d Injected Fault\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+                           % rule.error_status)
+            return
+
+        try:
+            upstream = socket.create_connection((host, port), timeout=UPSTREAM_TIMEOUT)
+        except OSError:
+            client.sendall(b"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            return
+
+        with upstream:
+            if method == "CONNECT":
+                client.sendall(b"HTTP/1.1 200 Connection Established\r\n\r\n")
+                if body:
+                    upstream.sendall(body)
+            else:
+                self._sleep(self.scenario.latency(rule))
+                headers = [line for line in header_block.split(b"\r\n")
+                           if line and not line.lower().startswith((b"proxy-connection:", b"connection:"))]
+                headers.append(b"Connection: close")
+                upstream.sendall(f"{method} {target} {version}".encode("latin-1") + b"\r\n" +
+                                 b"\r\n".join(headers) + b"\r\n\r\n" + body)
+                # The request was delayed once; the response is relayed as is
+                rule = FaultRule(bandwidth_kbps=rule.bandwidth_kbps)
+            self._relay(client, upstream, rule)
+
+    @staticmethod
+    def _read_head(client):
+        """Read up to the end of the request headers; returns (head, remaining bytes)"""
+        data = b""
+        while b"\r\n\r\n" not in data:
+            chunk = client.recv(BUFFER_SIZE)
+            if not chunk:
+                return None, b""
+            data += chunk
+            if len(data) > MAX_HEADER_BYTES:
+                return None, b""
+        head, _, rest = data.partition(b"\r\n\r\n")
+        return head, rest
+
+    def _relay(self, client, upstream, rule):
+        """Copy bytes both ways until either side closes, delaying and throttling upstream data"""
+        sockets = [client, upstream]
+        while True:
+            readable, _, _ = select.select(sockets, [], [], IDLE_TIMEOUT)
+            if not readable:
+                return
+            for source in readable:
+                data = source.recv(BUFFER_SIZE)
+                if not data:
+                    return
+                if source is upstream:
+                    self._sleep(self.scenario.latency(rule))
+                    if rule.bandwidth_kbps:
+                        self._sleep(len(data) / (rule.bandwidth_kbps * 1024))
+                    client.sendall(data)
+                else:
+                    upstream.sendall(data)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fault-injecting proxy for a scenario file")
+    parser.add_argument("scenario", help="Scenario JSON file, e.g. scenarios/slow_network.json")
+    parser.add_argument("--port", type=int, default=8899, help="Proxy port (default 8899)")
+    parser.add_argument("--forward", action="append", default=[], metavar="PORT:HOST:PORT",
+                        help="Also forward a local TCP port, e.g. 2525:smtp.gmail.com:587")
+    args = parser.parse_args()
+
+    scenario = Scenario.load(args.scenario)
+    proxy = FaultProxy(scenario)
+    print(f"Scenario {scenario.name}: {scenario.description}")
+    print(f"Proxy listening on {proxy.start(args.port)} (set proxy_server to this)")
+    for forward in args.forward:
+        local_port, host, port = forward.split(":")
+        proxy.add_forward(int(local_port), host, int(port))
+        print(f"Forwarding 127.0.0.1:{local_port} to {host}:{port}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        proxy.stop()
+        print(json.dumps(proxy.stats))
+
+if __name__ == "__main__":
+    main()
@@ -1,124 +1,12 @@
-import threading
-import pystray
-from PIL import Image, ImageDraw
-from datetime import datetime
-
-class SystemTrayIcon:
-    """Class for managing the system tray icon"""
-
-    def __init__(self, logger, app_controller):
-        self.logger = logger
-        self.app_controller = app_controller
-        self.icon = None
-        self.status = "idle"
-        self.last_status_change = datetime.now()
-
-    def create_image(self, width, height):
-        """Create an image for the system tray icon based on current status"""
-        image = Image.new('RGB', (width, height), color=(0, 0, 0))
-        dc = ImageDraw.Draw(image)
-
-        colors = {
-            "idle": (255, 165, 0),    # Orange
-            "running": (0, 255, 0),    # Green
-            "error": (255, 0, 0)       # Red
-        }
-        
-        dc.ellipse([(0, 0), (width, height)], fill=colors.get(self.status, colors["idle"]))
-        return image
-
-    def update_status(self, status):
-        """Update the status of the system tray icon"""
-        if status in ["idle", "running", "error"]:
-            self.status = status
-            self.last_status_change = datetime.now()
-            if self.icon:
-                self.icon.icon = self.create_image(64, 64)
-                self.icon.update_menu()
-
-    def get_status_text(self):
-        """Get the current status text for the menu"""
-        timestamp = self.last_status_change.strftime("%H:%M:%S")
-        return f"Status: {self.status.upper()} (since {timestamp})"
-
-    def create_menu(self):
-        """Create the system tray menu"""
-        return pystray.Menu(
-            pystray.MenuItem(
-                lambda text: self.get_status_text(),
-                lambda: None,
-                enabled=False
-            ),
-            pystray.MenuItem(
-                "Start Automation",
-                lambda: self.app_controller.start_automation(),
-                enabled=lambda item: self.status != "running"
-            ),
-            pystray.MenuItem(
-                "Stop Automation",
-                lambda: self.app_controller.stop_automation(),
-                enabled=lambda item: self.status == "running"
-            ),
-            pystray.MenuItem(
-                "Run Now",
-                lambda: self.app_controller.run_now(),
-                enabled=lambda item: self.status != "running"
-            ),
-            pystray.MenuItem(
-                "Test Email",
-                lambda: self.app_controller.test_email_notification()
-            ),
-            pystray.MenuItem(
-                "Test WhatsApp",
-                lambda: self.app_controller.test_whatsapp_notification()
-            ),
-            pystray.MenuItem(
-                "Open Logs",
-                self.open_logs
-            ),
-            pystray.MenuItem(
-                "Exit",
-                lambda: self.app_controller.exit_app()
-            )
-        )
-
-    def open_logs(self):
-        """Open the logs directory"""
-        try:
-            from pathlib import Path
-            import sys
-            import webbrowser
-            
-            base_path = Path(sys.executable).parent if getattr(sys, 'frozen', False) else Path(__file__).parent
-            logs_dir = base_path / 'logs'
-            logs_dir.mkdir(exist_ok=True)
-            webbrowser.open(str(logs_dir))
-        except Exception as e:
-            self.logger.error(f"Failed to open logs directory: {e}")
-
-    def run(self):
-        """Run the system tray icon"""
-        self.icon = pystray.Icon(
-            "lms_automation",
-            self.create_image(64, 64),
-            "LMS Attendance Automation",
-            self.create_menu()
-        )
-        self.icon.run()
-
-    def stop(self):
-        """Stop the system tray icon"""
-        if self.icon:
-            self.icon.stop()
-            import threading
-import pystray
-import webbrowser
-from PIL import Image, ImageDraw
 from datetime import datetime
 from pathlib import Path
-import sys
 import json
 
+from logger import get_logs_dir, ACTIVE_LOG_NAME
+
+# pystray, PIL and webbrowser are imported lazily; they are only needed once
+# the tray icon is actually drawn or a menu entry is used.
+
 class SystemTrayIcon:
     """Class for managing the system tray icon"""
 
@@ -140,6 +28,8 @@ class SystemTrayIcon:
 
     def create_image(self, width, height):
         """Create an image for the system tray icon based on current status"""
+        from PIL import Image, ImageDraw
+
         image = Image.new('RGB', (width, height), color=(0, 0, 0))
         dc = ImageDraw.Draw(image)
 
@@ -177,9 +67,9 @@ class SystemTrayIcon:
                 self.icon.update_menu()
 
             # Log status change
-            self.logger.info(f"Status changed: {old_status} -> {status}")
+            self.logger.info("Status changed: %s -> %s", old_status, status)
             if error_message:
-                self.logger.error(f"Error details: {error_message}")
+                self.logger.error("Error details: %s", error_message)
 
     def get_status_text(self):
         """Get the current status text for the menu"""
@@ -205,7 +95,7 @@ class SystemTrayIcon:
             with open(session_file, 'w') as f:
                 json.dump(session_info, f, indent=2)
         except Exception as e:
-            self.logger.error(f"Failed to save session info: {e}")
+            self.logger.error("Failed to save session info: %s", e)
 
     def load_session_info(self):
         """Load previous session information"""
@@ -215,14 +105,16 @@ class SystemTrayIcon:
                 with open(session_file, 'r') as f:
                     session_info = json.load(f)
                     
-                self.logger.info(f"Loaded previous session info: {session_info}")
+                self.logger.info("Loaded previous session info: %s", session_info)
                 return session_info
         except Exception as e:
-            self.logger.error(f"Failed to load session info: {e}")
+            self.logger.error("Failed to load session info: %s", e)
         return None
 
     def create_menu(self):
         """Create the system tray menu with all options"""
+        import pystray
+
         return pystray.Menu(
             pystray.MenuItem(
                 lambda text: self.get_status_text(),
@@ -284,25 +176,24 @@ class SystemTrayIcon:
         )
 
     def open_logs(self):
-        """Open the logs directory"""
+        """Open the active log file, or the logs directory if nothing was logged yet"""
+        import webbrowser
+
         try:
-            base_path = Path(sys.executable).parent if getattr(sys, 'frozen', False) else Path(__file__).parent
-            logs_dir = base_path / 'logs'
-            logs_dir.mkdir(exist_ok=True)
-            
-            # Open the most recent log file if it exists
-            log_files = list(logs_dir.glob('automation_*.log'))
-            if log_files:
-                latest_log = max(log_files, key=lambda x: x.stat().st_mtime)
-                webbrowser.open(str(latest_log))
+            logs_dir = get_logs_dir()
+            active_log = logs_dir / ACTIVE_LOG_NAME
+            if active_log.exists():
+                webbrowser.open(str(active_log))
             else:
                 webbrowser.open(str(logs_dir))
         except Exception as e:
-            self.logger.error(f"Failed to open logs: {e}")
+            self.logger.error("Failed to open logs: %s", e)
             self.update_status("error", f"Failed to open logs: {e}")
 
     def open_config(self):
         """Open the configuration file"""
+        import webbrowser
+
         try:
             config_file = Path.home() / "lms_automation_config.ini"
             if config_file.exists():
@@ -311,7 +202,7 @@ class SystemTrayIcon:
                 self.logger.error("Configuration file not found")
                 self.update_status("error", "Configuration file not found")
         except Exception as e:
-            self.logger.error(f"Failed to open config: {e}")
+            self.logger.error("Failed to open config: %s", e)
             self.update_status("error", f"Failed to open config: {e}")
 
     def clear_session_data(self):
@@ -325,11 +216,13 @@ class SystemTrayIcon:
             self.logger.info("Session data cleared successfully")
             self.update_status("idle")
         except Exception as e:
-            self.logger.error(f"Failed to clear session data: {e}")
+            self.logger.error("Failed to clear session data: %s", e)
             self.update_status("error", f"Failed to clear session data: {e}")
 
     def run(self):
         """Run the system tray icon"""
+        import pystray
+
         # Load previous session info
         session_info = self.load_session_info()
         if session_info:
@@ -350,7 +243,7 @@ class SystemTrayIcon:
         try:
             self.icon.run()
         except Exception as e:
-            self.logger.error(f"System tray icon error: {e}")
+            self.logger.error("System tray icon error: %s", e)
             raise
 
     def stop(self):
@@ -361,4 +254,4 @@ class SystemTrayIcon:
                 self.save_session_info()
                 self.icon.stop()
             except Exception as e:
-                self.logger.error(f"Error stopping system tray icon: {e}")
\ No newline at end of file
+                self.logger.error("Error stopping system tray icon: %s", e)
\ No newline at end of file
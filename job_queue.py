@@ -0,0 +1,142 @@
+"""Durable, lease-based queue of account sessions shared by worker nodes.
+
+Each account is one recurring job: the config file it runs with and the
+time it is next due. A worker claims a due job by taking a lease on it
+(owner, expiry and a random token) in a single write transaction, keeps the
+lease alive with heartbeats while the session runs, and acks it, which
+clears the lease and schedules the next run. A job whose worker died is
+claimed again once its lease expires. Heartbeats and acks only succeed with
+the claim's token, so a worker that lost its lease cannot touch the job
+after someone else has claimed it.
+
+The backend is SQLite in rollback-journal mode, so the database file can
+live on a shared volume that all nodes mount (or on a local disk for
+several workers on one machine).
+"""
+import os
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+from pathlib import Path
+
+from clock import SYSTEM_CLOCK
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    account TEXT NOT NULL UNIQUE,
+    config_file TEXT NOT NULL,
+    due_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_token TEXT,
+    lease_expires REAL,
+    claims INTEGER NOT NULL DEFAULT 0,
+    last_owner TEXT,
+    last_outcome TEXT,
+    last_finished REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_due ON jobs (due_at);
+"""
+
+JOB_COLUMNS = ("id", "account", "config_file", "due_at", "lease_owner", "lease_token", "lease_expires",
+               "claims", "last_owner", "last_outcome", "last_finished")
+
+class JobQueue:
+    """Account sessions as jobs with leases, in a SQLite file"""
+
+    def __init__(self, path, clock=SYSTEM_CLOCK):
+        self.path = Path(path)
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30,
+                                          isolation_level=None)
+        # WAL needs shared memory between the processes, which network filesystems don't provide
+        self.connection.execute("PRAGMA journal_mode=DELETE")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def _write(self, statements):
+        """Run statements(cursor) in an immediate transaction and return its result"""
+        with self.lock:
+            cursor = self.connection.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                result = statements(cursor)
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+            cursor.execute("COMMIT")
+            return result
+
+    def add(self, account, config_file, due_at=None):
+        """Add an account, or point an existing one at a new config file"""
+        due_at = self.clock.time() if due_at is None else due_at
+        self._write(lambda cursor: cursor.execute(
+            "INSERT INTO jobs (account, config_file, due_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (account) DO UPDATE SET config_file = excluded.config_file",
+            (account, str(config_file), due_at)
+        ))
+
+    def remove(self, account):
+        """Delete an account's job; returns True if it existed"""
+        return self._write(lambda cursor: cursor.execute(
+            "DELETE FROM jobs WHERE account = ?", (account,)).rowcount) > 0
+
+    def claim(self, owner, lease_seconds):
+        """Lease the job that has been due longest; returns it as a dict, or None if none is due"""
+        def statements(cursor):
+            now = self.clock.time()
+            row = cursor.execute(
+                f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs "
+                "WHERE due_at <= ? AND (lease_owner IS NULL OR lease_expires < ?) "
+                "ORDER BY due_at LIMIT 1",
+                (now, now)
+            ).fetchone()
+            if row is None:
+                return None
+            job = dict(zip(JOB_COLUMNS, row))
+            job["reclaimed_from"] = job["lease_owner"]
+            job["lease_owner"] = owner
+            job["lease_token"] = uuid.uuid4().hex
+            job["lease_expires"] = now + lease_seconds
+            cursor.execute(
+                "UPDATE jobs SET lease_owner = ?, lease_token = ?, lease_expires = ?, claims = claims + 1 "
+                "WHERE id = ?",
+                (owner, job["lease_token"], job["lease_expires"], job["id"])
+            )
+            return job
+        return self._write(statements)
+
+    def heartbeat(self, job, lease_seconds):
+        """Extend the lease; False if it was lost to another worker"""
+        return self._write(lambda cursor: cursor.execute(
+            "UPDATE jobs SET lease_expires = ? WHERE id = ? AND lease_token = ?",
+            (self.clock.time() + lease_seconds, job["id"], job["lease_token"])
+        ).rowcount) > 0
+
+    def ack(self, job, outcome, next_due):
+        """Release the lease and schedule the next run; False if the lease was lost"""
+        return self._write(lambda cursor: cursor.execute(
+            "UPDATE jobs SET lease_owner = NULL, lease_token = NULL, lease_expires = NULL, due_at = ?, "
+            "last_owner = ?, last_outcome = ?, last_finished = ? WHERE id = ? AND lease_token = ?",
+            (next_due, job["lease_owner"], outcome, self.clock.time(), job["id"], job["lease_token"])
+        ).rowcount) > 0
+
+    def jobs(self):
+        """All jobs, soonest due first"""
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs ORDER BY due_at").fetchall()
+        return [dict(zip(JOB_COLUMNS, row)) for row in rows]
+
+def default_owner():
+    """Worker name: host and process ID"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def format_time(timestamp):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp)) if timestamp else "-"
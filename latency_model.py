@@ -0,0 +1,164 @@
+"""Wait timeouts learned from how long the LMS and WhatsApp Web actually take.
+
+Every wait records its duration under a key naming the page and the element
+(e.g. "class page: attendance button"). The model keeps the last
+MAX_SAMPLES durations per key and sets the key's timeout to PERCENTILE of
+them times MULTIPLIER plus MARGIN seconds:
+
+- Waits for something that should be there (a login field, the class list)
+  never get less than their fixed default, but grow on slow days. When one
+  times out, the timeout is kept as a censored sample, a lower bound of how
+  long the wait would have taken, so repeated timeouts push the estimate up.
+  Censored samples share the ring buffer with the successful ones, so they
+  age out once waits are fast again.
+- Negative checks, where a timeout is a normal answer (no attendance button
+  open, a locator strategy that does not match), follow the learned value
+  down to MIN_NEGATIVE_TIMEOUT, so they resolve in about a second rather
+  than the full default. Their timeouts are not recorded, since they cannot
+  tell a slow element from a missing one. Instead, every
+  FULL_NEGATIVE_CHECK_EVERY-th check runs for the full default, so an
+  element that has become slower is still found and learned from. Until a
+  key has MIN_SAMPLES, the default is used; the fallback key, such as the
+  time the page itself took to load, can only raise the timeout.
+
+The samples are kept in logs/latency_model.json across restarts.
+"""
+import os
+import json
+import time
+import threading
+from collections import deque
+
+from metrics import REGISTRY
+
+MODEL_FILE_NAME = "latency_model.json"
+MAX_SAMPLES = 50
+MIN_SAMPLES = 5
+PERCENTILE = 95
+MULTIPLIER = 2.0
+MARGIN = 0.5
+MIN_NEGATIVE_TIMEOUT = 1.0
+FULL_NEGATIVE_CHECK_EVERY = 10
+MAX_TIMEOUT = 60.0
+
+ADAPTIVE_TIMEOUT = REGISTRY.gauge(
+    "lms_adaptive_timeout_seconds",
+    "Timeout last used for each learned wait",
+    ("wait",)
+)
+
+def percentile(values, rank):
+    """Nearest-rank percentile of a non-empty sequence"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(rank / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+class LatencyModel:
+    """Recent wait durations per key and the timeouts derived from them"""
+
+    def __init__(self, path=None):
+        self.path = path
+        # key -> deque of [seconds, censored]
+        self.samples = None
+        # key -> negative checks made in this process
+        self.negative_checks = {}
+        self.dirty = False
+        self.lock = threading.Lock()
+
+    def _get_path(self):
+        if self.path is None:
+            from logger import get_logs_dir
+            self.path = get_logs_dir() / MODEL_FILE_NAME
+        return self.path
+
+    def _load(self):
+        """Read the saved samples on first use; must hold the lock"""
+        if self.samples is not None:
+            return
+        self.samples = {}
+        try:
+            with open(self._get_path(), encoding="utf-8") as model_file:
+                saved = json.load(model_file)
+            for key, values in saved.get("samples", {}).items():
+                # Plain numbers are successful waits from before censoring was recorded
+                self.samples[key] = deque(
+                    ([float(value), False] if isinstance(value, (int, float)) else [float(value[0]), bool(value[1])]
+                     for value in values),
+                    maxlen=MAX_SAMPLES
+                )
+        except (OSError, ValueError, TypeError, AttributeError, IndexError):
+            pass
+
+    def save(self):
+        """Write the samples if they changed since the last save"""
+        with self.lock:
+            if not self.dirty:
+                return
+            data = {"samples": {key: [list(sample) for sample in values] for key, values in self.samples.items()}}
+            self.dirty = False
+        path = self._get_path()
+        partial = path.with_name(path.name + ".tmp")
+        partial.write_text(json.dumps(data, indent=1), encoding="utf-8")
+        os.replace(partial, path)
+
+    def observe(self, key, seconds, censored=False):
+        """Record how long a wait took; censored if it timed out after seconds"""
+        with self.lock:
+            self._load()
+            self.samples.setdefault(key, deque(maxlen=MAX_SAMPLES)).append([round(seconds, 3), censored])
+            self.dirty = True
+
+    def learned(self, key):
+        """Timeout suggested by the samples of key, or None if there are too few
+
+        Censored samples count at their timeout, a lower bound of how long
+        those waits would have taken.
+        """
+        with self.lock:
+            self._load()
+            values = [seconds for seconds, _ in self.samples.get(key, ())]
+        if len(values) < MIN_SAMPLES:
+            return None
+        return percentile(values, PERCENTILE) * MULTIPLIER + MARGIN
+
+    def timeout(self, key, default, negative=False, fallback=None):
+        """Timeout in seconds for the next wait on key"""
+        learned = self.learned(key)
+        if learned is None:
+            timeout = default
+        elif negative:
+            with self.lock:
+                checks = self.negative_checks.get(key, 0)
+                self.negative_checks[key] = checks + 1
+            # Now and then at full length, so a button that became slower is found again
+            full_check = checks % FULL_NEGATIVE_CHECK_EVERY == FULL_NEGATIVE_CHECK_EVERY - 1
+            timeout = max(learned, default if full_check else MIN_NEGATIVE_TIMEOUT)
+        else:
+            timeout = max(learned, default)
+        if fallback:
+            timeout = max(timeout, self.learned(fallback) or 0)
+        timeout = min(timeout, max(MAX_TIMEOUT, default))
+        ADAPTIVE_TIMEOUT.set(timeout, wait=key)
+        return timeout
+
+    def wait(self, driver, key, condition, default, negative=False, fallback=None, adaptive=True):
+        """WebDriverWait(driver, timeout).until(condition), timed and learned from
+
+        Raises TimeoutException like WebDriverWait. A timeout is recorded as a
+        censored sample unless the wait is a negative check.
+        """
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.common.exceptions import TimeoutException
+
+        timeout = self.timeout(key, default, negative, fallback) if adaptive else default
+        start = time.perf_counter()
+        try:
+            result = WebDriverWait(driver, timeout).until(condition)
+        except TimeoutException:
+            if not negative:
+                self.observe(key, time.perf_counter() - start, censored=True)
+            raise
+        self.observe(key, time.perf_counter() - start)
+        return result
+
+LATENCY_MODEL = LatencyModel()
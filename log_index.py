@@ -0,0 +1,306 @@
+"""Indexed search over the automation logs.
+
+Records are added to a SQLite index in the logs directory as they are written
+(see LogIndexHandler), so lookups by date, session, class and level never
+rescan the log files. Logs written before the index existed are imported once,
+and ~/attendance_log.txt is indexed incrementally from the last read offset.
+
+    python log_index.py --class "Pemrograman Web" --date 2026-10-13
+    python log_index.py --session 20261019-143820-3
+    python log_index.py --level ERROR --since 2026-09-01 --text timeout
+"""
+import re
+import sys
+import gzip
+import json
+import time
+import sqlite3
+import logging
+import argparse
+import threading
+from pathlib import Path
+
+from logger import get_logs_dir, ACTIVE_LOG_NAME, INDEX_NAME
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    time TEXT NOT NULL,
+    date TEXT NOT NULL,
+    level TEXT NOT NULL,
+    session TEXT,
+    account TEXT,
+    class TEXT COLLATE NOCASE,
+    phase TEXT,
+    source TEXT NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_by_date ON entries (date, level);
+CREATE INDEX IF NOT EXISTS entries_by_class ON entries (class, date);
+CREATE INDEX IF NOT EXISTS entries_by_session ON entries (session);
+CREATE TABLE IF NOT EXISTS sources (
+    name TEXT PRIMARY KEY,
+    offset INTEGER NOT NULL
+);
+"""
+
+ENTRY_COLUMNS = ("time", "date", "level", "session", "account", "class", "phase", "source", "message")
+
+# "2026-10-19 14:38:20,051 - INFO - message"
+TEXT_LINE = re.compile(r'^(\d{4}-\d{2}-\d{2}) (\d{2}:\d{2}:\d{2}),(\d{3}) - (\w+) - (.*)$')
+# "[2026-10-19 14:38:20] Attendance recorded for Class 3, Pemrograman Web"
+ATTENDANCE_LINE = re.compile(r'^\[(\d{4}-\d{2}-\d{2}) (\d{2}:\d{2}:\d{2})\] (.*)$')
+ATTENDANCE_CLASS = re.compile(r'^Attendance recorded for Class \d+, (.*)$')
+# Plain-text messages that carry the session and class
+SESSION_MESSAGE = re.compile(r'^Starting Session (\d+)(?: \((\S+)\))?$')
+CLASS_MESSAGE = re.compile(r'^Checking attendance for Class \d+: (.*)$')
+
+class LogIndex:
+    """On-disk index of log entries with a query API"""
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else get_logs_dir() / INDEX_NAME
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(str(self.path), check_same_thread=False, timeout=10)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def add(self, entries):
+        """Add entries (dicts keyed by ENTRY_COLUMNS) to the index"""
+        rows = [tuple(entry.get(column) for column in ENTRY_COLUMNS) for entry in entries]
+        if not rows:
+            return
+        with self.lock, self.connection:
+            self.connection.executemany(
+                f"INSERT INTO entries ({', '.join(ENTRY_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in ENTRY_COLUMNS)})",
+                rows
+            )
+
+    def _get_offset(self, name):
+        with self.lock:
+            row = self.connection.execute("SELECT offset FROM sources WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_offset(self, name, offset):
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO sources (name, offset) VALUES (?, ?)", (name, offset))
+
+    def import_history(self, active_size):
+        """Import log files written before the index existed (runs once per index)
+
+        active_size is the size the active log had when live indexing started;
+        anything after it is indexed by LogIndexHandler.
+        """
+        if self._get_offset("history") is not None:
+            return
+        logs_dir = self.path.parent
+        for path in sorted(logs_dir.glob('automation_*.log*'), key=lambda p: p.stat().st_mtime):
+            if path.name.endswith('.tmp'):
+                continue
+            opener = gzip.open if path.suffix == '.gz' else open
+            try:
+                with opener(path, 'rt', encoding='utf-8', errors='replace') as log_file:
+                    self.add(parse_log_lines(log_file, path.name))
+            except FileNotFoundError:
+                continue
+        active = logs_dir / ACTIVE_LOG_NAME
+        if active.exists() and active_size:
+            with open(active, 'rb') as log_file:
+                lines = log_file.read(active_size).decode('utf-8', errors='replace').splitlines()
+            self.add(parse_log_lines(lines, ACTIVE_LOG_NAME))
+        self._set_offset("history", 1)
+
+    def update_attendance_log(self, path=None):
+        """Index lines appended to the attendance log since the last call"""
+        path = Path(path) if path else Path.home() / "attendance_log.txt"
+        if not path.exists():
+            return
+        offset = self._get_offset(path.name) or 0
+        if path.stat().st_size < offset:
+            offset = 0
+        with open(path, 'rb') as log_file:
+            log_file.seek(offset)
+            data = log_file.read()
+        # Only index complete lines
+        end = data.rfind(b'\n') + 1
+        if end == 0:
+            return
+        entries = []
+        for line in data[:end].decode('utf-8', errors='replace').splitlines():
+            match = ATTENDANCE_LINE.match(line.strip())
+            if not match:
+                continue
+            date, clock, message = match.groups()
+            class_match = ATTENDANCE_CLASS.match(message)
+            entries.append({
+                "time": f"{date}T{clock}.000",
+                "date": date,
+                "level": "INFO",
+                "class": class_match.group(1) if class_match else None,
+                "phase": "attendance",
+                "source": path.name,
+                "message": message
+            })
+        self.add(entries)
+        self._set_offset(path.name, offset + end)
+
+    def search(self, date=None, since=None, until=None, session=None, class_name=None,
+               level=None, text=None, limit=200):
+        """Return matching entries, oldest first, as dicts"""
+        clauses, params = [], []
+        if date:
+            clauses.append("date = ?")
+            params.append(date)
+        if since:
+            clauses.append("date >= ?")
+            params.append(since)
+        if until:
+            clauses.append("date <= ?")
+            params.append(until)
+        if session:
+            clauses.append("session = ?")
+            params.append(str(session))
+        if class_name:
+            clauses.append("class = ?")
+            params.append(class_name)
+        if level:
+            clauses.append("level = ?")
+            params.append(level.upper())
+        if text:
+            clauses.append("message LIKE ?")
+            params.append(f"%{text}%")
+
+        query = f"SELECT {', '.join(ENTRY_COLUMNS)} FROM entries"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY time, id LIMIT ?"
+        params.append(limit)
+
+        with self.lock:
+            rows = self.connection.execute(query, params).fetchall()
+        return [dict(zip(ENTRY_COLUMNS, row)) for row in rows]
+
+def parse_log_lines(lines, source):
+    """Parse text or JSON-lines automation log lines into index entries"""
+    entries = []
+    session = class_name = None
+    for line in lines:
+        line = line.rstrip('\n')
+        if line.startswith('{'):
+            try:
+                record = json.loads(line)
+                entries.append({
+                    "time": record["time"],
+                    "date": record["time"][:10],
+                    "level": record["level"],
+                    "session": _as_text(record.get("session")),
+                    "account": record.get("account"),
+                    "class": record.get("class"),
+                    "phase": record.get("phase"),
+                    "source": source,
+                    "message": record["message"]
+                })
+                continue
+            except (ValueError, KeyError):
+                pass
+
+        match = TEXT_LINE.match(line)
+        if not match:
+            # Continuation line, e.g. a traceback
+            if entries and line:
+                entries[-1]["message"] += "\n" + line
+            continue
+
+        date, clock, millis, level, message = match.groups()
+        session_match = SESSION_MESSAGE.match(message)
+        if session_match:
+            session, class_name = session_match.group(2) or session_match.group(1), None
+        class_match = CLASS_MESSAGE.match(message)
+        if class_match:
+            class_name = class_match.group(1)
+        entries.append({
+            "time": f"{date}T{clock}.{millis}",
+            "date": date,
+            "level": level,
+            "session": session,
+            "class": class_name,
+            "source": source,
+            "message": message
+        })
+    return entries
+
+def _as_text(value):
+    return None if value is None else str(value)
+
+class LogIndexHandler(logging.Handler):
+    """Logging handler that adds each record to a LogIndex
+
+    Runs on the background log listener, so indexing never blocks callers.
+    """
+
+    def __init__(self, index):
+        super().__init__()
+        self.index = index
+
+    def emit(self, record):
+        try:
+            created = time.localtime(record.created)
+            timestamp = time.strftime("%Y-%m-%dT%H:%M:%S", created) + f".{int(record.msecs):03d}"
+            self.index.add([{
+                "time": timestamp,
+                "date": timestamp[:10],
+                "level": record.levelname,
+                "session": _as_text(getattr(record, "session", None)),
+                "account": getattr(record, "account", None),
+                "class": getattr(record, "class_name", None),
+                "phase": getattr(record, "phase", None),
+                "source": ACTIVE_LOG_NAME,
+                "message": record.getMessage()
+            }])
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        try:
+            self.index.close()
+        finally:
+            super().close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Search the indexed automation logs")
+    parser.add_argument("--date", help="Exact date, YYYY-MM-DD")
+    parser.add_argument("--since", help="First date to include, YYYY-MM-DD")
+    parser.add_argument("--until", help="Last date to include, YYYY-MM-DD")
+    parser.add_argument("--session", help="Session ID as logged in 'Starting Session'")
+    parser.add_argument("--class", dest="class_name", help="Class name (case-insensitive)")
+    parser.add_argument("--level", help="INFO, WARNING or ERROR")
+    parser.add_argument("--text", help="Substring of the message")
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--index", help="Path to the index file (defaults to logs/log_index.sqlite3)")
+    args = parser.parse_args()
+
+    index = LogIndex(args.index)
+    index.update_attendance_log()
+
+    start = time.perf_counter()
+    entries = index.search(
+        date=args.date, since=args.since, until=args.until, session=args.session,
+        class_name=args.class_name, level=args.level, text=args.text, limit=args.limit
+    )
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    for entry in entries:
+        tags = " ".join(f"{key}={entry[key]}" for key in ("session", "class", "phase") if entry[key])
+        print(f"{entry['time']} {entry['level']:<7} {tags} | {entry['message']}")
+    print(f"{len(entries)} entries in {elapsed_ms:.1f} ms", file=sys.stderr)
+    index.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+import os
+import sys
+import json
+import gzip
+import time
+import queue
+import atexit
+import shutil
+import logging
+import logging.handlers
+import threading
+from pathlib import Path
+from datetime import datetime, timedelta
+from contextlib import contextmanager
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+ACTIVE_LOG_NAME = 'automation.log'
+INDEX_NAME = 'log_index.sqlite3'
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_RETENTION_DAYS = 14
+
+# Structured fields attached to every record, mapped to their JSON key
+CONTEXT_FIELDS = {
+    "session": "session",
+    "account": "account",
+    "class_name": "class",
+    "phase": "phase"
+}
+
+_context = threading.local()
+
+def get_logs_dir():
+    """Return the logs directory next to the executable (or this file), creating it if needed"""
+    base_path = Path(sys.executable).parent if getattr(sys, 'frozen', False) else Path(__file__).parent
+    logs_dir = base_path / 'logs'
+    logs_dir.mkdir(exist_ok=True)
+    return logs_dir
+
+class LogContextFilter(logging.Filter):
+    """Attach the calling thread's log context to each record"""
+
+    def filter(self, record):
+        fields = getattr(_context, "fields", {})
+        for field in CONTEXT_FIELDS:
+            if not hasattr(record, field):
+                setattr(record, field, fields.get(field))
+        return True
+
+class JsonLinesFormatter(logging.Formatter):
+    """Format records as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "message": record.getMessage()
+        }
+        for field, key in CONTEXT_FIELDS.items():
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+class RotatingLogFileHandler(logging.handlers.BaseRotatingHandler):
+    """Log file handler that rolls over at midnight and when the file reaches max_bytes
+
+    Rolled segments are renamed to automation_YYYYMMDD_HHMMSS.log after the
+    time of their last record, gzipped on a background thread and deleted once
+    they are older than retention_days.
+    """
+
+    def __init__(self, filename, max_bytes=DEFAULT_MAX_BYTES, retention_days=DEFAULT_RETENTION_DAYS):
+        super().__init__(filename, mode='a', encoding='utf-8')
+        self.max_bytes = max_bytes
+        self.retention_days = retention_days
+        self.logs_dir = Path(self.baseFilename).parent
+        self.archive_lock = threading.Lock()
+
+        # A file left over from a previous day rolls over on the first record
+        active = Path(self.baseFilename)
+        last_write = active.stat().st_mtime if active.stat().st_size > 0 else time.time()
+        self.rollover_at = self._next_midnight(last_write)
+
+        # Compress segments left uncompressed by an earlier run
+        self._start_archiver(None)
+
+    @staticmethod
+    def _next_midnight(timestamp):
+        """Return the timestamp of the first midnight after the given time"""
+        day = datetime.fromtimestamp(timestamp).date() + timedelta(days=1)
+        return datetime.combine(day, datetime.min.time()).timestamp()
+
+    def shouldRollover(self, record):
+        """Roll over at midnight or when this record would push the file over max_bytes"""
+        if record.created >= self.rollover_at:
+            return True
+        if self.max_bytes > 0:
+            if self.stream is None:
+                self.stream = self._open()
+            message = f"{self.format(record)}\n"
+            if self.stream.tell() + len(message.encode('utf-8')) >= self.max_bytes:
+                return self.stream.tell() > 0
+        return False
+
+    def doRollover(self):
+        """Move the active file aside and start archiving it in the background"""
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+
+        active = Path(self.baseFilename)
+        segment = None
+        if active.exists() and active.stat().st_size > 0:
+            last_write = datetime.fromtimestamp(active.stat().st_mtime)
+            segment = self._segment_path(last_write)
+            os.replace(active, segment)
+
+        self.rollover_at = self._next_midnight(time.time())
+        self.stream = self._open()
+        self._start_archiver(segment)
+
+    def _segment_path(self, last_write):
+        """Return an unused path for a rolled segment"""
+        stem = f'automation_{last_write.strftime("%Y%m%d_%H%M%S")}'
+        segment = self.logs_dir / f'{stem}.log'
+        counter = 1
+        while segment.exists() or segment.with_suffix('.log.gz').exists():
+            segment = self.logs_dir / f'{stem}_{counter}.log'
+            counter += 1
+        return segment
+
+    def _start_archiver(self, segment):
+        threading.Thread(target=self._archive, args=(segment,), daemon=True).start()
+
+    def _archive(self, segment):
+        """Gzip rolled segments and delete archives past the retention period"""
+        with self.archive_lock:
+            try:
+                pending = [segment] if segment else [
+                    path for path in self.logs_dir.glob('automation_*.log')
+                    if path.name != ACTIVE_LOG_NAME
+                ]
+                for path in pending:
+                    self._compress(path)
+                self._prune()
+            except Exception as e:
+                # The logging pipeline cannot log its own failures
+                print(f"Failed to archive log files: {e}", file=sys.stderr)
+
+    @staticmethod
+    def _compress(path):
+        """Replace a segment with a .gz copy that keeps its modification time"""
+        if not path.exists():
+            return
+        archive = path.with_suffix('.log.gz')
+        partial = path.with_suffix('.log.gz.tmp')
+        with open(path, 'rb') as source, gzip.open(partial, 'wb') as target:
+            shutil.copyfileobj(source, target)
+        mtime = path.stat().st_mtime
+        os.utime(partial, (mtime, mtime))
+        os.replace(partial, archive)
+        path.unlink()
+
+    def _prune(self):
+        """Delete archives older than the retention period"""
+        if self.retention_days <= 0:
+            return
+        cutoff = time.time() - self.retention_days * 86400
+        for path in self.logs_dir.glob('automation_*.log*'):
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+
+class Logger:
+    """Class for handling logging operations
+
+    Records are put on a queue by the calling thread and written to the log
+    file and console by a background listener, so callers never block on I/O.
+    Messages use %-style arguments and are only formatted when the level is
+    enabled, e.g. ``logger.info("Class %d: %s", number, name)``.
+    """
+
+    def __init__(self, log_format="text", max_bytes=DEFAULT_MAX_BYTES, retention_days=DEFAULT_RETENTION_DAYS,
+                 index=True):
+        self.log_format = log_format
+        self.max_bytes = max_bytes
+        self.retention_days = retention_days
+        self.index = index
+        self.index_error = None
+        self.listener = None
+        self.logger = self._setup_logging()
+
+    def _create_handlers(self):
+        """Create the file and console handlers run by the background listener"""
+        log_file = get_logs_dir() / ACTIVE_LOG_NAME
+
+        file_handler = RotatingLogFileHandler(str(log_file), self.max_bytes, self.retention_days)
+        if self.log_format == "json":
+            file_handler.setFormatter(JsonLinesFormatter())
+        else:
+            file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+        handlers = [file_handler, console_handler]
+        if self.index:
+            try:
+                handlers.append(self._create_index_handler(file_handler))
+            except Exception as e:
+                self.index_error = e
+        return handlers
+
+    def _create_index_handler(self, file_handler):
+        """Index records as they are written, importing older logs once in the background"""
+        from log_index import LogIndex, LogIndexHandler
+
+        index = LogIndex(Path(file_handler.baseFilename).parent / INDEX_NAME)
+        active_size = Path(file_handler.baseFilename).stat().st_size
+
+        def import_history():
+            # Hold the archive lock so segments are not gzipped mid-import
+            with file_handler.archive_lock:
+                try:
+                    index.import_history(active_size)
+                    index.update_attendance_log()
+                except Exception as e:
+                    logging.getLogger("lms_automation").warning("Failed to import log history: %s", e)
+
+        threading.Thread(target=import_history, daemon=True).start()
+        return LogIndexHandler(index)
+
+    def _setup_logging(self):
+        """Configure queued logging to both file and console"""
+        setup_error = None
+        try:
+            handlers = self._create_handlers()
+        except Exception as e:
+            # Fallback to basic console logging
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+            handlers = [console_handler]
+            setup_error = e
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.setFormatter(logging.Formatter('%(message)s'))
+        queue_handler.addFilter(LogContextFilter())
+
+        self.listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.shutdown)
+
+        logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
+        logger = logging.getLogger("lms_automation")
+        if setup_error:
+            logger.error("Failed to initialize file logging: %s", setup_error)
+        if self.index_error:
+            logger.warning("Failed to initialize log index: %s", self.index_error)
+        return logger
+
+    @contextmanager
+    def context(self, **fields):
+        """Attach structured fields (session, account, class_name, phase) to records logged in this block"""
+        previous = getattr(_context, "fields", {})
+        _context.fields = {**previous, **fields}
+        try:
+            yield
+        finally:
+            _context.fields = previous
+
+    def update_context(self, **fields):
+        """Update the structured fields of the current thread until the enclosing context() block exits"""
+        _context.fields = {**getattr(_context, "fields", {}), **fields}
+
+    def shutdown(self):
+        """Flush queued records and stop the background writer"""
+        if self.listener:
+            self.listener.stop()
+            self.listener = None
+
+    def debug(self, message, *args, **kwargs):
+        self.logger.debug(message, *args, **kwargs)
+
+    def info(self, message, *args, **kwargs):
+        self.logger.info(message, *args, **kwargs)
+
+    def error(self, message, *args, **kwargs):
+        self.logger.error(message, *args, **kwargs)
+
+    def warning(self, message, *args, **kwargs):
+        self.logger.warning(message, *args, **kwargs)
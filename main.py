@@ -1,83 +1,77 @@
 import time
 import sys
-import logging
 import threading
-from pathlib import Path
-from datetime import datetime
 
+from clock import SYSTEM_CLOCK
 from config import Config
+from logger import Logger, get_logs_dir
+from metrics import REGISTRY, LAST_SESSION, PhaseTimer, MetricsServer
+from tracing import TRACER
+from profiling import SessionProfiler
+from resource_monitor import append_session_history
+from reaper import REAPER
+from circuit_breaker import CircuitBreaker, probe
 from notifications import EmailNotifier, WhatsAppNotifier
 from web_automation import AttendanceAutomation
 from gui import SystemTrayIcon
 
-class Logger:
-    """Class for handling logging operations"""
-
-    def __init__(self):
-        self.logger = self._setup_logging()
-
-    def _setup_logging(self):
-        """Configure logging to both file and console"""
-        try:
-            # Get the executable's directory
-            base_path = Path(sys.executable).parent if getattr(sys, 'frozen', False) else Path(__file__).parent
-            
-            # Create logs directory
-            logs_dir = base_path / 'logs'
-            logs_dir.mkdir(exist_ok=True)
-
-            # Create log file with date
-            log_file = logs_dir / f'automation_{datetime.now().strftime("%Y%m%d")}.log'
-
-            # Configure logging
-            logging.basicConfig(
-                level=logging.INFO,
-                format='%(asctime)s - %(levelname)s - %(message)s',
-                handlers=[
-                    logging.FileHandler(str(log_file), encoding='utf-8', mode='a'),
-                    logging.StreamHandler()
-                ]
-            )
-            return logging.getLogger(__name__)
-
-        except Exception as e:
-            # Fallback to basic console logging
-            logging.basicConfig(
-                level=logging.INFO,
-                format='%(asctime)s - %(levelname)s - %(message)s'
-            )
-            logger = logging.getLogger(__name__)
-            logger.error(f'Failed to initialize file logging: {e}')
-            return logger
-
-    def info(self, message):
-        self.logger.info(message)
-
-    def error(self, message):
-        self.logger.error(message)
-
-    def warning(self, message):
-        self.logger.warning(message)
-
 class LMSAutomationController:
     """Main controller class for the LMS automation"""
 
-    def __init__(self):
-        self.logger = Logger()
-        self.config = Config()
+    def __init__(self, config_file=None, clock=SYSTEM_CLOCK):
+        self.clock = clock
+        self.config = Config(config_file)
+        settings = self.config.settings.general
+        self.logger = Logger(
+            settings.log_format,
+            max_bytes=int(settings.log_max_mb * 1024 * 1024),
+            retention_days=settings.log_retention_days,
+            index=settings.log_index
+        )
         self.email_notifier = EmailNotifier(self.config, self.logger)
         self.whatsapp_notifier = WhatsAppNotifier(self.config, self.logger)
         self.automation = AttendanceAutomation(
             self.config, 
             self.logger,
             self.email_notifier,
-            self.whatsapp_notifier
+            self.whatsapp_notifier,
+            clock
         )
         self.system_tray = SystemTrayIcon(self.logger, self)
+        self.reap_leftovers()
         
+        self.config.subscribe(self.on_config_changed)
+        self.config.start_watching(self.logger)
+
+        self.profiler = SessionProfiler(self.config, self.logger, get_logs_dir() / "profiles")
+        self.profiler.install_signal_handler()
+
+        self.metrics_server = None
+        if settings.metrics_port:
+            try:
+                self.metrics_server = MetricsServer(REGISTRY, settings.metrics_port)
+                self.metrics_server.start()
+                self.logger.info("Serving metrics at http://127.0.0.1:%d/metrics", settings.metrics_port)
+            except OSError as e:
+                self.metrics_server = None
+                self.logger.error("Failed to start metrics endpoint: %s", e)
+
+        self.breaker = CircuitBreaker(clock)
         self.running = False
         self.automation_thread = None
         self.session_count = 0
+        # Session IDs stay unique across restarts: <process start>-<session number>
+        self.run_id = clock.now().strftime("%Y%m%d-%H%M%S")
+
+    def reap_leftovers(self):
+        """Kill Chrome processes and delete profiles left behind by an earlier run"""
+        try:
+            killed, removed = REAPER.sweep()
+            if killed or removed:
+                self.logger.info("Cleaned up %d leftover Chrome processes and %d temporary profiles",
+                                 killed, removed)
+        except Exception as e:
+            self.logger.warning("Failed to clean up leftover Chrome processes: %s", e)
 
     def automation_loop(self):
         """Main automation loop"""
@@ -88,32 +82,122 @@ class LMSAutomationController:
             self.run_session()
             
             if self.running:
-                wait_time = int(self.config.get_settings().get("check_interval", "3600"))
-                self.logger.info(f"Waiting {wait_time//60} minutes before next session...")
+                wait_time = self.next_wait()
+                self.logger.info("Waiting %d minutes before next session...", wait_time // 60)
                 
-                start_time = time.time()
-                while self.running and (time.time() - start_time) < wait_time:
-                    time.sleep(1)
+                # Re-read the interval each second so a reloaded value applies to this wait
+                start_time = self.clock.monotonic()
+                while self.running and (self.clock.monotonic() - start_time) < self.next_wait():
+                    self.clock.sleep(1)
         
         self.logger.info("Automation loop stopped")
 
-    def run_session(self):
+    def next_wait(self):
+        """Seconds between sessions: the check interval, or the backoff while the LMS is down"""
+        return self.breaker.wait_seconds(self.config.settings.general.check_interval)
+
+    def lms_reachable(self, manual=False):
+        """Probe the LMS before starting Chrome, keeping the circuit breaker up to date"""
+        settings = self.config.settings
+        if not settings.general.preflight_probe:
+            return True
+        if not self.breaker.allow(force=manual):
+            return False
+        reachable, detail = probe(settings.url, settings.general.probe_timeout, settings.general.proxy_server)
+        if reachable:
+            if self.breaker.record_success():
+                self.logger.info("The LMS is reachable again (%s); resuming the normal schedule", detail)
+            return True
+        self.breaker.record_failure(settings.general.outage_retry_seconds, settings.general.check_interval)
+        self.logger.warning("The LMS is unreachable (%s); skipping this session and checking again in %d seconds",
+                            detail, self.next_wait())
+        self.system_tray.update_status("error", f"LMS unreachable: {detail}")
+        return False
+
+    def on_config_changed(self, settings):
+        """Log the settings that take effect after a configuration reload"""
+        self.logger.info(
+            "New settings: check interval %d minutes, email %s, WhatsApp %s",
+            settings.general.check_interval // 60,
+            "enabled" if settings.email.enabled else "disabled",
+            "enabled" if settings.whatsapp.enabled else "disabled"
+        )
+
+    def run_session(self, manual=False):
         """Run a single automation session"""
         if not self.running:
             return
+        if not self.lms_reachable(manual):
+            return
             
         self.system_tray.update_status("running")
         self.session_count += 1
-        self.logger.info(f"Starting Session {self.session_count}")
-        
+
+        session_id = f"{self.run_id}-{self.session_count}"
+
+        with self.logger.context(session=session_id, account=self.automation.username):
+            self.logger.info("Starting Session %d (%s)", self.session_count, session_id)
+            TRACER.enabled = self.config.settings.general.trace_sessions
+            TRACER.start_session(session_id, get_logs_dir() / "traces")
+            started_at = self.clock.now()
+            start_time = self.clock.monotonic()
+            outcome = "success"
+
+            try:
+                with self.profiler.profile_session(session_id), PhaseTimer("session"):
+                    self.automation.run_session(session_id)
+            except Exception as e:
+                outcome = "failure"
+                self.logger.error("Session error: %s", e)
+                self.system_tray.update_status("error")
+            finally:
+                self.record_session_history(session_id, started_at, self.clock.monotonic() - start_time, outcome)
+                LAST_SESSION.set(self.clock.time())
+                self.export_metrics()
+                self.export_trace()
+                if self.running:
+                    self.system_tray.update_status("idle")
+
+    def record_session_history(self, session_id, started_at, duration, outcome):
+        """Append the session's duration and browser resource usage to logs/session_history.jsonl"""
+        resources = self.automation.last_resources
         try:
-            self.automation.run_session()
+            append_session_history(
+                get_logs_dir() / "session_history.jsonl",
+                session_id, started_at, duration, outcome, resources
+            )
         except Exception as e:
-            self.logger.error(f"Session error: {e}")
-            self.system_tray.update_status("error")
-        finally:
-            if self.running:
-                self.system_tray.update_status("idle")
+            self.logger.warning("Failed to record session history: %s", e)
+        if resources and resources["peak_rss_mb"] is not None:
+            self.logger.info(
+                "Browser used %.1f MB peak RSS and %.1f CPU seconds; %d requests, %.2f MB received",
+                resources["peak_rss_mb"], resources["cpu_seconds"],
+                resources["requests"], resources["received_mb"]
+            )
+            if resources["memory_budget_mb"]:
+                self.logger.info("Peak RSS was %.0f%% of the %d MB memory budget",
+                                 resources["peak_rss_mb"] / resources["memory_budget_mb"] * 100,
+                                 resources["memory_budget_mb"])
+        if resources and resources.get("pages"):
+            self.logger.info("Waited %.2f s for %d page loads", resources["page_wait_seconds"], resources["pages"])
+
+    def export_trace(self):
+        """Write the session's trace timeline if tracing was enabled"""
+        try:
+            trace_file = TRACER.end_session()
+            if trace_file:
+                self.logger.info("Session trace written to %s", trace_file)
+        except Exception as e:
+            self.logger.warning("Failed to write session trace: %s", e)
+
+    def export_metrics(self):
+        """Write the metrics to logs/metrics.prom if enabled"""
+        if not self.config.settings.general.metrics_file:
+            return
+        try:
+            REGISTRY.write_file(get_logs_dir() / "metrics.prom")
+        except Exception as e:
+            self.logger.warning("Failed to write metrics file: %s", e)
 
     def start_automation(self):
         """Start the automation process"""
@@ -136,7 +220,7 @@ class LMSAutomationController:
     def run_now(self):
         """Run a single session immediately"""
         self.logger.info("Running a single session immediately")
-        threading.Thread(target=self.run_session, daemon=True).start()
+        threading.Thread(target=self.run_session, args=(True,), daemon=True).start()
 
     def test_email_notification(self):
         """Send a test email notification"""
@@ -162,7 +246,13 @@ class LMSAutomationController:
         """Exit the application"""
         self.logger.info("Exiting application")
         self.stop_automation()
+        self.config.stop_watching()
+        if self.metrics_server:
+            self.metrics_server.stop()
         self.system_tray.stop()
+        # A session may still be running on the automation thread
+        REAPER.reap_own()
+        self.logger.shutdown()
         sys.exit(0)
 
 def main():
@@ -0,0 +1,266 @@
+"""Low-overhead metrics registry with Prometheus text exposition.
+
+Counters, gauges and histograms are kept in memory and rendered on demand in
+the Prometheus text format, either to a file (for node_exporter's textfile
+collector) or from a small HTTP endpoint bound to localhost.
+"""
+import os
+import time
+import bisect
+import threading
+from pathlib import Path
+
+from tracing import TRACER
+
+# Seconds; chosen to cover fast WebDriver calls up to whole sessions
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600, 1800)
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + "}"
+
+class Metric:
+    """Base class for a metric family with an optional set of label names"""
+
+    type_name = None
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.type_name}"]
+        with self.lock:
+            items = sorted(self.values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"]
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+
+    type_name = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+class Gauge(Metric):
+    """Value that can go up and down"""
+
+    type_name = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets"""
+
+    type_name = "histogram"
+
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                # [per-bucket counts (last one is +Inf), sum, count]
+                state = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _render_sample(self, key, state):
+        counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.label_names, key, [("le", _format_value(bound))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.label_names, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+class MetricsRegistry:
+    """Collection of metric families rendered together"""
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _register(self, metric_class, name, help_text, label_names, **kwargs):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = metric_class(name, help_text, label_names, **kwargs)
+            elif not isinstance(metric, metric_class):
+                raise ValueError(f"Metric {name} is already registered as a {metric.type_name}")
+            return metric
+
+    def counter(self, name, help_text, label_names=()):
+        return self._register(Counter, name, help_text, label_names)
+
+    def gauge(self, name, help_text, label_names=()):
+        return self._register(Gauge, name, help_text, label_names)
+
+    def histogram(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, help_text, label_names, buckets=buckets)
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format"""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path):
+        """Atomically write the exposition to path"""
+        path = Path(path)
+        partial = path.with_name(path.name + ".tmp")
+        partial.write_text(self.render(), encoding="utf-8")
+        os.replace(partial, path)
+
+REGISTRY = MetricsRegistry()
+
+PHASE_SECONDS = REGISTRY.histogram(
+    "lms_phase_duration_seconds",
+    "Time spent in each automation phase",
+    ("phase",)
+)
+PHASE_TOTAL = REGISTRY.counter(
+    "lms_phase_total",
+    "Completed automation phases by outcome",
+    ("phase", "outcome")
+)
+CLASS_RESULTS = REGISTRY.counter(
+    "lms_class_results_total",
+    "Attendance results per class visit",
+    ("result",)
+)
+DRIVER_RESTARTS = REGISTRY.counter(
+    "lms_driver_restarts_total",
+    "WebDriver restarts that resumed a session from its checkpoint"
+)
+CLASS_RETRIES = REGISTRY.counter(
+    "lms_class_retries_total",
+    "Passes over the classes that failed earlier in the session"
+)
+NEW_CLASSES = REGISTRY.counter(
+    "lms_new_classes_total",
+    "Classes that appeared in the V-Class list"
+)
+LAST_SESSION = REGISTRY.gauge(
+    "lms_last_session_timestamp_seconds",
+    "Unix time at which the last session finished"
+)
+
+def record_phase(phase, seconds, success=True):
+    """Record the duration and outcome of one phase"""
+    PHASE_SECONDS.observe(seconds, phase=phase)
+    PHASE_TOTAL.inc(phase=phase, outcome="success" if success else "failure")
+
+class PhaseTimer:
+    """Context manager that records a phase's duration and outcome
+
+    The phase counts as failed if the block raises or fail() was called. It is
+    also recorded as a span when the session is being traced.
+    """
+
+    def __init__(self, phase):
+        self.phase = phase
+        self.failed = False
+        self.start = None
+        self.span = None
+
+    def __enter__(self):
+        self.span = TRACER.start_span(self.phase, category="phase")
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        record_phase(self.phase, time.perf_counter() - self.start, not (exc_type or self.failed))
+        self.span.finish(exc)
+        return False
+
+    def fail(self):
+        self.failed = True
+
+class MetricsServer:
+    """Serve the registry at http://127.0.0.1:<port>/metrics from a background thread"""
+
+    def __init__(self, registry, port):
+        self.registry = registry
+        self.port = port
+        self.server = None
+
+    def start(self):
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
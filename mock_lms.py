@@ -0,0 +1,275 @@
+"""Local stand-in for the LMS, for benchmarking and checking the automation.
+
+Serves the pages the automation drives, with the same element IDs, classes
+and XPath structure: the sign-in button, kt_sign_in_form with iduser/idpass,
+the V-Class link, the class cards (kt-widget__username) and the attendance
+button, which shows the "Anda sudah absen!" alert for classes that were
+already attended. Attendance is remembered for the lifetime of the server.
+
+    python mock_lms.py --classes 8 --latency-ms 150
+    python mock_lms.py --port 8765 --attended 2 --no-button 1
+
+Then point [Credentials] url at http://127.0.0.1:<port>/.
+"""
+import re
+import time
+import random
+import argparse
+import threading
+from html import escape
+from urllib.parse import parse_qs
+
+DEFAULT_CLASS_NAMES = [
+    "Pemrograman Web", "Basis Data", "Jaringan Komputer", "Sistem Operasi",
+    "Struktur Data", "Kecerdasan Buatan", "Rekayasa Perangkat Lunak", "Statistika",
+    "Interaksi Manusia dan Komputer", "Keamanan Informasi"
+]
+
+SESSION_COOKIE = "mock_lms_session"
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title></head>
+<body>{body}</body></html>
+"""
+
+LANDING = """
+<div class="login-landing">
+  <h1>Learning Management System</h1>
+  <a class="btn btn-success" href="/login">Sign In</a>
+</div>
+"""
+
+# The automation submits via //*[@id="kt_sign_in_form"]/div[4]/button
+LOGIN_FORM = """
+<form id="kt_sign_in_form" method="post" action="/login">
+  <div><h1>Sign In</h1>{error}</div>
+  <div><input id="iduser" name="iduser" type="text"></div>
+  <div><input id="idpass" name="idpass" type="password"></div>
+  <div><button type="submit" class="btn btn-primary">Login</button></div>
+</form>
+"""
+
+DASHBOARD = """
+<div id="kt_header"><a href="/vclass">V-Class</a></div>
+<div id="kt_content"><p>Welcome, {username}</p></div>
+"""
+
+# Class name: //*[@id="kt_content"]/div[2]/div[i]/div/div/div[1]/div[3]/div[2]/a
+# Class link: //*[@id="kt_content"]/div[2]/div[i]/div/div/div[2]/div[2]
+CLASS_CARD = """
+  <div class="col-md-4"><div class="kt-portlet"><div class="kt-widget">
+    <div class="kt-widget__head">
+      <div class="kt-widget__media"></div>
+      <div class="kt-widget__info"><span class="kt-widget__username">Class - {name}</span></div>
+      <div class="kt-widget__content"><div></div><div><a href="/class/{index}">{name}</a></div></div>
+    </div>
+    <div class="kt-widget__footer">
+      <div></div>
+      <div class="btn btn-label-brand" onclick="location.href='/class/{index}'">Masuk Kelas</div>
+    </div>
+  </div></div></div>
+"""
+
+VCLASS = """
+<div id="kt_content">
+  <div><h3>V-Class</h3></div>
+  <div class="row">{cards}</div>
+</div>
+"""
+
+# Attendance button: //*[@id="kt_content"]/div[2]/div[1]/div/center/button
+CLASS_PAGE = """
+<div id="kt_content">
+  <div><h3>{name}</h3></div>
+  <div><div class="kt-portlet"><div>{button}</div></div></div>
+</div>
+"""
+
+ATTEND_BUTTON = """<center><button type="button" class="btn btn-success" onclick="{action}">Absen</button></center>"""
+MARK_ACTION = "fetch('/class/{index}/attend', {{method: 'POST'}})"
+ALREADY_ACTION = "alert('Anda sudah absen!')"
+NO_BUTTON = "<center><p>Belum ada absensi untuk pertemuan ini.</p></center>"
+
+class MockLMS:
+    """In-memory LMS with configurable classes and response latency"""
+
+    def __init__(self, classes=5, attended=0, no_button=0, latency_ms=0, jitter_ms=0,
+                 username=None, password=None):
+        names = DEFAULT_CLASS_NAMES * (classes // len(DEFAULT_CLASS_NAMES) + 1)
+        self.classes = [
+            f"{name} {index // len(DEFAULT_CLASS_NAMES) + 1}" if index >= len(DEFAULT_CLASS_NAMES) else name
+            for index, name in enumerate(names[:classes])
+        ]
+        # The last `no_button` classes have no open attendance; the first
+        # `attended` classes have already been attended
+        self.no_button = set(range(max(classes - no_button, 0) + 1, classes + 1))
+        self.attended = set(range(1, min(attended, classes) + 1)) - self.no_button
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.username = username
+        self.password = password
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.server = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self, port=0):
+        """Serve on 127.0.0.1 from a background thread; port 0 picks a free port"""
+        from http.server import ThreadingHTTPServer
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._make_handler())
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.url
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def reset(self, attended=()):
+        """Forget recorded attendance"""
+        with self.lock:
+            self.attended = set(attended)
+
+    def _delay(self):
+        delay_ms = self.latency_ms + (random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if delay_ms:
+            time.sleep(delay_ms / 1000)
+
+    def _check_login(self, form):
+        username = form.get("iduser", [""])[0]
+        password = form.get("idpass", [""])[0]
+        if not username or not password:
+            return None
+        if self.username is not None and (username, password) != (self.username, self.password):
+            return None
+        return username
+
+    def _class_page(self, index):
+        with self.lock:
+            attended = index in self.attended
+        if index in self.no_button:
+            button = NO_BUTTON
+        elif attended:
+            button = ATTEND_BUTTON.format(action=ALREADY_ACTION)
+        else:
+            button = ATTEND_BUTTON.format(action=MARK_ACTION.format(index=index))
+        return CLASS_PAGE.format(name=escape(self.classes[index - 1]), button=button)
+
+    def _make_handler(self):
+        from http.server import BaseHTTPRequestHandler
+
+        lms = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                lms._delay()
+                with lms.lock:
+                    lms.requests += 1
+                path = self.path.split("?")[0]
+                if path == "/":
+                    self._page("LMS", LANDING)
+                elif path == "/login":
+                    self._page("Sign In", LOGIN_FORM.format(error=""))
+                elif not self._logged_in():
+                    self._redirect("/login")
+                elif path == "/dashboard":
+                    self._page("Dashboard", DASHBOARD.format(username=escape(self._logged_in())))
+                elif path == "/vclass":
+                    cards = "".join(
+                        CLASS_CARD.format(index=index, name=escape(name))
+                        for index, name in enumerate(lms.classes, start=1)
+                    )
+                    self._page("V-Class", VCLASS.format(cards=cards))
+                else:
+                    match = re.fullmatch(r"/class/(\d+)", path)
+                    if match and 1 <= int(match.group(1)) <= len(lms.classes):
+                        self._page("Class", lms._class_page(int(match.group(1))))
+                    else:
+                        self.send_error(404)
+
+            def do_POST(self):
+                lms._delay()
+                with lms.lock:
+                    lms.requests += 1
+                length = int(self.headers.get("Content-Length") or 0)
+                form = parse_qs(self.rfile.read(length).decode("utf-8"))
+                path = self.path.split("?")[0]
+                if path == "/login":
+                    username = lms._check_login(form)
+                    if username is None:
+                        error = '<div class="alert alert-danger">Username atau password salah</div>'
+                        self._page("Sign In", LOGIN_FORM.format(error=error))
+                        return
+                    self.send_response(303)
+                    self.send_header("Location", "/dashboard")
+                    self.send_header("Set-Cookie", f"{SESSION_COOKIE}={username}; Path=/")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                match = re.fullmatch(r"/class/(\d+)/attend", path)
+                if not match or not self._logged_in():
+                    self.send_error(404)
+                    return
+                with lms.lock:
+                    lms.attended.add(int(match.group(1)))
+                self._send(200, "application/json", b'{"status": "ok"}')
+
+            def _logged_in(self):
+                for cookie in (self.headers.get("Cookie") or "").split(";"):
+                    name, _, value = cookie.strip().partition("=")
+                    if name == SESSION_COOKIE and value:
+                        return value
+                return None
+
+            def _page(self, title, body):
+                self._send(200, "text/html; charset=utf-8", PAGE.format(title=title, body=body).encode("utf-8"))
+
+            def _redirect(self, location):
+                self.send_response(302)
+                self.send_header("Location", location)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def _send(self, status, content_type, body):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local mock of the LMS")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--classes", type=int, default=5, help="Number of classes (default 5)")
+    parser.add_argument("--attended", type=int, default=0, help="Classes that are already attended")
+    parser.add_argument("--no-button", type=int, default=0, help="Classes without an attendance button")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Delay added to every response")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Random extra delay up to this value")
+    parser.add_argument("--username", help="Only accept this username (any by default)")
+    parser.add_argument("--password", help="Only accept this password")
+    args = parser.parse_args()
+
+    lms = MockLMS(args.classes, args.attended, args.no_button, args.latency_ms, args.jitter_ms,
+                  args.username, args.password)
+    print(f"Mock LMS with {args.classes} classes at {lms.start(args.port)}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        lms.stop()
+
+if __name__ == "__main__":
+    main()
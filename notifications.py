@@ -1,17 +1,15 @@
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 from pathlib import Path
-import time
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
-from webdriver_manager.chrome import ChromeDriverManager
+
+from metrics import PhaseTimer
+from tracing import TRACER
+from reaper import REAPER
+from resource_monitor import ResourceMonitor
+from browser_profile import WHATSAPP_JS_HEAP_MB, apply_browser_profile, memory_budget_bytes
+from latency_model import LATENCY_MODEL
+
+# smtplib, email and the selenium stack are imported on first use so that
+# a disabled notifier costs nothing at startup.
 
 class EmailNotifier:
     """Class for sending email notifications"""
@@ -19,18 +17,34 @@ class EmailNotifier:
     def __init__(self, config, logger):
         self.config = config
         self.logger = logger
-        self.email_settings = config.get_email_settings()
-        self.enabled = self.email_settings.get("enabled", "false").lower() == "true"
+
+    @property
+    def enabled(self):
+        # Read from the live snapshot so INI edits apply without a restart
+        return self.config.settings.email.enabled
 
     def send_notification(self, subject, message, category="info"):
-        if not self.enabled:
+        email_settings = self.config.settings.email
+        if not email_settings.enabled:
             self.logger.warning("Email notifications are disabled in config")
             return False
 
+        with PhaseTimer("notify_email") as phase:
+            sent = self._deliver(email_settings, subject, message, category)
+            if not sent:
+                phase.fail()
+        return sent
+
+    def _deliver(self, email_settings, subject, message, category):
+        """Build and send the email, returning True on success"""
         try:
+            import smtplib
+            from email.mime.text import MIMEText
+            from email.mime.multipart import MIMEMultipart
+
             msg = MIMEMultipart()
-            msg["From"] = self.email_settings["sender_email"]
-            msg["To"] = self.email_settings["recipient_email"]
+            msg["From"] = email_settings.sender_email
+            msg["To"] = email_settings.recipient_email
             msg["Subject"] = f"LMS Automation: {subject}"
 
             email_body = f"Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
@@ -39,18 +53,16 @@ class EmailNotifier:
 
             msg.attach(MIMEText(email_body, "plain"))
 
-            with smtplib.SMTP(self.email_settings["smtp_server"], 
-                            int(self.email_settings["smtp_port"])) as server:
+            with smtplib.SMTP(email_settings.smtp_server, email_settings.smtp_port) as server:
                 server.starttls()
-                server.login(self.email_settings["sender_email"], 
-                           self.email_settings["sender_password"])
+                server.login(email_settings.sender_email, email_settings.sender_password)
                 server.send_message(msg)
 
-            self.logger.info(f"Email notification sent: {subject}")
+            self.logger.info("Email notification sent: %s", subject)
             return True
 
         except Exception as e:
-            self.logger.error(f"Failed to send email notification: {str(e)}")
+            self.logger.error("Failed to send email notification: %s", e)
             return False
 
 class WhatsAppNotifier:
@@ -59,12 +71,18 @@ class WhatsAppNotifier:
     def __init__(self, config, logger):
         self.config = config
         self.logger = logger
-        self.whatsapp_settings = config.get_whatsapp_settings()
-        self.enabled = self.whatsapp_settings.get("enabled", "false").lower() == "true"
         self.user_data_dir = Path.home() / "whatsapp_automation" / "persistent_session"
+        self.resource_monitor = ResourceMonitor(logger, name="whatsapp", publish_metrics=False)
+
+    @property
+    def enabled(self):
+        # Read from the live snapshot so INI edits apply without a restart
+        return self.config.settings.whatsapp.enabled
 
     def _setup_chrome_options(self):
         """Set up Chrome options with proper configuration"""
+        from selenium.webdriver.chrome.options import Options
+
         options = Options()
         options.add_argument(f"--user-data-dir={str(self.user_data_dir)}")
         options.add_argument("--no-sandbox")
@@ -77,21 +95,45 @@ class WhatsAppNotifier:
         options.add_argument('--window-size=1200,800')
         options.add_argument('--log-level=3')
         options.add_argument('--headless')  # Uncomment for headless mode
+        proxy_server = self.config.settings.general.proxy_server
+        if proxy_server:
+            options.add_argument(f"--proxy-server={proxy_server}")
+        # The persistent WhatsApp login stays with the regular Chrome binary
+        apply_browser_profile(options, self.config.settings.general, WHATSAPP_JS_HEAP_MB, self.logger,
+                              headless_shell=False)
         options.add_experimental_option('excludeSwitches', ['enable-logging', 'enable-automation'])
         options.add_experimental_option('useAutomationExtension', False)
         return options
 
     def send_notification(self, message: str) -> bool:
         """Send WhatsApp notification"""
-        if not self.enabled:
+        whatsapp_settings = self.config.settings.whatsapp
+        if not whatsapp_settings.enabled:
             self.logger.warning("WhatsApp notifications are disabled in config")
             return False
 
+        with PhaseTimer("notify_whatsapp") as phase:
+            sent = self._deliver(whatsapp_settings, message)
+            if not sent:
+                phase.fail()
+        return sent
+
+    def _deliver(self, whatsapp_settings, message):
+        """Send the message through WhatsApp Web, returning True on success"""
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException
+        from webdriver_manager.chrome import ChromeDriverManager
+
         driver = None
+        reaper_entry = None
         try:
             # Create persistent directory if it doesn't exist
             self.user_data_dir.mkdir(parents=True, exist_ok=True)
-            self.logger.info(f"Using Chrome profile directory: {self.user_data_dir}")
+            self.logger.info("Using Chrome profile directory: %s", self.user_data_dir)
 
             # Setup Chrome options
             options = self._setup_chrome_options()
@@ -100,10 +142,13 @@ class WhatsAppNotifier:
             # Initialize Chrome driver
             try:
                 service = Service(ChromeDriverManager().install())
-                driver = webdriver.Chrome(service=service, options=options)
+                driver = TRACER.instrument_driver(webdriver.Chrome(service=service, options=options))
+                # The profile is persistent; only the processes are reaped
+                reaper_entry = REAPER.register(driver.service.process.pid)
+                self.resource_monitor.start(driver, memory_budget_bytes(self.config.settings.general))
                 self.logger.info("Chrome driver initialized successfully")
             except Exception as e:
-                self.logger.error(f"Failed to initialize Chrome driver: {str(e)}")
+                self.logger.error("Failed to initialize Chrome driver: %s", e)
                 return False
 
             # Load WhatsApp Web
@@ -120,37 +165,43 @@ class WhatsAppNotifier:
                 self.logger.info("This is only required once, future sessions will reuse this login")
             
             # Wait for WhatsApp to load
+            adaptive = self.config.settings.general.adaptive_timeouts
             try:
-                wait = WebDriverWait(driver, wait_time)
                 # Wait for the message input box to appear
-                wait.until(EC.presence_of_element_located((By.XPATH, '//div[@contenteditable="true"][@data-tab="3"]')))
+                message_box = EC.presence_of_element_located((By.XPATH, '//div[@contenteditable="true"][@data-tab="3"]'))
+                if first_time:
+                    # Includes scanning the QR code, which says nothing about WhatsApp's latency
+                    WebDriverWait(driver, wait_time).until(message_box)
+                else:
+                    LATENCY_MODEL.wait(driver, "whatsapp: message box", message_box, wait_time, adaptive=adaptive)
                 self.logger.info("WhatsApp Web interface loaded successfully")
             except TimeoutException:
                 self.logger.error("Timeout waiting for WhatsApp Web to load")
                 return False
 
             # Use direct URL to open chat
-            recipient_number = self.whatsapp_settings["recipient_number"]
+            recipient_number = whatsapp_settings.recipient_number
             encoded_message = message.replace('\n', '%0A').replace(' ', '%20')
             whatsapp_url = f"https://web.whatsapp.com/send?phone={recipient_number}&text={encoded_message}"
             driver.get(whatsapp_url)
 
             # Wait for chat to load and send button to appear
             try:
-                wait = WebDriverWait(driver, 30)
-                send_button = wait.until(
-                    EC.presence_of_element_located((By.XPATH, '//span[@data-icon="send"]'))
+                send_button = LATENCY_MODEL.wait(
+                    driver, "whatsapp: send button",
+                    EC.presence_of_element_located((By.XPATH, '//span[@data-icon="send"]')),
+                    30, adaptive=adaptive
                 )
                 
                 # Small delay to ensure the button is truly clickable
-                time.sleep(2)
+                TRACER.sleep(2, "before clicking send")
                 
                 # Send message
                 send_button.click()
                 self.logger.info("WhatsApp message sent successfully")
                 
                 # Wait a moment to ensure the message is sent
-                time.sleep(3)
+                TRACER.sleep(3, "after sending")
                 
                 return True
                 
@@ -159,13 +210,26 @@ class WhatsAppNotifier:
                 return False
 
         except Exception as e:
-            self.logger.error(f"Failed to send WhatsApp notification: {str(e)}")
+            self.logger.error("Failed to send WhatsApp notification: %s", e)
             return False
 
         finally:
             if driver:
+                usage = self.resource_monitor.stop(driver)
+                if usage["peak_rss_mb"] is not None:
+                    self.logger.info("WhatsApp browser peaked at %.1f MB%s", usage["peak_rss_mb"],
+                                     f" of its {usage['memory_budget_mb']} MB budget"
+                                     if usage["memory_budget_mb"] else "")
                 try:
                     driver.quit()
                     self.logger.info("Chrome driver closed successfully")
                 except Exception as e:
-                    self.logger.warning(f"Failed to close Chrome driver: {str(e)}")
\ No newline at end of file
+                    self.logger.warning("Failed to close Chrome driver: %s", e)
+                try:
+                    REAPER.release(reaper_entry)
+                except Exception as e:
+                    self.logger.warning("Failed to clean up after Chrome driver: %s", e)
+                try:
+                    LATENCY_MODEL.save()
+                except Exception as e:
+                    self.logger.warning("Failed to save the latency model: %s", e)
\ No newline at end of file
@@ -0,0 +1,128 @@
+"""Lighter page loads for the automation's browser.
+
+The LMS pages pull in fonts, icon sets, analytics and other third-party
+scripts that the automation never looks at. Requests for them are blocked
+inside the browser with Network.setBlockedURLs: resource types are matched
+by file extension and hosts by URL pattern. With allowed_hosts set, every
+host except the LMS and the listed ones fails to resolve instead
+(--host-resolver-rules; this does not apply to traffic sent to proxy_server).
+
+With page_load_strategy = eager, chromedriver hands control back once the
+DOM is ready instead of waiting for the load event. PageTimings measures, for
+each page the automation visits, when control came back relative to the
+start of the navigation and when the DOM and the full page were ready, so
+the strategies can be compared.
+"""
+from urllib.parse import urlparse
+
+from metrics import REGISTRY
+
+RESOURCE_EXTENSIONS = {
+    "image": ("png", "jpg", "jpeg", "gif", "webp", "svg", "ico", "bmp"),
+    "font": ("woff", "woff2", "ttf", "otf", "eot"),
+    "media": ("mp4", "webm", "ogg", "mp3", "wav"),
+    "stylesheet": ("css",),
+    "script": ("js",)
+}
+
+TIMING_SCRIPT = """
+const navigation = performance.getEntriesByType('navigation')[0];
+if (!navigation) { return null; }
+return {
+    origin: performance.timeOrigin,
+    path: location.pathname,
+    type: navigation.type,
+    returned: performance.now(),
+    dom_ready: navigation.domContentLoadedEventEnd,
+    load: navigation.loadEventEnd,
+    resources: performance.getEntriesByType('resource').length
+};
+"""
+
+PAGE_READY_SECONDS = REGISTRY.histogram(
+    "lms_page_ready_seconds",
+    "Time from the start of a navigation until the automation got control back",
+    ("page",)
+)
+
+def blocked_url_patterns(settings):
+    """Network.setBlockedURLs patterns for the blocked resource types and hosts"""
+    patterns = []
+    for resource_type in settings.blocked_resources:
+        for extension in RESOURCE_EXTENSIONS[resource_type]:
+            patterns += [f"*.{extension}", f"*.{extension}?*"]
+    for host in settings.blocked_hosts:
+        patterns += [f"*://{host}/*", f"*://*.{host}/*"]
+    return patterns
+
+def host_resolver_rules(settings, lms_url):
+    """--host-resolver-rules value that only lets the LMS and allowed_hosts resolve, or None"""
+    allowed = list(settings.allowed_hosts)
+    if not allowed:
+        return None
+    lms_host = urlparse(lms_url).hostname
+    if lms_host:
+        allowed.insert(0, lms_host)
+    return ", ".join(["MAP * ~NOTFOUND"] + [f"EXCLUDE {host}" for host in allowed])
+
+def apply_blocking(driver, patterns, logger):
+    """Block the given URL patterns for the rest of the driver's life"""
+    if not patterns:
+        return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    except Exception as e:
+        logger.warning("Failed to block requests: %s", e)
+
+class PageTimings:
+    """Navigation timings of the pages visited in one session"""
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.pages = []
+        self.last_origin = None
+
+    def reset(self):
+        self.pages = []
+        self.last_origin = None
+
+    def record(self, driver, page):
+        """Record the current document right after the command that navigated to it
+
+        Does nothing if the command did not load a new document (a click that
+        stayed on the page, or a back navigation served from the back/forward
+        cache).
+        """
+        try:
+            timing = driver.execute_script(TIMING_SCRIPT)
+        except Exception as e:
+            self.logger.debug("Failed to read page timings: %s", e)
+            return None
+        if not timing or timing["origin"] == self.last_origin:
+            return None
+        self.last_origin = timing["origin"]
+
+        entry = {
+            "page": page,
+            "path": timing["path"],
+            "type": timing["type"],
+            "returned_ms": round(timing["returned"]),
+            "dom_ready_ms": round(timing["dom_ready"]) if timing["dom_ready"] else None,
+            # Zero while the page is still loading, which is the point of eager
+            "load_ms": round(timing["load"]) if timing["load"] else None,
+            "resources": timing["resources"]
+        }
+        self.pages.append(entry)
+        PAGE_READY_SECONDS.observe(timing["returned"] / 1000, page=page)
+        self.logger.debug("Page %s (%s) returned after %d ms, DOM ready at %s ms, loaded at %s ms",
+                          page, entry["path"], entry["returned_ms"], entry["dom_ready_ms"], entry["load_ms"])
+        return entry
+
+    def summary(self):
+        """Totals for the session history and benchmark reports"""
+        return {
+            "pages": len(self.pages),
+            "page_wait_seconds": round(sum(entry["returned_ms"] for entry in self.pages) / 1000, 3),
+            "page_timings": self.pages
+        }
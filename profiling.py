@@ -0,0 +1,136 @@
+"""Opt-in CPU and memory profiling around automation sessions.
+
+CPU profiles come from cProfile; memory reports compare a tracemalloc snapshot
+taken after the session with the one from the previous profiled session, so
+allocations that keep growing between sessions stand out. Profiling is turned
+on by the profile_cpu / profile_memory settings, or for the next session only
+by sending SIGUSR1 (POSIX) or creating logs/profiles/PROFILE_NEXT.
+"""
+import gc
+import io
+import signal
+import threading
+from contextlib import contextmanager
+
+# cProfile, pstats and tracemalloc are imported when a session is actually
+# profiled, so that the profiler costs nothing at startup while it is off.
+
+TRIGGER_FILE = "PROFILE_NEXT"
+TOP_ENTRIES = 40
+TRACEBACK_FRAMES = 10
+
+class SessionProfiler:
+    """Writes CPU and memory reports for profiled sessions to the profiles directory"""
+
+    def __init__(self, config, logger, output_dir):
+        self.config = config
+        self.logger = logger
+        self.output_dir = output_dir
+        self.previous_snapshot = None
+        self.requested = threading.Event()
+
+    def install_signal_handler(self):
+        """Profile the next session when SIGUSR1 is received (POSIX only, main thread only)"""
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, lambda signum, frame: self.requested.set())
+
+    def _take_request(self):
+        """Return True once for each SIGUSR1 or trigger file"""
+        trigger = self.output_dir / TRIGGER_FILE
+        if trigger.exists():
+            trigger.unlink()
+            self.requested.set()
+        if self.requested.is_set():
+            self.requested.clear()
+            return True
+        return False
+
+    @contextmanager
+    def profile_session(self, session_id):
+        """Profile the enclosed session according to the settings or a pending request"""
+        settings = self.config.settings.general
+        cpu, memory = settings.profile_cpu, settings.profile_memory
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if self._take_request():
+            cpu = memory = True
+
+        if memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEBACK_FRAMES)
+        elif self.previous_snapshot is not None:
+            # Memory profiling was switched off
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+            self.previous_snapshot = None
+
+        profiler = None
+        if cpu:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+                self._write_cpu_report(session_id, profiler)
+            if memory:
+                self._write_memory_report(session_id)
+            if cpu or memory:
+                self._prune()
+
+    def _write_cpu_report(self, session_id, profiler):
+        import pstats
+
+        try:
+            profile_path = self.output_dir / f"session_{session_id}_cpu.prof"
+            profiler.dump_stats(str(profile_path))
+
+            report = io.StringIO()
+            stats = pstats.Stats(profiler, stream=report)
+            stats.sort_stats("cumulative").print_stats(TOP_ENTRIES)
+            report_path = self.output_dir / f"session_{session_id}_cpu.txt"
+            report_path.write_text(report.getvalue(), encoding="utf-8")
+            self.logger.info("CPU profile written to %s", report_path)
+        except Exception as e:
+            self.logger.warning("Failed to write CPU profile: %s", e)
+
+    def _write_memory_report(self, session_id):
+        import tracemalloc
+
+        try:
+            gc.collect()
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ])
+            current, peak = tracemalloc.get_traced_memory()
+
+            lines = [
+                f"Session {session_id}",
+                f"Traced memory: current {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB",
+                ""
+            ]
+            if self.previous_snapshot is None:
+                lines.append(f"Top {TOP_ENTRIES} allocation sites (baseline for the next profiled session):")
+                lines.extend(str(stat) for stat in snapshot.statistics("lineno")[:TOP_ENTRIES])
+            else:
+                lines.append(f"Top {TOP_ENTRIES} changes since the previous profiled session:")
+                lines.extend(str(stat) for stat in snapshot.compare_to(self.previous_snapshot, "lineno")[:TOP_ENTRIES])
+            self.previous_snapshot = snapshot
+
+            report_path = self.output_dir / f"session_{session_id}_memory.txt"
+            report_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+            self.logger.info("Memory report written to %s", report_path)
+        except Exception as e:
+            self.logger.warning("Failed to write memory report: %s", e)
+
+    def _prune(self):
+        """Keep reports for the newest sessions only"""
+        retention = self.config.settings.general.profile_retention
+        for pattern in ("session_*_cpu.prof", "session_*_cpu.txt", "session_*_memory.txt"):
+            reports = sorted(self.output_dir.glob(pattern), key=lambda p: p.stat().st_mtime)
+            for path in reports[:-retention]:
+                path.unlink()
@@ -0,0 +1,256 @@
+"""Cleanup of Chrome processes and temporary profiles left behind by drivers.
+
+Every driver the automation starts is registered in ~/temp/lms_drivers.json
+with the PIDs (and start times, to survive PID reuse) of chromedriver and the
+browser it launched, its temporary profile directory and the PID of the
+owning process. Profiles live in ~/temp or, with chrome_profile_in_memory,
+in /dev/shm/lms_automation (see chrome_profile.py). When the driver is
+closed, anything still running from it is killed and its profile deleted.
+At startup, entries left by a process that no longer exists (a crash, or
+sys.exit mid-session) are reaped the same way, and chrome_user_data_*
+directories that no live driver owns are deleted.
+
+Several automation processes on one machine (e.g. worker.py processes)
+share the state file, so it is only changed under a lock on lms_drivers.lock.
+
+Killing processes needs psutil; without it only the profiles are cleaned up.
+"""
+import os
+import json
+import time
+import shutil
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+
+PROFILE_PREFIX = "chrome_user_data_"
+STATE_FILE_NAME = "lms_drivers.json"
+LOCK_FILE_NAME = "lms_drivers.lock"
+# Profiles younger than this may belong to a driver that is still starting
+STALE_PROFILE_SECONDS = 3600
+TERMINATE_TIMEOUT = 5
+MEMORY_PROFILES_DIR = Path("/dev/shm") / "lms_automation"
+
+def get_profiles_dir():
+    """Directory holding the per-session Chrome profiles"""
+    return Path.home() / "temp"
+
+def _lock_file(lock_file):
+    """Block until this process holds an exclusive lock on lock_file"""
+    if os.name == "nt":
+        import msvcrt
+        lock_file.seek(0)
+        while True:
+            try:
+                # Gives up with OSError after about ten seconds
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+    else:
+        import fcntl
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+
+def _unlock_file(lock_file):
+    if os.name == "nt":
+        import msvcrt
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+def _import_psutil():
+    try:
+        import psutil
+        return psutil
+    except ImportError:
+        return None
+
+class DriverReaper:
+    """Tracks driver process trees and profile directories so none outlive their session"""
+
+    def __init__(self, profiles_dir=None):
+        self.profiles_dir = Path(profiles_dir) if profiles_dir else get_profiles_dir()
+        self.state_file = self.profiles_dir / STATE_FILE_NAME
+        self.lock_file = self.profiles_dir / LOCK_FILE_NAME
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        """Hold the state file against other threads and other processes"""
+        with self.lock:
+            self.profiles_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_file, "a+b") as lock_file:
+                _lock_file(lock_file)
+                try:
+                    yield
+                finally:
+                    _unlock_file(lock_file)
+
+    def _load(self):
+        try:
+            with open(self.state_file, encoding="utf-8") as state:
+                return json.load(state)
+        except (OSError, ValueError):
+            return []
+
+    def _save(self, entries):
+        self.profiles_dir.mkdir(parents=True, exist_ok=True)
+        partial = self.state_file.with_name(self.state_file.name + ".tmp")
+        partial.write_text(json.dumps(entries, indent=2), encoding="utf-8")
+        os.replace(partial, self.state_file)
+
+    def register(self, driver_pid, profile_dir=None):
+        """Record a started driver; returns the entry to pass to release()"""
+        entry = {
+            "owner": _process_key(os.getpid()),
+            "processes": [_process_key(driver_pid)] + _child_keys(driver_pid),
+            "profile": str(profile_dir) if profile_dir else None,
+            "started": time.time()
+        }
+        with self._locked():
+            entries = self._load()
+            entries.append(entry)
+            self._save(entries)
+        return entry
+
+    def release(self, entry):
+        """Kill whatever is left of a closed driver and delete its profile"""
+        if entry is None:
+            return
+        _kill_processes(entry["processes"])
+        if entry["profile"]:
+            shutil.rmtree(entry["profile"], ignore_errors=True)
+        with self._locked():
+            self._save([other for other in self._load() if other != entry])
+
+    def reap_own(self):
+        """Release every driver started by this process, e.g. before exiting mid-session"""
+        own = _process_key(os.getpid())
+        with self._locked():
+            entries = [entry for entry in self._load() if entry["owner"] == own]
+        for entry in entries:
+            self.release(entry)
+        return len(entries)
+
+    def sweep(self):
+        """Reap drivers of dead processes and delete unowned profiles
+
+        Returns (processes killed, profiles deleted).
+        """
+        with self._locked():
+            entries = self._load()
+        killed = removed = 0
+        live_profiles = set()
+        for entry in entries:
+            if _is_running(entry["owner"]):
+                if entry["profile"]:
+                    live_profiles.add(entry["profile"])
+                continue
+            killed += _kill_processes(entry["processes"])
+            if entry["profile"] and Path(entry["profile"]).exists():
+                shutil.rmtree(entry["profile"], ignore_errors=True)
+                removed += 1
+            with self._locked():
+                self._save([other for other in self._load() if other != entry])
+
+        cutoff = time.time() - STALE_PROFILE_SECONDS
+        for profiles_dir in (self.profiles_dir, MEMORY_PROFILES_DIR):
+            if not profiles_dir.exists():
+                continue
+            for profile in profiles_dir.glob(f"{PROFILE_PREFIX}*"):
+                try:
+                    if str(profile) in live_profiles or profile.stat().st_mtime > cutoff:
+                        continue
+                except OSError:
+                    continue
+                shutil.rmtree(profile, ignore_errors=True)
+                removed += 1
+        return killed, removed
+
+def _process_key(pid):
+    """[pid, create time] identifying a process across PID reuse"""
+    psutil = _import_psutil()
+    create_time = None
+    if psutil:
+        try:
+            create_time = psutil.Process(pid).create_time()
+        except psutil.Error:
+            pass
+    return [pid, create_time]
+
+def _child_keys(pid):
+    """Keys of the processes a driver has started so far (the browser)"""
+    psutil = _import_psutil()
+    if not psutil:
+        return []
+    try:
+        return [[child.pid, child.create_time()] for child in psutil.Process(pid).children()]
+    except psutil.Error:
+        return []
+
+def _find_process(key):
+    """Return the psutil.Process for a key if that exact process is still running"""
+    psutil = _import_psutil()
+    pid, create_time = key
+    if not psutil or create_time is None:
+        return None
+    try:
+        process = psutil.Process(pid)
+        if abs(process.create_time() - create_time) > 1:
+            return None
+        return process
+    except psutil.Error:
+        return None
+
+def _is_running(key):
+    if _find_process(key):
+        return True
+    pid, create_time = key
+    if create_time is not None and _import_psutil():
+        return False
+    # Without psutil, fall back to whether the PID exists at all. On Windows
+    # os.kill() would terminate the process, so assume it is running.
+    if os.name == "nt":
+        return True
+    try:
+        os.kill(pid, 0)
+        return True
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+
+def _kill_processes(keys):
+    """Terminate the recorded processes and their descendants; returns how many were running"""
+    psutil = _import_psutil()
+    if not psutil:
+        return 0
+    processes = {}
+    for key in keys:
+        process = _find_process(key)
+        if process is None:
+            continue
+        processes[process.pid] = process
+        try:
+            for child in process.children(recursive=True):
+                processes[child.pid] = child
+        except psutil.Error:
+            pass
+    if not processes:
+        return 0
+    for process in processes.values():
+        try:
+            process.terminate()
+        except psutil.Error:
+            pass
+    _, alive = psutil.wait_procs(list(processes.values()), timeout=TERMINATE_TIMEOUT)
+    for process in alive:
+        try:
+            process.kill()
+        except psutil.Error:
+            pass
+    return len(processes)
+
+REAPER = DriverReaper()
@@ -0,0 +1,272 @@
+"""Per-session resource accounting for the browser process tree.
+
+A background thread samples chromedriver and all of its descendants (the
+Chrome browser, GPU, network and renderer processes) for peak RSS and CPU
+time, and the browser's performance log is read for network requests and
+transferred bytes. Summaries are appended to logs/session_history.jsonl.
+
+With a memory budget, the browser is stopped once the tree stays above the
+budget for OVER_BUDGET_SAMPLES samples, so the session fails instead of the
+VM running out of memory, and the summary reports the peak against the
+budget.
+
+Process sampling needs psutil (imported on first use); without it only
+network usage is recorded.
+"""
+import json
+import threading
+from datetime import datetime
+
+from metrics import REGISTRY
+
+SAMPLE_INTERVAL = 0.5
+OVER_BUDGET_SAMPLES = 2
+
+SESSION_PEAK_RSS = REGISTRY.gauge(
+    "lms_session_peak_rss_bytes",
+    "Peak resident memory of the browser process tree during the last session"
+)
+SESSION_CPU_SECONDS = REGISTRY.gauge(
+    "lms_session_cpu_seconds",
+    "CPU time used by the browser process tree during the last session"
+)
+SESSION_NETWORK_BYTES = REGISTRY.gauge(
+    "lms_session_network_bytes",
+    "Encoded bytes received by the browser during the last session"
+)
+SESSION_REQUESTS = REGISTRY.gauge(
+    "lms_session_requests",
+    "Network requests made by the browser during the last session"
+)
+BUDGET_EXCEEDED = REGISTRY.counter(
+    "lms_memory_budget_exceeded_total",
+    "Browsers stopped for exceeding driver_memory_budget_mb",
+    ("browser",)
+)
+
+def enable_performance_log(options):
+    """Ask chromedriver to buffer DevTools network events for collect_network()"""
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+class ResourceMonitor:
+    """Samples the driver's process tree and counts network traffic for one session"""
+
+    def __init__(self, logger, interval=SAMPLE_INTERVAL, name="attendance", publish_metrics=True):
+        self.logger = logger
+        self.interval = interval
+        self.name = name
+        self.publish_metrics = publish_metrics
+        self.budget = None
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.psutil = None
+        # Callbacks given every batch of performance log messages
+        self.listeners = []
+        self._reset()
+        self.warned_missing_psutil = False
+
+    def _reset(self):
+        self.root = None
+        self.peak_rss = 0
+        self.peak_processes = 0
+        # (pid, create_time) -> latest user + system CPU seconds seen
+        self.cpu_seconds = {}
+        self.requests = 0
+        self.failed_requests = 0
+        self.received_bytes = 0
+        self.over_budget_samples = 0
+        self.budget_exceeded = False
+
+    def start(self, driver, budget=None):
+        """Start sampling the process tree rooted at the driver's chromedriver process
+
+        budget is the memory budget in bytes for the whole tree, or None.
+        """
+        self.stop_event.clear()
+        with self.lock:
+            self._reset()
+        self.budget = budget
+        try:
+            import psutil
+            self.psutil = psutil
+        except ImportError:
+            if not self.warned_missing_psutil:
+                self.logger.warning("psutil is not installed; browser memory and CPU will not be recorded")
+                self.warned_missing_psutil = True
+            return
+        try:
+            self.root = psutil.Process(driver.service.process.pid)
+        except Exception as e:
+            self.logger.warning("Cannot monitor the browser process tree: %s", e)
+            return
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def switch_driver(self, driver):
+        """Follow a restarted driver, keeping the session's totals"""
+        if self.psutil is None:
+            return
+        try:
+            root = self.psutil.Process(driver.service.process.pid)
+        except Exception as e:
+            self.logger.warning("Cannot monitor the restarted browser: %s", e)
+            return
+        with self.lock:
+            self.root = root
+        self.over_budget_samples = 0
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            self._sample()
+            self.stop_event.wait(self.interval)
+
+    def _sample(self):
+        if self.root is None:
+            return
+        try:
+            processes = [self.root] + self.root.children(recursive=True)
+        except self.psutil.Error:
+            return
+
+        rss = 0
+        alive = 0
+        for process in processes:
+            try:
+                with process.oneshot():
+                    rss += process.memory_info().rss
+                    cpu = process.cpu_times()
+                    key = (process.pid, process.create_time())
+                alive += 1
+            except self.psutil.Error:
+                continue
+            with self.lock:
+                self.cpu_seconds[key] = max(self.cpu_seconds.get(key, 0), cpu.user + cpu.system)
+
+        with self.lock:
+            self.peak_rss = max(self.peak_rss, rss)
+            self.peak_processes = max(self.peak_processes, alive)
+        self._enforce_budget(rss)
+
+    def _enforce_budget(self, rss):
+        if not self.budget or self.budget_exceeded:
+            return
+        if rss <= self.budget:
+            self.over_budget_samples = 0
+            return
+        self.over_budget_samples += 1
+        if self.over_budget_samples < OVER_BUDGET_SAMPLES:
+            return
+        self.budget_exceeded = True
+        BUDGET_EXCEEDED.inc(browser=self.name)
+        self.logger.error("The %s browser uses %.0f MB, over its %.0f MB budget; stopping it",
+                          self.name, rss / (1024 * 1024), self.budget / (1024 * 1024))
+        # Chrome only: chromedriver stays up, so the next command fails with
+        # "chrome not reachable" and the session ends normally
+        try:
+            browsers = self.root.children(recursive=True)
+        except self.psutil.Error:
+            return
+        for process in browsers:
+            try:
+                process.kill()
+            except self.psutil.Error:
+                pass
+
+    def current_rss(self):
+        """Return the current RSS of the process tree in bytes, or None if unknown"""
+        if self.root is None:
+            return None
+        try:
+            processes = [self.root] + self.root.children(recursive=True)
+        except self.psutil.Error:
+            return None
+        total = 0
+        for process in processes:
+            try:
+                total += process.memory_info().rss
+            except self.psutil.Error:
+                continue
+        return total
+
+    def collect_network(self, driver):
+        """Drain the performance log and count requests and received bytes
+
+        Called from the automation thread between phases; chromedriver buffers
+        the events until they are read.
+        """
+        try:
+            entries = driver.get_log("performance")
+        except Exception:
+            return []
+
+        messages = []
+        requests = failed = received = 0
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            messages.append(message)
+            method = message.get("method")
+            if method == "Network.requestWillBeSent":
+                requests += 1
+            elif method == "Network.loadingFinished":
+                received += message.get("params", {}).get("encodedDataLength", 0)
+            elif method == "Network.loadingFailed":
+                failed += 1
+
+        with self.lock:
+            self.requests += requests
+            self.failed_requests += failed
+            self.received_bytes += int(received)
+        for listener in list(self.listeners):
+            listener(messages)
+        return messages
+
+    def stop(self, driver):
+        """Stop sampling and return the session's resource summary"""
+        if driver is not None:
+            self.collect_network(driver)
+            # Final sample while the processes are still alive
+            self._sample()
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+            self.thread = None
+
+        with self.lock:
+            summary = {
+                "peak_rss_mb": round(self.peak_rss / (1024 * 1024), 1) if self.root else None,
+                "cpu_seconds": round(sum(self.cpu_seconds.values()), 2) if self.root else None,
+                "peak_processes": self.peak_processes if self.root else None,
+                "requests": self.requests,
+                "failed_requests": self.failed_requests,
+                "received_mb": round(self.received_bytes / (1024 * 1024), 3),
+                "memory_budget_mb": round(self.budget / (1024 * 1024)) if self.budget else None,
+                "over_budget": self.budget_exceeded
+            }
+
+        if self.publish_metrics:
+            if self.root:
+                SESSION_PEAK_RSS.set(self.peak_rss)
+                SESSION_CPU_SECONDS.set(summary["cpu_seconds"])
+            SESSION_NETWORK_BYTES.set(self.received_bytes)
+            SESSION_REQUESTS.set(self.requests)
+        return summary
+
+def append_session_history(path, session_id, started_at, duration, outcome, resources):
+    """Append one session's summary to the JSON-lines session history"""
+    entry = {
+        "session": session_id,
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+        "duration_seconds": round(duration, 1),
+        "outcome": outcome
+    }
+    entry.update(resources or {})
+    with open(path, "a", encoding="utf-8") as history_file:
+        history_file.write(json.dumps(entry) + "\n")
@@ -0,0 +1,345 @@
+"""Record real LMS sessions and replay them offline.
+
+With record_sessions enabled, every response the browser receives from the
+LMS during a session is saved to logs/recordings/<session>/ together with the
+attendance results of that session. Bodies come from DevTools
+(Network.getResponseBody) while the performance log is drained; the
+username and password are replaced everywhere, cookies are dropped, and the
+LMS origin is replaced with a placeholder so the pages can be served from
+anywhere. Responses from other hosts (CDNs, fonts) are not recorded.
+
+ReplayServer serves a recording back in the order it was recorded, so the
+automation runs against real page shapes without the network:
+
+    python session_replay.py serve logs/recordings/20261019-143820-3
+    python session_replay.py check recordings/
+
+`check` replays every recording in a corpus directory and fails if a
+session fails or its per-class results differ from the recorded ones; this is
+how layout changes that break the XPaths are caught before production.
+Copy recordings worth keeping from logs/recordings/ into the corpus.
+"""
+import sys
+import json
+import time
+import base64
+import argparse
+import threading
+from pathlib import Path
+from datetime import datetime
+from urllib.parse import urlsplit, quote_plus
+
+from metrics import CLASS_RESULTS
+
+RECORDING_FILE = "recording.json"
+ORIGIN_PLACEHOLDER = "{{LMS_ORIGIN}}"
+SCRUBBED_USERNAME = "recorded-user"
+SCRUBBED_PASSWORD = "recorded-password"
+# WebDriver commands after which new responses are likely to have arrived
+NAVIGATING_COMMANDS = {"get", "clickElement", "goBack", "refresh", "submitElement"}
+KEPT_HEADERS = ("content-type", "location")
+TEXT_TYPES = ("text/", "application/json", "application/javascript", "application/xml", "image/svg")
+
+def class_result_totals():
+    """Return {result: count} from the class results counter"""
+    with CLASS_RESULTS.lock:
+        return {key[0]: count for key, count in CLASS_RESULTS.values.items()}
+
+def result_changes(before, after):
+    """Counts added to the class results counter between two totals"""
+    return {result: count - before.get(result, 0)
+            for result, count in after.items() if count > before.get(result, 0)}
+
+class SessionRecorder:
+    """Captures the LMS responses one session's browser receives"""
+
+    def __init__(self, logger, base_url, username, password):
+        self.logger = logger
+        parts = urlsplit(base_url)
+        self.origin = f"{parts.scheme}://{parts.netloc}"
+        self.secrets = [
+            (value, replacement)
+            for secret, replacement in ((password, SCRUBBED_PASSWORD), (username, SCRUBBED_USERNAME))
+            if secret and len(secret) >= 3
+            for value in {secret, quote_plus(secret)}
+        ]
+        self.driver = None
+        self.resource_monitor = None
+        self.responses = []
+        self.pending = {}
+        self.results_before = class_result_totals()
+        self.lock = threading.Lock()
+
+    def attach(self, driver, resource_monitor):
+        """Drain the performance log after every navigating command and keep the responses"""
+        self.driver = driver
+        self.resource_monitor = resource_monitor
+        resource_monitor.listeners.append(self._on_messages)
+        execute = driver.execute
+
+        def recording_execute(driver_command, params=None):
+            result = execute(driver_command, params)
+            if driver_command in NAVIGATING_COMMANDS:
+                resource_monitor.collect_network(driver)
+            return result
+
+        driver.execute = recording_execute
+
+    def detach(self):
+        """Stop receiving performance log messages"""
+        if self.resource_monitor and self._on_messages in self.resource_monitor.listeners:
+            self.resource_monitor.listeners.remove(self._on_messages)
+
+    def _on_messages(self, messages):
+        for message in messages:
+            method = message.get("method")
+            params = message.get("params", {})
+            if method == "Network.requestWillBeSent":
+                redirect = params.get("redirectResponse")
+                if redirect:
+                    # Same requestId as the request that was redirected
+                    previous = self.pending.get(params["requestId"], {})
+                    self._add_response(previous.get("method", "GET"), redirect, None)
+                self.pending[params["requestId"]] = {"method": params["request"]["method"]}
+            elif method == "Network.responseReceived":
+                entry = self.pending.get(params["requestId"])
+                if entry is not None:
+                    entry["response"] = params["response"]
+            elif method == "Network.loadingFinished":
+                entry = self.pending.pop(params["requestId"], None)
+                if entry and "response" in entry:
+                    self._add_response(entry["method"], entry["response"], self._get_body(params["requestId"]))
+            elif method == "Network.loadingFailed":
+                self.pending.pop(params["requestId"], None)
+
+    def _get_body(self, request_id):
+        try:
+            result = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+        except Exception:
+            # Evicted from the browser's buffer, or a response without a body
+            return None
+        if result.get("base64Encoded"):
+            return base64.b64decode(result["body"])
+        return result["body"].encode("utf-8")
+
+    def _add_response(self, method, response, body):
+        url = response.get("url", "")
+        if not url.startswith(self.origin):
+            return
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        headers = {name.lower(): value for name, value in response.get("headers", {}).items()
+                   if name.lower() in KEPT_HEADERS}
+        with self.lock:
+            self.responses.append({
+                "method": method,
+                "path": self._scrub(path),
+                "status": response.get("status", 200),
+                "headers": {name: self._scrub(value) for name, value in headers.items()},
+                "mime": response.get("mimeType", ""),
+                "body": body
+            })
+
+    def _scrub(self, text):
+        for secret, replacement in self.secrets:
+            text = text.replace(secret, replacement)
+        return text.replace(self.origin, ORIGIN_PLACEHOLDER)
+
+    def save(self, output_dir, session_id):
+        """Write the recording to output_dir; returns the number of responses saved"""
+        self.detach()
+        output_dir = Path(output_dir)
+        (output_dir / "bodies").mkdir(parents=True, exist_ok=True)
+        entries = []
+        with self.lock:
+            responses = list(self.responses)
+        for number, response in enumerate(responses, start=1):
+            entry = {key: response[key] for key in ("method", "path", "status", "headers", "mime")}
+            body = response["body"]
+            if body is not None:
+                is_text = response["mime"].startswith(TEXT_TYPES)
+                if is_text:
+                    body = self._scrub(body.decode("utf-8", errors="replace")).encode("utf-8")
+                body_path = Path("bodies") / f"{number:04d}{'.txt' if is_text else '.bin'}"
+                (output_dir / body_path).write_bytes(body)
+                entry["body"] = body_path.as_posix()
+                entry["text"] = is_text
+            entries.append(entry)
+
+        recording = {
+            "session": session_id,
+            "recorded_at": datetime.now().isoformat(timespec="seconds"),
+            "class_results": result_changes(self.results_before, class_result_totals()),
+            "responses": entries
+        }
+        (output_dir / RECORDING_FILE).write_text(json.dumps(recording, indent=2), encoding="utf-8")
+        return len(entries)
+
+class ReplayServer:
+    """Serves a recording on 127.0.0.1, each request path in its recorded order"""
+
+    def __init__(self, recording_dir):
+        self.recording_dir = Path(recording_dir)
+        with open(self.recording_dir / RECORDING_FILE, encoding="utf-8") as recording_file:
+            self.recording = json.load(recording_file)
+        self.by_request = {}
+        for entry in self.recording["responses"]:
+            self.by_request.setdefault((entry["method"], entry["path"]), []).append(entry)
+        self.positions = {}
+        self.lock = threading.Lock()
+        self.server = None
+        self.misses = []
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self, port=0):
+        from http.server import ThreadingHTTPServer
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._make_handler())
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.url
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def reset(self):
+        """Start serving every path from its first recorded response again"""
+        with self.lock:
+            self.positions = {}
+            self.misses = []
+
+    def next_response(self, method, path):
+        """Return the next recorded response for a request, repeating the last one when exhausted"""
+        key = (method, path)
+        with self.lock:
+            entries = self.by_request.get(key)
+            if not entries:
+                self.misses.append(f"{method} {path}")
+                return None
+            position = self.positions.get(key, 0)
+            self.positions[key] = position + 1
+            return entries[min(position, len(entries) - 1)]
+
+    def _make_handler(self):
+        from http.server import BaseHTTPRequestHandler
+
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self._replay("GET")
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                self._replay("POST")
+
+            def _replay(self, method):
+                entry = replay.next_response(method, self.path)
+                if entry is None:
+                    self.send_error(404, "Not in recording")
+                    return
+                origin = replay.url.rstrip("/")
+                body = b""
+                if entry.get("body"):
+                    body = (replay.recording_dir / entry["body"]).read_bytes()
+                    if entry.get("text"):
+                        body = body.replace(ORIGIN_PLACEHOLDER.encode(), origin.encode())
+                self.send_response(entry["status"])
+                for name, value in entry["headers"].items():
+                    self.send_header(name, value.replace(ORIGIN_PLACEHOLDER, origin))
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+def find_recordings(paths):
+    """Recording directories at or below the given paths"""
+    found = []
+    for path in map(Path, paths):
+        if (path / RECORDING_FILE).exists():
+            found.append(path)
+        else:
+            found.extend(sorted(recording.parent for recording in path.rglob(RECORDING_FILE)))
+    return found
+
+def check(paths):
+    """Replay each recording and compare the results; returns the number of failures"""
+    import tempfile
+    from bench_session import write_config, create_automation, run_once
+    from logger import Logger
+
+    recordings = find_recordings(paths)
+    if not recordings:
+        print("No recordings found")
+        return 1
+
+    failures = 0
+    logger = Logger(index=False)
+    try:
+        for recording_dir in recordings:
+            replay = ReplayServer(recording_dir)
+            url = replay.start()
+            try:
+                with tempfile.TemporaryDirectory() as temp_dir:
+                    config_file = Path(temp_dir) / "replay_config.ini"
+                    write_config(config_file, url)
+                    automation = create_automation(config_file, logger, temp_dir)
+                    with logger.context(session=f"replay-{recording_dir.name}"):
+                        run = run_once(automation)
+            finally:
+                replay.stop()
+
+            expected = replay.recording["class_results"]
+            problems = []
+            if run["outcome"] != "success":
+                problems.append(run["outcome"])
+            if run["class_results"] != expected:
+                problems.append(f"class results {run['class_results']}, recorded {expected}")
+            if replay.misses:
+                problems.append(f"{len(replay.misses)} requests not in the recording, e.g. {replay.misses[0]}")
+            status = "FAIL" if problems else "ok"
+            failures += bool(problems)
+            print(f"{status:<4} {recording_dir} ({run['total']:.2f} s)")
+            for problem in problems:
+                print(f"     {problem}")
+    finally:
+        logger.shutdown()
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded LMS sessions")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="Serve one recording")
+    serve_parser.add_argument("recording")
+    serve_parser.add_argument("--port", type=int, default=8766)
+    check_parser = commands.add_parser("check", help="Replay recordings and compare the results")
+    check_parser.add_argument("paths", nargs="+", help="Recording or corpus directories")
+    args = parser.parse_args()
+
+    if args.command == "check":
+        return 1 if check(args.paths) else 0
+
+    replay = ReplayServer(args.recording)
+    print(f"Replaying {args.recording} at {replay.start(args.port)}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        replay.stop()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""Fast-forward simulation of the automation loop on a virtual clock.
+
+Runs LMSAutomationController.automation_loop for days of virtual time in a
+few seconds. The browser session is replaced by a stand-in that spends
+virtual time the way a real one does: browser startup and login, the fixed
+V-Class waits and the random pre-click delay for each class. Everything
+else (the loop, the interval wait, session bookkeeping) is the real code.
+
+For each check interval given, the simulation reports sessions per day,
+browser time per day, the longest gap between session starts, and fails if a
+gap exceeded the interval plus the longest possible session (a missed
+session) or a day went without any session.
+
+    python simulate.py --days 7
+    python simulate.py --days 30 --interval 1800 3600 7200 --failure-rate 0.1
+"""
+import sys
+import time
+import random
+import argparse
+import tempfile
+from pathlib import Path
+from datetime import datetime, timedelta
+
+from clock import VirtualClock
+from tracing import TRACER
+from bench_session import write_config
+
+DEFAULT_BROWSER_SECONDS = 25
+# Fixed waits in navigate_to_vclass
+NAVIGATION_WAIT_SECONDS = 3
+
+class SimulatedSession:
+    """Stands in for AttendanceAutomation.run_session, spending virtual time instead of driving Chrome"""
+
+    def __init__(self, controller, clock, end_time, classes, browser_seconds, failure_rate, seed):
+        self.controller = controller
+        self.clock = clock
+        self.end_time = end_time
+        self.classes = classes
+        self.browser_seconds = browser_seconds
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.starts = []
+        self.durations = []
+        self.failures = 0
+
+    def longest_session(self):
+        settings = self.controller.config.settings.general
+        return self.browser_seconds + NAVIGATION_WAIT_SECONDS + self.classes * settings.attendance_delay_max * 60
+
+    def run_session(self, session_id=None):
+        start = self.clock.time()
+        self.starts.append(start)
+        settings = self.controller.config.settings.general
+        try:
+            self.clock.sleep(self.browser_seconds)
+            TRACER.sleep(NAVIGATION_WAIT_SECONDS, "V-Class navigation", self.clock)
+            for _ in range(self.classes):
+                delay_minutes = self.random.uniform(settings.attendance_delay_min, settings.attendance_delay_max)
+                TRACER.sleep(delay_minutes * 60, "random delay before marking attendance", self.clock)
+            if self.random.random() < self.failure_rate:
+                self.failures += 1
+                raise Exception("Simulated session failure")
+        finally:
+            self.durations.append(self.clock.time() - start)
+            if self.clock.time() >= self.end_time:
+                self.controller.running = False
+
+def simulate(interval, args):
+    """Run the loop for args.days with the given check interval; returns the summary"""
+    from main import LMSAutomationController
+
+    start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    clock = VirtualClock(start)
+    end_time = (start + timedelta(days=args.days)).timestamp()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_file = Path(temp_dir) / "simulation_config.ini"
+        # Nothing listens at the configured url, so the pre-flight probe is off
+        write_config(config_file, "http://127.0.0.1/", check_interval=interval, preflight_probe="false")
+        controller = LMSAutomationController(config_file, clock=clock)
+        # Keep thousands of simulated sessions out of the console and logs/automation.log
+        controller.logger.logger.disabled = not args.verbose
+        session = SimulatedSession(controller, clock, end_time, args.classes, args.browser_seconds,
+                                   args.failure_rate, args.seed)
+        controller.automation.run_session = session.run_session
+        # Simulated sessions stay out of logs/session_history.jsonl
+        controller.record_session_history = lambda *unused: None
+        try:
+            controller.automation_loop()
+        finally:
+            controller.config.stop_watching()
+            if controller.metrics_server:
+                controller.metrics_server.stop()
+            controller.logger.shutdown()
+
+    gaps = [later - earlier for earlier, later in zip(session.starts, session.starts[1:])]
+    allowed_gap = interval + session.longest_session()
+    session_days = {datetime.fromtimestamp(started).date() for started in session.starts}
+    days_without_session = [
+        day for day in (start.date() + timedelta(days=offset) for offset in range(args.days))
+        if day not in session_days
+    ]
+    return {
+        "interval": interval,
+        "sessions": len(session.starts),
+        "failures": session.failures,
+        "sessions_per_day": len(session.starts) / args.days,
+        "browser_minutes_per_day": sum(session.durations) / 60 / args.days,
+        "max_gap_minutes": max(gaps) / 60 if gaps else 0.0,
+        "missed": sum(1 for gap in gaps if gap > allowed_gap),
+        "days_without_session": len(days_without_session)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate the automation loop on a virtual clock")
+    parser.add_argument("--days", type=int, default=7, help="Virtual days to simulate (default 7)")
+    parser.add_argument("--interval", type=int, nargs="+", default=[3600],
+                        help="Check intervals in seconds to compare (default 3600)")
+    parser.add_argument("--classes", type=int, default=5, help="Classes per session (default 5)")
+    parser.add_argument("--browser-seconds", type=float, default=DEFAULT_BROWSER_SECONDS,
+                        help=f"Browser startup and login time per session (default {DEFAULT_BROWSER_SECONDS})")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of sessions that fail")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--verbose", action="store_true", help="Show the automation's log output")
+    args = parser.parse_args()
+
+    print(f"{'interval':>9} {'sessions':>9} {'failed':>7} {'per day':>8} {'browser min/day':>16} "
+          f"{'max gap min':>12} {'missed':>7}")
+    failed = False
+    for interval in args.interval:
+        wall_start = time.perf_counter()
+        summary = simulate(interval, args)
+        elapsed = time.perf_counter() - wall_start
+        print(f"{summary['interval']:>9} {summary['sessions']:>9} {summary['failures']:>7} "
+              f"{summary['sessions_per_day']:>8.1f} {summary['browser_minutes_per_day']:>16.1f} "
+              f"{summary['max_gap_minutes']:>12.1f} {summary['missed']:>7}  ({elapsed:.1f} s)")
+        if summary["missed"] or summary["days_without_session"]:
+            print(f"FAIL: interval {interval}: {summary['missed']} missed sessions, "
+                  f"{summary['days_without_session']} days without a session")
+            failed = True
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
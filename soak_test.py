@@ -0,0 +1,174 @@
+"""Soak test for slow resource leaks in the long-running controller.
+
+Runs many sessions back to back through LMSAutomationController.run_session
+(the same path the tray app takes every check interval, minus the wait)
+against the local mock LMS, and periodically fires the notification tests,
+which start threading.Timer threads. After every session it samples:
+
+    heap_kb      Python memory traced by tracemalloc
+    threads      live Python threads
+    fds          open file descriptors (POSIX)
+    children     child processes of this process (chromedriver, Chrome)
+    temp_mb      space used by Chrome profiles in ~/temp and /dev/shm
+
+Samples are written to logs/soak/soak_<timestamp>.jsonl. The run fails
+(exit code 1) if a metric keeps growing: after the warm-up, the median of the
+last quarter of samples must not exceed the median of the first quarter by
+more than the metric's allowance, with a positive fitted slope.
+
+    python soak_test.py --sessions 2000
+    python soak_test.py --sessions 200 --notification-tests-every 10
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import statistics
+import tracemalloc
+from pathlib import Path
+from datetime import datetime
+
+from logger import get_logs_dir
+from mock_lms import MockLMS
+from bench_session import write_config, isolate_state
+from reaper import MEMORY_PROFILES_DIR, get_profiles_dir
+
+DEFAULT_SESSIONS = 1000
+WARMUP_FRACTION = 0.1
+# Growth tolerated between the first and last quarter of the run
+ALLOWED_GROWTH = {
+    "heap_kb": 2048,
+    "threads": 2,
+    "fds": 5,
+    "children": 0,
+    "temp_mb": 1
+}
+
+def directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                continue
+    return total
+
+def count_fds():
+    for fd_dir in ("/proc/self/fd", "/dev/fd"):
+        if os.path.isdir(fd_dir):
+            return len(os.listdir(fd_dir))
+    return None
+
+def count_children():
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return len(psutil.Process().children(recursive=True))
+
+def take_sample(session):
+    """Measure the leak-prone resources after a session"""
+    current, _ = tracemalloc.get_traced_memory()
+    return {
+        "session": session,
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "heap_kb": round(current / 1024, 1),
+        "threads": threading.active_count(),
+        "fds": count_fds(),
+        "children": count_children(),
+        "temp_mb": round((directory_size(get_profiles_dir()) + directory_size(MEMORY_PROFILES_DIR)) / (1024 * 1024), 2)
+    }
+
+def slope(values):
+    """Least-squares slope of values against their index"""
+    count = len(values)
+    mean_x = (count - 1) / 2
+    mean_y = sum(values) / count
+    denominator = sum((x - mean_x) ** 2 for x in range(count))
+    if not denominator:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in enumerate(values)) / denominator
+
+def find_trends(samples):
+    """Return {metric: (growth, slope)} for the metrics that grew beyond their allowance"""
+    steady = samples[int(len(samples) * WARMUP_FRACTION):]
+    quarter = max(len(steady) // 4, 1)
+    trends = {}
+    for metric, allowed in ALLOWED_GROWTH.items():
+        values = [sample[metric] for sample in steady if sample[metric] is not None]
+        if len(values) < 8:
+            continue
+        growth = statistics.median(values[-quarter:]) - statistics.median(values[:quarter])
+        fitted = slope(values)
+        if growth > allowed and fitted > 0:
+            trends[metric] = (growth, fitted)
+    return trends
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many sessions and fail on growing resource usage")
+    parser.add_argument("--sessions", type=int, default=DEFAULT_SESSIONS,
+                        help=f"Number of sessions to run (default {DEFAULT_SESSIONS})")
+    parser.add_argument("--classes", type=int, default=3, help="Classes served by the mock (default 3)")
+    parser.add_argument("--notification-tests-every", type=int, default=25,
+                        help="Run the tray's email and WhatsApp tests every N sessions (0 = never)")
+    args = parser.parse_args()
+
+    # Imported here so tracemalloc sees the controller's allocations too
+    tracemalloc.start()
+    from main import LMSAutomationController
+
+    lms = MockLMS(args.classes)
+    url = lms.start()
+    output = get_logs_dir() / "soak" / f"soak_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    samples = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config_file = Path(temp_dir) / "soak_config.ini"
+        write_config(config_file, url)
+        controller = LMSAutomationController(config_file)
+        isolate_state(controller.automation, temp_dir)
+        controller.running = True
+
+        start = time.perf_counter()
+        try:
+            with open(output, "w", encoding="utf-8") as samples_file:
+                for session in range(1, args.sessions + 1):
+                    lms.reset()
+                    controller.run_session()
+                    if args.notification_tests_every and session % args.notification_tests_every == 0:
+                        controller.test_email_notification()
+                        controller.test_whatsapp_notification()
+
+                    sample = take_sample(session)
+                    samples.append(sample)
+                    samples_file.write(json.dumps(sample) + "\n")
+                    samples_file.flush()
+                    if session % 10 == 0 or session == args.sessions:
+                        elapsed = time.perf_counter() - start
+                        print(f"session {session}/{args.sessions} ({elapsed / session:.1f} s/session): "
+                              + ", ".join(f"{metric} {sample[metric]}" for metric in ALLOWED_GROWTH))
+        except KeyboardInterrupt:
+            print("Interrupted; analysing the samples taken so far")
+        finally:
+            controller.running = False
+            controller.config.stop_watching()
+            if controller.metrics_server:
+                controller.metrics_server.stop()
+            controller.logger.shutdown()
+            lms.stop()
+
+    print(f"Samples written to {output}")
+    trends = find_trends(samples)
+    for metric, (growth, fitted) in trends.items():
+        print(f"FAIL: {metric} grew by {growth:g} ({fitted:+.4f} per session)")
+    if not trends:
+        print("OK")
+    return 1 if trends else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+from clock import VirtualClock
+from circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+def test_failure_opens_and_backs_off_exponentially():
+    clock = VirtualClock()
+    breaker = CircuitBreaker(clock)
+    assert breaker.allow()
+    breaker.record_failure(120, 900)
+    assert breaker.state == OPEN
+    assert breaker.wait_seconds(900) == 120
+    assert not breaker.allow()
+    clock.sleep(120)
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    breaker.record_failure(120, 900)
+    assert breaker.wait_seconds(900) == 240
+    for _ in range(5):
+        clock.sleep(breaker.wait_seconds(900))
+        assert breaker.allow()
+        breaker.record_failure(120, 900)
+    assert breaker.wait_seconds(900) == 900
+
+def test_success_closes_and_restores_cadence():
+    clock = VirtualClock()
+    breaker = CircuitBreaker(clock)
+    assert not breaker.record_success()
+    breaker.record_failure(120, 900)
+    assert breaker.allow(force=True)
+    assert breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.wait_seconds(900) == 900
+
+def test_threshold_delays_opening():
+    clock = VirtualClock()
+    breaker = CircuitBreaker(clock, failure_threshold=2)
+    breaker.record_failure(120, 900)
+    assert breaker.state == CLOSED
+    breaker.record_failure(120, 900)
+    assert breaker.state == OPEN
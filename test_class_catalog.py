@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+from clock import VirtualClock
+from class_catalog import ClassCatalog, class_id
+
+def test_class_id_from_link_path():
+    assert class_id("Math", "https://lms.example/class/12/") == "/class/12"
+    assert class_id("Math", "/class/view?id=12") == "/class/view?id=12"
+    assert class_id("Math") == "name:Math"
+
+def test_new_classes_and_reordering(tmp_path):
+    clock = VirtualClock(datetime(2026, 1, 5, 8))
+    catalog = ClassCatalog("alice", tmp_path / "alice.json", clock)
+    assert catalog.update([("Math", "/class/1"), ("Physics", "/class/2")], "fp1") == ["/class/1", "/class/2"]
+    clock.sleep(timedelta(days=1).total_seconds())
+    assert catalog.update([("Chemistry", "/class/3"), ("Physics", "/class/2")], "fp2") == ["/class/3"]
+    assert catalog.id_at(2) == "/class/2"
+    physics = catalog.get("/class/2")
+    assert (physics["first_seen"], physics["last_seen"], physics["position"]) == ("2026-01-05", "2026-01-06", 2)
+    assert catalog.get("/class/1")["position"] is None
+
+def test_history_survives_restart(tmp_path):
+    clock = VirtualClock(datetime(2026, 1, 5, 8))
+    catalog = ClassCatalog("alice", tmp_path / "alice.json", clock)
+    catalog.update([("Math", "/class/1")], "fp1")
+    catalog.record_visit("/class/1", "marked", button_open=True)
+    catalog.record_visit("/class/1", "no_button")
+    catalog.save()
+
+    clock.sleep(timedelta(days=2).total_seconds())
+    loaded = ClassCatalog("alice", tmp_path / "alice.json", clock)
+    assert not loaded.unchanged("other")
+    assert loaded.unchanged("fp1")
+    assert loaded.names() == ["Math"]
+    math = loaded.get("/class/1")
+    assert math["open_times"] == ["2026-01-05T08:00:00"]
+    assert math["last_outcome"] == "no_button"
+    assert math["last_seen"] == "2026-01-07"
+
+def test_links_without_a_path_fall_back_to_names():
+    assert class_id("A", "#") == "name:A"
+    assert class_id("C", "#kelas") == "name:C"
+    assert class_id("D", "javascript:void(0)") == "name:D"
+    assert class_id("E", "") == "name:E"
+
+def test_duplicate_links_keep_classes_apart(tmp_path):
+    catalog = ClassCatalog("alice", tmp_path / "alice.json", VirtualClock())
+    new_ids = catalog.update([("Math", "/class/view"), ("Physics", "/class/view"), ("Physics", "/class/view")], "fp")
+    assert len(set(new_ids)) == 3
+    assert catalog.names() == ["Math", "Physics", "Physics"]
+
+def test_cards_without_links_match_known_classes_by_name(tmp_path):
+    catalog = ClassCatalog("alice", tmp_path / "alice.json", VirtualClock())
+    catalog.update([("Math", "/class/1"), ("Physics", "/class/2")], "fp1")
+    assert catalog.update([("Physics", None), ("Math", None), ("Biology", None)], None) == ["name:Biology"]
+    assert [catalog.id_at(position) for position in (1, 2)] == ["/class/2", "/class/1"]
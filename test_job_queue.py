@@ -0,0 +1,65 @@
+from clock import VirtualClock
+from job_queue import JobQueue
+
+def make_queue(tmp_path, clock):
+    return JobQueue(tmp_path / "jobs.sqlite", clock)
+
+def test_claims_only_due_jobs_oldest_first(tmp_path):
+    clock = VirtualClock()
+    queue = make_queue(tmp_path, clock)
+    queue.add("later", "later.ini", due_at=clock.time() + 60)
+    queue.add("first", "first.ini", due_at=clock.time() - 10)
+    queue.add("second", "second.ini", due_at=clock.time() - 5)
+    assert queue.claim("w1", 120)["account"] == "first"
+    assert queue.claim("w1", 120)["account"] == "second"
+    assert queue.claim("w1", 120) is None
+
+def test_leased_job_is_not_claimed_twice(tmp_path):
+    clock = VirtualClock()
+    queue = make_queue(tmp_path, clock)
+    other = make_queue(tmp_path, clock)
+    queue.add("alice", "alice.ini")
+    job = queue.claim("w1", 120)
+    assert other.claim("w2", 120) is None
+    clock.sleep(100)
+    assert queue.heartbeat(job, 120)
+    clock.sleep(100)
+    assert other.claim("w2", 120) is None
+
+def test_expired_lease_is_reclaimed_and_old_token_fenced(tmp_path):
+    clock = VirtualClock()
+    queue = make_queue(tmp_path, clock)
+    other = make_queue(tmp_path, clock)
+    queue.add("alice", "alice.ini")
+    job = queue.claim("w1", 120)
+    clock.sleep(121)
+    taken = other.claim("w2", 120)
+    assert taken["account"] == "alice"
+    assert taken["reclaimed_from"] == "w1"
+    assert not queue.heartbeat(job, 120)
+    assert not queue.ack(job, "success", clock.time() + 900)
+    assert other.ack(taken, "success", clock.time() + 900)
+    [row] = queue.jobs()
+    assert row["lease_owner"] is None
+    assert row["last_owner"] == "w2"
+    assert row["claims"] == 2
+
+def test_ack_schedules_next_run(tmp_path):
+    clock = VirtualClock()
+    queue = make_queue(tmp_path, clock)
+    queue.add("alice", "alice.ini")
+    job = queue.claim("w1", 120)
+    assert queue.ack(job, "success", clock.time() + 900)
+    assert queue.claim("w1", 120) is None
+    clock.sleep(900)
+    assert queue.claim("w1", 120)["account"] == "alice"
+
+def test_add_existing_account_updates_config_file(tmp_path):
+    clock = VirtualClock()
+    queue = make_queue(tmp_path, clock)
+    queue.add("alice", "old.ini")
+    queue.add("alice", "new.ini")
+    [row] = queue.jobs()
+    assert row["config_file"] == "new.ini"
+    assert queue.remove("alice")
+    assert not queue.remove("alice")
@@ -0,0 +1,83 @@
+from latency_model import (LatencyModel, MAX_SAMPLES, MAX_TIMEOUT, MIN_NEGATIVE_TIMEOUT,
+                           FULL_NEGATIVE_CHECK_EVERY)
+
+def test_default_until_enough_samples(tmp_path):
+    model = LatencyModel(tmp_path / "model.json")
+    for _ in range(4):
+        model.observe("button", 0.2)
+    assert model.learned("button") is None
+    assert model.timeout("button", 5) == 5
+
+def test_fast_waits_never_go_below_default(tmp_path):
+    model = LatencyModel(tmp_path / "model.json")
+    for _ in range(10):
+        model.observe("list", 0.2)
+    assert model.timeout("list", 10) == 10
+
+def test_fast_negative_check_shrinks_with_periodic_full_check(tmp_path):
+    model = LatencyModel(tmp_path / "model.json")
+    for _ in range(10):
+        model.observe("button", 0.2)
+        model.observe("page", 0.1)
+    timeouts = [model.timeout("button", 5, negative=True, fallback="page")
+                for _ in range(FULL_NEGATIVE_CHECK_EVERY)]
+    assert timeouts[:-1] == [MIN_NEGATIVE_TIMEOUT] * (FULL_NEGATIVE_CHECK_EVERY - 1)
+    assert timeouts[-1] == 5
+
+def test_slow_button_found_by_full_check_raises_timeout(tmp_path):
+    model = LatencyModel(tmp_path / "model.json")
+    for _ in range(10):
+        model.observe("button", 0.2)
+    for _ in range(3):
+        model.observe("button", 4)
+    assert model.timeout("button", 5, negative=True) == 4 * 2 + 0.5
+
+def test_slow_waits_raise_timeout(tmp_path):
+    model = LatencyModel(tmp_path / "model.json")
+    for _ in range(10):
+        model.observe("list", 8)
+    assert model.timeout("list", 10) == 8 * 2 + 0.5
+
+def test_slow_fallback_raises_negative_check(tmp_path):
+    model = LatencyModel(tmp_path / "model.json")
+    for _ in range(10):
+        model.observe("button", 0.5)
+        model.observe("page", 4)
+    assert model.timeout("button", 5, negative=True, fallback="page") == 4 * 2 + 0.5
+
+def test_censored_timeouts_push_estimate_up(tmp_path):
+    model = LatencyModel(tmp_path / "model.json")
+    for _ in range(10):
+        model.observe("list", 1)
+    assert model.timeout("list", 10) == 10
+    for _ in range(5):
+        model.observe("list", 10, censored=True)
+    assert model.timeout("list", 10) == 10 * 2 + 0.5
+
+def test_censored_samples_age_out(tmp_path):
+    model = LatencyModel(tmp_path / "model.json")
+    for _ in range(6):
+        model.observe("list", 10, censored=True)
+    assert model.timeout("list", 10) == 10 * 2 + 0.5
+    for _ in range(MAX_SAMPLES):
+        model.observe("list", 0.5)
+    assert model.timeout("list", 10) == 10
+
+def test_loads_samples_saved_before_censoring(tmp_path):
+    (tmp_path / "model.json").write_text('{"samples": {"list": [8, 8, 8, 8, 8]}}', encoding="utf-8")
+    assert LatencyModel(tmp_path / "model.json").learned("list") == 8 * 2 + 0.5
+
+def test_timeout_is_capped(tmp_path):
+    model = LatencyModel(tmp_path / "model.json")
+    for _ in range(MAX_SAMPLES):
+        model.observe("list", 100, censored=True)
+    assert model.timeout("list", 10) == MAX_TIMEOUT
+
+def test_samples_survive_save(tmp_path):
+    model = LatencyModel(tmp_path / "model.json")
+    for _ in range(5):
+        model.observe("list", 8)
+        model.observe("list", 20, censored=True)
+    model.save()
+    loaded = LatencyModel(tmp_path / "model.json")
+    assert loaded.learned("list") == model.learned("list")
@@ -0,0 +1,160 @@
+"""Per-session span tracing in the Chrome trace-event format.
+
+While a session is being traced, nested spans (phases, sleeps, waits and
+every WebDriver command) are collected and written to
+logs/traces/trace_<session>.json, which opens in chrome://tracing or
+https://ui.perfetto.dev. When tracing is off, span() returns a shared no-op
+object, so instrumented code pays one attribute check.
+"""
+import os
+import json
+import time
+import threading
+
+MAX_TRACE_FILES = 100
+
+class _NullSpan:
+    """Span used when no session is being traced"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+    def start(self):
+        return self
+
+    def finish(self, error=None):
+        pass
+
+    def set(self, **args):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class Span:
+    """A timed, named section of work recorded as a complete ("X") trace event"""
+
+    __slots__ = ("tracer", "name", "category", "args", "begin")
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.begin = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.finish(exc)
+        return False
+
+    def start(self):
+        self.begin = time.perf_counter_ns()
+        return self
+
+    def finish(self, error=None):
+        if error is not None:
+            self.args["error"] = repr(error)
+        self.tracer._record(self, time.perf_counter_ns())
+
+    def set(self, **args):
+        """Attach extra arguments shown in the trace viewer"""
+        self.args.update(args)
+
+class Tracer:
+    """Collects spans for the current session and writes them as trace-event JSON"""
+
+    def __init__(self):
+        self.enabled = False
+        self.events = None
+        self.session_id = None
+        self.output_dir = None
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+
+    def span(self, name, category="automation", **args):
+        """Return a context manager timing a section of the traced session"""
+        if self.events is None:
+            return _NULL_SPAN
+        return Span(self, name, category, args)
+
+    def start_span(self, name, category="automation", **args):
+        """Start a span that is ended explicitly with finish()"""
+        return self.span(name, category, **args).start()
+
+    def start_session(self, session_id, output_dir):
+        """Begin collecting spans for a session if tracing is enabled"""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.session_id = session_id
+            self.output_dir = output_dir
+            self.events = [{
+                "name": "process_name", "ph": "M", "pid": self.pid,
+                "args": {"name": f"LMS session {session_id}"}
+            }]
+
+    def end_session(self):
+        """Write the collected spans and stop tracing; returns the file path or None"""
+        with self.lock:
+            events, self.events = self.events, None
+        if events is None:
+            return None
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        path = self.output_dir / f"trace_{self.session_id}.json"
+        with open(path, "w", encoding="utf-8") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file)
+        self._prune()
+        return path
+
+    def _prune(self):
+        traces = sorted(self.output_dir.glob("trace_*.json"), key=lambda p: p.stat().st_mtime)
+        for path in traces[:-MAX_TRACE_FILES]:
+            path.unlink()
+
+    def _record(self, span, end_ns):
+        event = {
+            "name": span.name,
+            "cat": span.category,
+            "ph": "X",
+            "ts": span.begin / 1000,
+            "dur": (end_ns - span.begin) / 1000,
+            "pid": self.pid,
+            "tid": threading.get_ident(),
+            "args": span.args
+        }
+        with self.lock:
+            if self.events is not None:
+                self.events.append(event)
+
+    def sleep(self, seconds, reason, clock=None):
+        """Sleep on clock (real time by default), recorded as a span"""
+        with self.span("sleep", reason=reason, seconds=round(seconds, 3)):
+            if clock is None:
+                time.sleep(seconds)
+            else:
+                clock.sleep(seconds)
+
+    def instrument_driver(self, driver):
+        """Record every WebDriver command sent by this driver instance as a span
+
+        WebElement methods also go through driver.execute, so clicks, lookups
+        and property reads are all covered.
+        """
+        if not self.enabled:
+            return driver
+        execute = driver.execute
+
+        def traced_execute(driver_command, params=None):
+            with self.span(driver_command, category="webdriver"):
+                return execute(driver_command, params)
+
+        driver.execute = traced_execute
+        return driver
+
+TRACER = Tracer()
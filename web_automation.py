@@ -1,35 +1,129 @@
 import time
 import random
-from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, UnexpectedAlertPresentException
-from webdriver_manager.chrome import ChromeDriverManager
+import shutil
 from pathlib import Path
 
+from metrics import PhaseTimer, CLASS_RESULTS, CLASS_RETRIES, DRIVER_RESTARTS, NEW_CLASSES, record_phase
+from tracing import TRACER
+from resource_monitor import ResourceMonitor, enable_performance_log
+from logger import get_logs_dir
+from clock import SYSTEM_CLOCK
+from reaper import REAPER
+from chrome_profile import ChromeProfiles, MEMORY_DISK_CACHE_BYTES
+from page_load import PageTimings, blocked_url_patterns, host_resolver_rules, apply_blocking
+from browser_profile import LMS_JS_HEAP_MB, apply_browser_profile, is_low_memory, memory_budget_bytes
+from latency_model import LATENCY_MODEL
+from class_catalog import ClassCatalog, class_id
+
+# Selenium and webdriver_manager are imported inside the methods that use
+# them so that importing this module (and main.py) stays cheap at startup.
+
+# New drivers started within one session after the previous one died
+MAX_DRIVER_RESTARTS = 2
+# Turns a hung page into an error instead of a five-minute stall
+PAGE_LOAD_TIMEOUT = 60
+# Longest wait before a retry of failed classes, before jitter
+CLASS_RETRY_MAX_DELAY = 300
+# Fixed timeouts, used until the latency model has learned better ones
+DEFAULT_WAIT = 10
+ATTENDANCE_BUTTON_WAIT = 5
+# Errors that mean the browser or chromedriver is gone, not that the page was unexpected
+DRIVER_FAILURE_MESSAGES = (
+    "invalid session id", "chrome not reachable", "disconnected:", "session deleted",
+    "no such window", "target window already closed", "tab crashed",
+    "timed out receiving message from renderer", "max retries exceeded", "connection refused"
+)
+
+# The class list's cards (title and link) and their fingerprint in one round
+# trip: FNV-1a over the cards, so an unchanged list is recognised cheaply
+CLASS_LIST_SCRIPT = """
+var titles = document.getElementsByClassName('kt-widget__username');
+var cards = [];
+var parts = [];
+for (var i = 0; i < titles.length; i++) {
+    var card = titles[i].closest('.kt-widget') || titles[i];
+    var link = card.querySelector('a[href]');
+    var href = link ? link.getAttribute('href') : '';
+    cards.push([titles[i].textContent.trim(), href]);
+    parts.push(cards[i][0] + '\\u0000' + href);
+}
+var text = parts.join('\\u0001');
+var hash = 0x811c9dc5;
+for (var j = 0; j < text.length; j++) {
+    hash = Math.imul(hash ^ text.charCodeAt(j), 0x01000193) >>> 0;
+}
+return [('0000000' + hash.toString(16)).slice(-8) + '-' + text.length, cards];
+"""
+
+def is_driver_failure(error):
+    """True if error means the WebDriver session is unusable"""
+    if isinstance(error, ConnectionError):
+        return True
+    message = str(error).lower()
+    return any(failure in message for failure in DRIVER_FAILURE_MESSAGES)
+
+class DriverFailure(Exception):
+    """The WebDriver died while processing a class"""
+
+    def __init__(self, class_index, error):
+        super().__init__(f"WebDriver failed at class {class_index}: {error}")
+        self.class_index = class_index
+
+class LeaseLost(Exception):
+    """The session may no longer mark attendance; another worker owns its job"""
+
+class SessionCheckpoint:
+    """Progress of one session, kept across driver restarts"""
+
+    def __init__(self):
+        self.next_class = 1
+        # Class index -> result line for the notification
+        self.results = {}
+        self.restarts = 0
+        self.started = False
+        self.already_logged_today = False
+        self.class_list_url = None
+        # Class index -> name (None if unknown) of classes that ended in an error
+        self.failed = {}
+        # Indices visited by the current retry pass, None on the first pass
+        self.retrying = None
+        self.retries = 0
+
 class WebDriverManager:
     """Class for managing the WebDriver"""
 
-    def __init__(self, logger):
+    def __init__(self, config, logger):
+        self.config = config
         self.logger = logger
         self.driver = None
+        self.profiles = ChromeProfiles(config, logger)
+        self.profile_dir = None
+        self.reaper_entry = None
+        self.started_at = None
+        # Seconds the last browser was held open, from launch to quit
+        self.last_hold_seconds = None
 
     def setup_driver(self):
         """Initialize and configure the Chrome webdriver"""
+        temp_dir = None
         try:
+            from selenium import webdriver
+            from selenium.webdriver.chrome.options import Options
+            from selenium.webdriver.chrome.service import Service
+            from webdriver_manager.chrome import ChromeDriverManager
+
             chrome_options = Options()
             chrome_options.add_argument('log-level=3')
             chrome_options.add_argument("--headless=new")
             
-            # Create unique user data directory
+            # Create unique user data directory, from the warm template if there is one
             unique_id = f"{int(time.time())}_{random.randint(10000, 99999)}"
-            temp_dir = Path.home() / "temp" / f'chrome_user_data_{unique_id}'
-            temp_dir.mkdir(parents=True, exist_ok=True)
+            in_memory = self.profiles.in_memory()
+            with TRACER.span("create profile", in_memory=in_memory):
+                temp_dir = self.profiles.create(unique_id, in_memory)
             chrome_options.add_argument(f"--user-data-dir={str(temp_dir)}")
+            if in_memory:
+                chrome_options.add_argument(f"--disk-cache-size={MEMORY_DISK_CACHE_BYTES}")
 
             # Add additional arguments
             chrome_options.add_argument("--no-sandbox")
@@ -37,91 +131,168 @@ class WebDriverManager:
             chrome_options.add_argument("--disable-gpu")
             chrome_options.add_argument("--disable-extensions")
             chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+            settings = self.config.settings
+            chrome_options.page_load_strategy = settings.general.page_load_strategy
+            apply_browser_profile(chrome_options, settings.general, LMS_JS_HEAP_MB, self.logger)
+            resolver_rules = host_resolver_rules(settings.general, settings.url)
+            if resolver_rules:
+                chrome_options.add_argument(f"--host-resolver-rules={resolver_rules}")
+            proxy_server = settings.general.proxy_server
+            if proxy_server:
+                chrome_options.add_argument(f"--proxy-server={proxy_server}")
+                # Chrome bypasses proxies for localhost unless told otherwise
+                chrome_options.add_argument("--proxy-bypass-list=<-loopback>")
+            enable_performance_log(chrome_options)
 
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
-            return self.driver
+            with TRACER.span("ChromeDriverManager.install"):
+                service = Service(ChromeDriverManager().install())
+            self.started_at = time.perf_counter()
+            with TRACER.span("launch Chrome"):
+                self.driver = webdriver.Chrome(service=service, options=chrome_options)
+            self.reaper_entry = REAPER.register(self.driver.service.process.pid, temp_dir)
+            self.profile_dir = temp_dir
+            self.driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+            apply_blocking(self.driver, blocked_url_patterns(settings.general), self.logger)
+            return TRACER.instrument_driver(self.driver)
 
         except Exception as e:
-            self.logger.error(f"Failed to initialize WebDriver: {e}")
+            self.logger.error("Failed to initialize WebDriver: %s", e)
+            # Chrome may have started before the failure; nothing else would stop it
+            if self.driver is not None:
+                try:
+                    self.driver.quit()
+                except Exception:
+                    pass
+                self.driver = None
+            try:
+                REAPER.release(self.reaper_entry)
+            except Exception as e:
+                self.logger.warning("Failed to clean up after WebDriver: %s", e)
+            self.reaper_entry = None
+            self.profile_dir = None
+            if temp_dir is not None:
+                shutil.rmtree(temp_dir, ignore_errors=True)
             return None
 
     def close_driver(self):
-        """Close the WebDriver safely"""
+        """Close the WebDriver safely, then kill anything it left running and delete its profile"""
         try:
             if self.driver:
                 self.driver.quit()
-                self.driver = None
+                self.last_hold_seconds = time.perf_counter() - self.started_at
+                # Chrome has flushed its cache to the profile now
+                if self.profile_dir and self.profiles.needs_template():
+                    self.profiles.save_template(self.profile_dir)
         except Exception as e:
-            self.logger.error(f"Error closing WebDriver: {e}")
+            self.logger.error("Error closing WebDriver: %s", e)
+        finally:
+            self.driver = None
+            try:
+                REAPER.release(self.reaper_entry)
+            except Exception as e:
+                self.logger.warning("Failed to clean up after WebDriver: %s", e)
+            self.reaper_entry = None
+            self.profile_dir = None
 
 class AttendanceLogger:
     """Class for handling attendance logging"""
 
-    def __init__(self, logger):
+    def __init__(self, logger, clock=SYSTEM_CLOCK):
         self.logger = logger
+        self.clock = clock
         self.log_file_path = Path.home() / "attendance_log.txt"
-        self.current_date = datetime.now().strftime("%Y-%m-%d")
 
     def is_already_logged_today(self):
         """Check if we've already logged attendance today"""
+        # Computed per call: the process runs for weeks, across many days
+        current_date = self.clock.now().strftime("%Y-%m-%d")
         if self.log_file_path.exists():
             with open(self.log_file_path, "r") as log_file:
-                if any(self.current_date in line for line in log_file):
+                if any(current_date in line for line in log_file):
                     return True
         return False
 
     def add_session_header(self):
         """Add a session header to the log file"""
         with open(self.log_file_path, "a") as log_file:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            timestamp = self.clock.now().strftime("%Y-%m-%d %H:%M:%S")
             log_file.write(f"\n[{timestamp}] Starting attendance check for all classes\n")
 
     def log_attendance(self, class_index, class_name):
         """Log attendance for a specific class"""
         with open(self.log_file_path, "a") as log_file:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            timestamp = self.clock.now().strftime("%Y-%m-%d %H:%M:%S")
             log_file.write(f"[{timestamp}] Attendance recorded for Class {class_index}, {class_name}\n")
 
     def log_already_attended(self, class_index):
         """Log that a class was already attended"""
         with open(self.log_file_path, "a") as log_file:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            timestamp = self.clock.now().strftime("%Y-%m-%d %H:%M:%S")
             log_file.write(f"[{timestamp}] Class {class_index} already attended, skipped\n")
 
 class AttendanceAutomation:
     """Class handling the core attendance automation logic"""
     
-    def __init__(self, config, logger, email_notifier, whatsapp_notifier):
+    def __init__(self, config, logger, email_notifier, whatsapp_notifier, clock=SYSTEM_CLOCK):
         self.config = config
         self.logger = logger
+        self.clock = clock
         self.email_notifier = email_notifier
         self.whatsapp_notifier = whatsapp_notifier
-        self.driver_manager = WebDriverManager(logger)
-        self.attendance_logger = AttendanceLogger(logger)
+        self.driver_manager = WebDriverManager(config, logger)
+        self.attendance_logger = AttendanceLogger(logger, clock)
+        self.resource_monitor = ResourceMonitor(logger)
+        self.page_timings = PageTimings(logger)
+        self.last_resources = None
         self.url, self.username, self.password = config.get_credentials()
-        self.known_classes = set()
+        self.catalog = ClassCatalog(self.username, clock=clock)
+        # WhatsApp messages held back while the session's browser is open (low_memory)
+        self.held_whatsapp_messages = []
+        # Optional check before each attendance click; a worker uses it to confirm it still holds the job
+        self.may_mark = None
+        config.subscribe(self._apply_settings)
+
+    def _apply_settings(self, settings):
+        """Pick up changed credentials; the next session logs in with them"""
+        if settings.username != self.username:
+            self.catalog = ClassCatalog(settings.username, clock=self.clock)
+        self.url, self.username, self.password = settings.url, settings.username, settings.password
+
+    def wait_for(self, driver, key, condition, timeout=DEFAULT_WAIT, negative=False, fallback=None):
+        """Wait for condition with a timeout learned from earlier waits on key"""
+        return LATENCY_MODEL.wait(driver, key, condition, timeout, negative, fallback,
+                                  adaptive=self.config.settings.general.adaptive_timeouts)
 
     def login(self, driver):
         """Log into the LMS website"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+
+        self.logger.update_context(phase="login")
         try:
             driver.get(self.url)
-            wait = WebDriverWait(driver, 10)
+            self.page_timings.record(driver, "landing")
             
-            signin_form = wait.until(EC.element_to_be_clickable((By.CLASS_NAME, "btn-success")))
+            signin_form = self.wait_for(driver, "landing: sign-in button",
+                                        EC.element_to_be_clickable((By.CLASS_NAME, "btn-success")))
             signin_form.click()
+            self.page_timings.record(driver, "login")
 
-            wait.until(EC.element_to_be_clickable((By.ID, "iduser"))).send_keys(self.username)
-            wait.until(EC.element_to_be_clickable((By.ID, "idpass"))).send_keys(self.password)
-            wait.until(EC.element_to_be_clickable(
+            self.wait_for(driver, "login: username field",
+                          EC.element_to_be_clickable((By.ID, "iduser"))).send_keys(self.username)
+            self.wait_for(driver, "login: password field",
+                          EC.element_to_be_clickable((By.ID, "idpass"))).send_keys(self.password)
+            self.wait_for(driver, "login: submit button", EC.element_to_be_clickable(
                 (By.XPATH, '//*[@id="kt_sign_in_form"]/div[4]/button'))).click()
+            self.page_timings.record(driver, "dashboard")
             
-            wait.until(EC.presence_of_element_located((By.LINK_TEXT, 'V-Class')))
-            self.logger.info(f"Successfully logged in as {self.username}")
+            self.wait_for(driver, "dashboard: V-Class link",
+                          EC.presence_of_element_located((By.LINK_TEXT, 'V-Class')))
+            self.logger.info("Successfully logged in as %s", self.username)
             return True
 
         except Exception as e:
-            self.logger.error(f"Login failed: {str(e)}")
+            self.logger.error("Login failed: %s", e)
             self.send_notifications("Login Failed", 
                                  f"Failed to log in as {self.username}\nError: {str(e)}", 
                                  "error")
@@ -129,51 +300,67 @@ class AttendanceAutomation:
 
     def navigate_to_vclass(self, driver):
         """Navigate to the V-Class section and get class information"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException, NoSuchElementException
+
+        self.logger.update_context(phase="navigate")
         try:
             # Add a short wait before clicking V-Class link
-            time.sleep(1)
-            
-            wait = WebDriverWait(driver, 10)
+            TRACER.sleep(1, "before V-Class link", self.clock)
             
             # Try multiple strategies to find V-Class link
             try:
-                wait.until(EC.element_to_be_clickable((By.LINK_TEXT, 'V-Class'))).click()
+                with TRACER.span("wait V-Class link", strategy="link text"):
+                    # Not matching is a normal answer for the first strategies
+                    self.wait_for(driver, "dashboard: V-Class link by text",
+                                  EC.element_to_be_clickable((By.LINK_TEXT, 'V-Class')), negative=True).click()
             except (TimeoutException, NoSuchElementException):
                 try:
-                    wait.until(EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, 'Class'))).click()
+                    with TRACER.span("wait V-Class link", strategy="partial link text"):
+                        self.wait_for(driver, "dashboard: V-Class link by partial text",
+                                      EC.element_to_be_clickable((By.PARTIAL_LINK_TEXT, 'Class')),
+                                      negative=True).click()
                 except (TimeoutException, NoSuchElementException):
-                    wait.until(EC.element_to_be_clickable(
-                        (By.XPATH, "//a[contains(text(), 'V-Class')]"))).click()
+                    with TRACER.span("wait V-Class link", strategy="xpath"):
+                        self.wait_for(driver, "dashboard: V-Class link by xpath", EC.element_to_be_clickable(
+                            (By.XPATH, "//a[contains(text(), 'V-Class')]"))).click()
             
+            self.page_timings.record(driver, "vclass")
             self.logger.info("Navigated to V-Class section")
             
             # Wait for page to load
-            time.sleep(2)
+            TRACER.sleep(2, "V-Class page load", self.clock)
             
             # Get available classes
-            class_elements = wait.until(
+            class_elements = self.wait_for(driver, "vclass: class list",
                 EC.presence_of_all_elements_located((By.CLASS_NAME, 'kt-widget__username')))
             
             class_count = len(class_elements)
-            self.logger.info(f"Found {class_count} available classes")
+            fingerprint, cards = self.read_class_list(driver)
+            if self.catalog.unchanged(fingerprint):
+                self.logger.info("Found %d available classes (unchanged since the last session)", class_count)
+                return True, class_count, set(self.catalog.names())
+            self.logger.info("Found %d available classes", class_count)
             
             # Get class names and check for new classes
-            current_classes = set()
-            for number, class_element in enumerate(class_elements, start=1):
-                class_name = class_element.text[8:]  # Remove "Class - " prefix
-                current_classes.add(class_name)
-                self.logger.info(f"Class {number}: {class_name}")
+            if cards is None:
+                cards = [(class_element.text, None) for class_element in class_elements]
+            cards = [(title[8:], href) for title, href in cards]  # Remove "Class - " prefix
+            for number, (class_name, _) in enumerate(cards, start=1):
+                self.logger.info("Class %d: %s", number, class_name)
             
             # Check for new classes
-            new_classes = current_classes - self.known_classes
-            if new_classes:
-                self.logger.info(f"Detected {len(new_classes)} new classes: {', '.join(new_classes)}")
-                self.known_classes.update(new_classes)
+            new_ids = self.catalog.update(cards, fingerprint)
+            if new_ids:
+                new_classes = [self.catalog.get(key)["name"] for key in new_ids]
+                self.logger.info("Detected %d new classes: %s", len(new_classes), ', '.join(new_classes))
+                NEW_CLASSES.inc(len(new_classes))
                 
-            return True, class_count, current_classes
+            return True, class_count, {class_name for class_name, _ in cards}
 
         except Exception as e:
-            self.logger.error(f"Failed to navigate to V-Class: {str(e)}")
+            self.logger.error("Failed to navigate to V-Class: %s", e)
             self.send_notifications(
                 "Navigation Failed",
                 f"Failed to navigate to V-Class section.\nError: {str(e)}",
@@ -181,88 +368,173 @@ class AttendanceAutomation:
             )
             return False, 0, set()
 
-    def process_attendance(self, driver, class_count):
-        """Check and mark attendance for all available classes"""
+    def read_class_list(self, driver):
+        """Fingerprint and (title, href) cards of the class list, or (None, None) if the script failed"""
+        try:
+            fingerprint, cards = driver.execute_script(CLASS_LIST_SCRIPT)
+        except Exception as e:
+            if is_driver_failure(e):
+                raise
+            self.logger.debug("Could not fingerprint the class list: %s", e)
+            return None, None
+        self.logger.debug("Class list fingerprint: %s (%d classes)", fingerprint, len(cards))
+        return fingerprint, [tuple(card) for card in cards]
+
+    def record_result(self, class_key, result, button_open=False):
+        """Count a class visit's result and record it in the catalog"""
+        CLASS_RESULTS.inc(result=result)
+        if class_key:
+            self.catalog.record_visit(class_key, result, button_open)
+
+    def process_attendance(self, driver, class_count, checkpoint=None):
+        """Check and mark attendance for all available classes
+
+        Starts at checkpoint.next_class and advances it after every class, so
+        that after a DriverFailure the session can continue with a new driver.
+        During a retry pass only the classes in checkpoint.retrying are visited.
+        """
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException, UnexpectedAlertPresentException
+
         attendance_button_xpath = '//*[@id="kt_content"]/div[2]/div[1]/div/center/button'
+        self.logger.update_context(phase="attendance")
+        checkpoint = checkpoint or SessionCheckpoint()
+
+        if not checkpoint.started:
+            # Check if already logged today
+            checkpoint.already_logged_today = self.attendance_logger.is_already_logged_today()
+
+            # Add session header to log file
+            self.attendance_logger.add_session_header()
+            checkpoint.started = True
+        already_logged_today = checkpoint.already_logged_today
         
-        # Check if already logged today
-        already_logged_today = self.attendance_logger.is_already_logged_today()
-        
-        # Add session header to log file
-        self.attendance_logger.add_session_header()
-        
-        # Create a single wait object for reuse
-        wait = WebDriverWait(driver, 10)
-        
-        # Track attendance results for notifications
-        attendance_results = []
+        # Track attendance results for notifications, including those before a restart
+        attendance_results = checkpoint.results
         
-        for i in range(1, class_count + 1):
+        for i in range(checkpoint.next_class, class_count + 1):
+            if checkpoint.retrying is not None and i not in checkpoint.retrying:
+                continue
+            class_name = None
+            class_key = self.catalog.id_at(i)
+            class_start = time.perf_counter()
+            class_span = TRACER.start_span("class", category="phase", index=i)
             try:
                 # Get class name
                 class_name_xpath = f'//*[@id="kt_content"]/div[2]/div[{i}]/div/div/div[1]/div[3]/div[2]/a'
-                class_name_elem = wait.until(
+                class_name_elem = self.wait_for(driver, "vclass: class name",
                     EC.presence_of_element_located((By.XPATH, class_name_xpath)))
                 class_name = class_name_elem.text
-                self.logger.info(f"Checking attendance for Class {i}: {class_name}")
+                class_key = class_key or class_id(class_name)
+                self.logger.update_context(class_name=class_name)
+                class_span.set(class_name=class_name, class_id=class_key)
+                self.logger.info("Checking attendance for Class %d: %s", i, class_name)
                 
                 # Click on class
                 class_xpath = f'//*[@id="kt_content"]/div[2]/div[{i}]/div/div/div[2]/div[2]'
-                wait.until(EC.element_to_be_clickable((By.XPATH, class_xpath))).click()
+                class_link = self.wait_for(driver, "vclass: class link",
+                                           EC.element_to_be_clickable((By.XPATH, class_xpath)))
+                class_link.click()
+                page = self.page_timings.record(driver, "class")
+                if page:
+                    # From the start of the navigation, not just the click call
+                    LATENCY_MODEL.observe("class page: load", page["returned_ms"] / 1000)
                 
                 try:
-                    # Look for attendance button with shorter timeout
-                    short_wait = WebDriverWait(driver, 5)
-                    attendance_button = short_wait.until(
-                        EC.element_to_be_clickable((By.XPATH, attendance_button_xpath)))
-                    self.logger.info(f"Attendance button found for {class_name}")
+                    # Most classes have no button open, so this timeout is paid on nearly
+                    # every class; it is learned from how fast the button shows up when
+                    # open, and raised when the class pages are slow
+                    with TRACER.span("wait attendance button"):
+                        attendance_button = self.wait_for(
+                            driver, "class page: attendance button",
+                            EC.element_to_be_clickable((By.XPATH, attendance_button_xpath)),
+                            ATTENDANCE_BUTTON_WAIT, negative=True, fallback="class page: load")
+                    self.logger.info("Attendance button found for %s", class_name)
                     
                     # Add random delay before clicking
-                    delay_minutes = random.uniform(0.1, 0.3)
-                    self.logger.info(f"Waiting {delay_minutes:.1f} minutes before marking attendance...")
-                    time.sleep(delay_minutes * 60)
+                    settings = self.config.settings.general
+                    delay_minutes = random.uniform(settings.attendance_delay_min, settings.attendance_delay_max)
+                    self.logger.info("Waiting %.1f minutes before marking attendance...", delay_minutes)
+                    TRACER.sleep(delay_minutes * 60, "random delay before marking attendance", self.clock)
                     
+                    if self.may_mark and not self.may_mark():
+                        raise LeaseLost(f"Lost the job lease before marking class {i}")
+
                     try:
                         # Mark attendance
                         attendance_button.click()
-                        self.logger.info(f"Successfully marked attendance for {class_name}")
+                        self.logger.info("Successfully marked attendance for %s", class_name)
                         
                         # Log the attendance and add to results
                         if not already_logged_today:
                             self.attendance_logger.log_attendance(i, class_name)
-                        attendance_results.append(
-                            f"✓ Class {i}: {class_name} - Attendance marked successfully")
+                        attendance_results[i] = f"✓ Class {i}: {class_name} - Attendance marked successfully"
+                        self.record_result(class_key, "marked", button_open=True)
                     
                     except UnexpectedAlertPresentException:
                         # Handle "already attended" alert
                         alert = driver.switch_to.alert
                         alert_text = alert.text
                         if "Anda sudah absen!" in alert_text:
-                            self.logger.info(f"Already attended Class {i} ({class_name}), skipping...")
+                            self.logger.info("Already attended Class %d (%s), skipping...", i, class_name)
                             self.attendance_logger.log_already_attended(i)
-                            attendance_results.append(f"✓ Class {i}: {class_name} - Already attended")
+                            attendance_results[i] = f"✓ Class {i}: {class_name} - Already attended"
+                            self.record_result(class_key, "already_attended", button_open=True)
                             alert.accept()
                         else:
                             alert.accept()
-                            self.logger.warning(f"Unexpected alert: {alert_text}")
-                            attendance_results.append(
-                                f"⚠ Class {i}: {class_name} - Unexpected alert: {alert_text}")
+                            self.logger.warning("Unexpected alert: %s", alert_text)
+                            attendance_results[i] = f"⚠ Class {i}: {class_name} - Unexpected alert: {alert_text}"
+                            self.record_result(class_key, "unexpected_alert", button_open=True)
                             
                 except TimeoutException:
-                    self.logger.info(f"No attendance button found for {class_name}")
-                    attendance_results.append(f"ℹ Class {i}: {class_name} - No attendance button found")
+                    self.logger.info("No attendance button found for %s", class_name)
+                    attendance_results[i] = f"ℹ Class {i}: {class_name} - No attendance button found"
+                    self.record_result(class_key, "no_button")
                 
                 # Go back to class list
                 driver.back()
+                self.page_timings.record(driver, "back to vclass")
+                self.resource_monitor.collect_network(driver)
+                record_phase("class", time.perf_counter() - class_start)
+                class_span.finish()
+                checkpoint.failed.pop(i, None)
                 
             except Exception as e:
-                self.logger.error(f"Error processing class {i}: {str(e)}")
-                attendance_results.append(f"✗ Class {i}: Error - {str(e)}")
-                self.send_notifications(
-                    f"Error Processing Class {i}",
-                    f"Error processing class {i}.\nError: {str(e)}",
-                    "error"
-                )
+                record_phase("class", time.perf_counter() - class_start, success=False)
+                class_span.finish(e)
+                if isinstance(e, LeaseLost):
+                    raise
+                if is_driver_failure(e):
+                    # Resumed at this class by run_session with a new driver
+                    raise DriverFailure(i, e) from e
+                self.logger.error("Error processing class %d: %s", i, e)
+                attendance_results[i] = f"✗ Class {i}: Error - {str(e)}"
+                self.record_result(class_key, "error")
+                checkpoint.failed[i] = class_name
+                # With retries, errors are reported once the retries are used up
+                if not self.config.settings.general.class_retry_attempts:
+                    self.send_notifications(
+                        f"Error Processing Class {i}",
+                        f"Error processing class {i}.\nError: {str(e)}",
+                        "error"
+                    )
+            checkpoint.next_class = i + 1
+
+        self.logger.update_context(class_name=None)
+        return True
+
+    def notify_results(self, checkpoint):
+        """Send the session's per-class results if attendance was marked"""
+        attendance_results = [checkpoint.results[i] for i in sorted(checkpoint.results)]
+        if checkpoint.failed and self.config.settings.general.class_retry_attempts:
+            self.send_notifications(
+                "Classes Failed",
+                f"Still failing after {checkpoint.retries} retries:\n\n" +
+                "\n".join(checkpoint.results[i] for i in sorted(checkpoint.failed)),
+                "error"
+            )
 
         # Send notification with attendance results if attendance was marked
         if attendance_results:
@@ -279,31 +551,85 @@ class AttendanceAutomation:
                 )
             else:
                 self.logger.info("No attendance buttons were clicked, skipping notification")
-        
+
+    def wait_for_retry(self, checkpoint):
+        """Wait before another pass over the failed classes; False once there is nothing left to retry"""
+        attempts = self.config.settings.general.class_retry_attempts
+        if not checkpoint.failed or checkpoint.retries >= attempts:
+            if checkpoint.failed and attempts:
+                self.logger.warning("Giving up on classes %s after %d retries",
+                                    ", ".join(map(str, sorted(checkpoint.failed))), checkpoint.retries)
+            return False
+        checkpoint.retries += 1
+        # Exponential backoff with jitter, so retries don't line up with the LMS's own hiccups
+        delay = min(self.config.settings.general.class_retry_delay * 2 ** (checkpoint.retries - 1),
+                    CLASS_RETRY_MAX_DELAY)
+        delay = random.uniform(delay / 2, delay)
+        self.logger.info("Retrying %d failed classes (%s) in %.0f seconds (retry %d of %d)",
+                         len(checkpoint.failed), ", ".join(map(str, sorted(checkpoint.failed))),
+                         delay, checkpoint.retries, attempts)
+        CLASS_RETRIES.inc()
+        TRACER.sleep(delay, "before retrying failed classes", self.clock)
+        checkpoint.retrying = set(checkpoint.failed)
+        checkpoint.next_class = min(checkpoint.retrying)
         return True
 
-    def run_session(self):
+    def run_session(self, session_id=None):
         """Run a complete attendance checking session"""
         driver = None
+        recorder = None
+        monitoring = False
+        self.last_resources = None
+        self.page_timings.reset()
+        checkpoint = SessionCheckpoint()
         try:
             # Setup driver
-            driver = self.driver_manager.setup_driver()
-            if driver is None:
-                raise Exception("Failed to initialize WebDriver")
+            with PhaseTimer("driver_startup"):
+                driver = self.driver_manager.setup_driver()
+                if driver is None:
+                    raise Exception("Failed to initialize WebDriver")
+            self.resource_monitor.start(driver, memory_budget_bytes(self.config.settings.general))
+            monitoring = True
+            if self.config.settings.general.record_sessions:
+                from session_replay import SessionRecorder
+                recorder = SessionRecorder(self.logger, self.url, self.username, self.password)
+                recorder.attach(driver, self.resource_monitor)
 
-            # Login to system
-            if not self.login(driver):
-                raise Exception("Login failed")
-            
-            # Navigate to classes and process attendance
-            success, class_count, current_classes = self.navigate_to_vclass(driver)
-            if success and class_count > 0:
-                self.process_attendance(driver, class_count)
-            else:
-                raise Exception("Failed to get class information")
+            logged_in = False
+            while True:
+                try:
+                    if logged_in:
+                        class_count = self.reopen_class_list(driver, checkpoint)
+                    else:
+                        class_count = self.open_class_list(driver, checkpoint)
+                        logged_in = True
+                    with PhaseTimer("process_attendance"):
+                        self.process_attendance(driver, class_count, checkpoint)
+                    if not self.wait_for_retry(checkpoint):
+                        break
+                except DriverFailure as e:
+                    # A browser stopped for its memory budget would only blow it again
+                    if checkpoint.restarts >= MAX_DRIVER_RESTARTS or self.resource_monitor.budget_exceeded:
+                        raise
+                    checkpoint.restarts += 1
+                    DRIVER_RESTARTS.inc()
+                    self.logger.warning("%s; restarting it and resuming (restart %d of %d)",
+                                        e, checkpoint.restarts, MAX_DRIVER_RESTARTS)
+                    # Not stopped by the finally block if the restart fails
+                    driver = None
+                    driver = self.restart_driver(recorder)
+                    logged_in = False
             
+        except LeaseLost as e:
+            # Another worker runs the account now; only report what was marked here
+            self.logger.warning("%s; stopping the session", e)
+            checkpoint.failed.clear()
+            raise
+
         except Exception as e:
-            self.logger.error(f"Session failed: {str(e)}")
+            if self.resource_monitor.budget_exceeded:
+                e = Exception(f"The browser exceeded its memory budget ({e})")
+            self.logger.error("Session failed: %s", e)
             self.send_notifications(
                 "Session Failed",
                 f"Attendance session failed.\nError: {str(e)}",
@@ -312,9 +638,89 @@ class AttendanceAutomation:
             raise  # Re-raise the exception for the main loop to handle
             
         finally:
+            # Also when a retry pass fails, so the classes done before are still reported
+            if checkpoint.started:
+                self.notify_results(checkpoint)
             # Clean up resources
-            if driver:
+            if monitoring:
+                self.last_resources = self.resource_monitor.stop(driver)
+                self.last_resources.update(self.page_timings.summary())
+                self.last_resources["driver_restarts"] = checkpoint.restarts
+                self.last_resources["class_retries"] = checkpoint.retries
+                if recorder:
+                    self.save_recording(recorder, session_id)
                 self.driver_manager.close_driver()
+            try:
+                LATENCY_MODEL.save()
+            except Exception as e:
+                self.logger.warning("Failed to save the latency model: %s", e)
+            try:
+                self.catalog.save()
+            except Exception as e:
+                self.logger.warning("Failed to save the class catalog: %s", e)
+            self.send_held_whatsapp_messages()
+
+    def open_class_list(self, driver, checkpoint):
+        """Log in and open V-Class; returns the number of classes"""
+        # Login to system
+        with PhaseTimer("login"):
+            if not self.login(driver):
+                raise Exception("Login failed")
+        self.resource_monitor.collect_network(driver)
+
+        # Navigate to classes
+        with PhaseTimer("navigate_to_vclass"):
+            success, class_count, current_classes = self.navigate_to_vclass(driver)
+            if not success or class_count == 0:
+                raise Exception("Failed to get class information")
+        checkpoint.class_list_url = driver.current_url
+        self.resource_monitor.collect_network(driver)
+        return class_count
+
+    def reopen_class_list(self, driver, checkpoint):
+        """Reload V-Class with the existing login for a retry pass, logging in again if it has expired"""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException
+
+        try:
+            with PhaseTimer("navigate_to_vclass"):
+                driver.get(checkpoint.class_list_url)
+                self.page_timings.record(driver, "vclass")
+                class_elements = self.wait_for(driver, "vclass: class list",
+                    EC.presence_of_all_elements_located((By.CLASS_NAME, 'kt-widget__username')))
+            self.logger.info("Reusing the existing login for the retry")
+            return len(class_elements)
+        except TimeoutException:
+            self.logger.info("The login has expired; logging in again for the retry")
+        except Exception as e:
+            if is_driver_failure(e):
+                raise DriverFailure(checkpoint.next_class, e) from e
+            raise
+        return self.open_class_list(driver, checkpoint)
+
+    def restart_driver(self, recorder):
+        """Replace a dead driver with a new one, carrying the monitor and recorder over"""
+        self.driver_manager.close_driver()
+        with PhaseTimer("driver_restart"):
+            driver = self.driver_manager.setup_driver()
+            if driver is None:
+                raise Exception("Failed to restart WebDriver")
+        self.resource_monitor.switch_driver(driver)
+        if recorder:
+            recorder.detach()
+            recorder.attach(driver, self.resource_monitor)
+        return driver
+
+    def save_recording(self, recorder, session_id):
+        """Write the session's recorded responses to logs/recordings/<session>"""
+        session_id = session_id or self.clock.now().strftime("%Y%m%d-%H%M%S")
+        try:
+            output_dir = get_logs_dir() / "recordings" / session_id
+            count = recorder.save(output_dir, session_id)
+            self.logger.info("Recorded %d responses to %s", count, output_dir)
+        except Exception as e:
+            self.logger.warning("Failed to save session recording: %s", e)
 
     def send_notifications(self, subject, message, category="info"):
         """Send notifications through configured channels"""
@@ -326,4 +732,15 @@ class AttendanceAutomation:
         if self.whatsapp_notifier.enabled:
             # Format message for WhatsApp
             whatsapp_message = f"*{subject}*\n\n{message}"
-            self.whatsapp_notifier.send_notification(whatsapp_message)
\ No newline at end of file
+            if self.driver_manager.driver and is_low_memory(self.config.settings.general):
+                # A second Chrome next to the session's one is what gets small VMs OOM-killed
+                self.held_whatsapp_messages.append(whatsapp_message)
+            else:
+                self.whatsapp_notifier.send_notification(whatsapp_message)
+
+    def send_held_whatsapp_messages(self):
+        """Send the WhatsApp messages held back during the session, in one browser"""
+        if not self.held_whatsapp_messages:
+            return
+        messages, self.held_whatsapp_messages = self.held_whatsapp_messages, []
+        self.whatsapp_notifier.send_notification("\n\n".join(messages))
\ No newline at end of file
@@ -0,0 +1,221 @@
+"""Worker nodes that run account sessions from a shared job queue.
+
+Instead of one main.py per account, put every account's config file in a
+job queue (job_queue.py) on a volume all nodes mount, and start any number
+of workers. Each worker repeatedly claims the account that has been due
+longest, runs its session, and acks it, which schedules the account again
+after its check_interval. A session whose worker dies is picked up by
+another worker once the lease expires. Before each attendance click the
+worker renews its lease, so a worker that has lost the job never marks
+attendance.
+
+    python worker.py --queue /mnt/shared/lms_jobs.sqlite add accounts/alice.ini accounts/bob.ini
+    python worker.py --queue /mnt/shared/lms_jobs.sqlite work
+    python worker.py --queue /mnt/shared/lms_jobs.sqlite status
+"""
+import sys
+import sqlite3
+import argparse
+import threading
+from pathlib import Path
+
+from clock import SYSTEM_CLOCK
+from job_queue import JobQueue, default_owner, format_time
+
+DEFAULT_LEASE_SECONDS = 120
+POLL_SECONDS = 5
+
+class Worker:
+    """Claims, runs and acks account sessions until stopped"""
+
+    def __init__(self, queue, logger, owner=None, lease_seconds=DEFAULT_LEASE_SECONDS, clock=SYSTEM_CLOCK):
+        self.queue = queue
+        self.logger = logger
+        self.owner = owner or default_owner()
+        self.lease_seconds = lease_seconds
+        self.clock = clock
+        self.running = False
+        # config file -> AttendanceAutomation, kept so known classes carry over between sessions
+        self.automations = {}
+        self.sessions = 0
+
+    def get_automation(self, config_file):
+        from config import Config
+        from notifications import EmailNotifier, WhatsAppNotifier
+        from web_automation import AttendanceAutomation
+
+        automation = self.automations.get(config_file)
+        if automation is None:
+            if not Path(config_file).exists():
+                raise Exception(f"Config file not found: {config_file}")
+            config = Config(config_file)
+            automation = AttendanceAutomation(
+                config, self.logger, EmailNotifier(config, self.logger), WhatsAppNotifier(config, self.logger),
+                self.clock
+            )
+            self.automations[config_file] = automation
+        return automation
+
+    def run(self):
+        """Work until stop() is called"""
+        self.running = True
+        self.logger.info("Worker %s started", self.owner)
+        while self.running:
+            job = self.queue.claim(self.owner, self.lease_seconds)
+            if job is None:
+                self.clock.sleep(POLL_SECONDS)
+                continue
+            self.run_job(job)
+        self.logger.info("Worker %s stopped", self.owner)
+
+    def stop(self):
+        self.running = False
+
+    def run_job(self, job):
+        """Run one claimed session under a heartbeat and ack it"""
+        from circuit_breaker import probe
+        from logger import get_logs_dir
+        from resource_monitor import append_session_history
+        from web_automation import LeaseLost
+
+        if job["reclaimed_from"]:
+            self.logger.warning("Took over %s from %s, whose lease expired", job["account"], job["reclaimed_from"])
+        lease_lost = threading.Event()
+        stop_heartbeat = threading.Event()
+
+        def renew():
+            """Extend the lease; a queue that cannot be written counts as a lost lease"""
+            try:
+                renewed = self.queue.heartbeat(job, self.lease_seconds)
+            except sqlite3.Error as e:
+                self.logger.warning("Failed to renew the lease on %s: %s", job["account"], e)
+                renewed = False
+            if not renewed:
+                lease_lost.set()
+            return renewed
+
+        def heartbeat():
+            while not stop_heartbeat.wait(self.lease_seconds / 4):
+                if not renew():
+                    return
+
+        def may_mark():
+            # Renewing right before the click fences off a worker whose lease already expired
+            return not lease_lost.is_set() and renew()
+
+        self.sessions += 1
+        session_id = f"{self.owner}-{self.sessions}"
+        heartbeat_thread = threading.Thread(target=heartbeat, daemon=True)
+        heartbeat_thread.start()
+        outcome = "failure"
+        automation = None
+        started_at = self.clock.now()
+        start = self.clock.monotonic()
+        try:
+            automation = self.get_automation(job["config_file"])
+            settings = automation.config.settings
+            next_due = self.clock.time() + settings.general.check_interval
+            with self.logger.context(session=session_id, account=job["account"]):
+                self.logger.info("Starting session for %s (%s)", job["account"], session_id)
+                reachable, detail = (True, None)
+                if settings.general.preflight_probe:
+                    reachable, detail = probe(settings.url, settings.general.probe_timeout,
+                                              settings.general.proxy_server)
+                if not reachable:
+                    outcome = "lms_unreachable"
+                    next_due = self.clock.time() + settings.general.outage_retry_seconds
+                    self.logger.warning("The LMS is unreachable (%s); trying %s again in %d seconds",
+                                        detail, job["account"], settings.general.outage_retry_seconds)
+                else:
+                    automation.may_mark = may_mark
+                    automation.run_session(session_id)
+                    outcome = "success"
+        except LeaseLost:
+            outcome = "lease_lost"
+        except Exception as e:
+            self.logger.error("Session for %s failed: %s", job["account"], e)
+            if automation is None:
+                next_due = self.clock.time() + self.lease_seconds
+        finally:
+            stop_heartbeat.set()
+            heartbeat_thread.join()
+            if automation is not None:
+                automation.may_mark = None
+                try:
+                    append_session_history(get_logs_dir() / "session_history.jsonl", session_id, started_at,
+                                           self.clock.monotonic() - start, outcome, automation.last_resources)
+                except Exception as e:
+                    self.logger.warning("Failed to record session history: %s", e)
+
+        if outcome == "lease_lost" or lease_lost.is_set():
+            self.logger.warning("Lost the lease on %s; another worker has taken it over", job["account"])
+        elif not self.queue.ack(job, outcome, next_due):
+            self.logger.warning("Lost the lease on %s before finishing; another worker has it", job["account"])
+
+def add_accounts(queue, config_files):
+    from config import Config
+
+    for config_file in config_files:
+        path = Path(config_file).resolve()
+        if not path.exists():
+            print(f"{config_file}: not found", file=sys.stderr)
+            return 1
+        account = Config(path).settings.username
+        queue.add(account, path)
+        print(f"Added {account} ({path})")
+    return 0
+
+def print_status(queue):
+    print(f"{'account':<20} {'due':<20} {'lease':<28} {'claims':>6}  last run")
+    for job in queue.jobs():
+        lease = f"{job['lease_owner']} until {format_time(job['lease_expires'])[11:]}" if job["lease_owner"] else "-"
+        last = f"{job['last_outcome']} on {job['last_owner']} at {format_time(job['last_finished'])}" \
+            if job["last_finished"] else "-"
+        print(f"{job['account']:<20} {format_time(job['due_at']):<20} {lease:<28} {job['claims']:>6}  {last}")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Run account sessions from a shared job queue")
+    parser.add_argument("--queue", required=True, help="SQLite job queue, e.g. on a shared volume")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add_parser = commands.add_parser("add", help="Add accounts by their config files")
+    add_parser.add_argument("config_files", nargs="+")
+    remove_parser = commands.add_parser("remove", help="Remove an account")
+    remove_parser.add_argument("account")
+    commands.add_parser("status", help="Show the accounts and their leases")
+    work_parser = commands.add_parser("work", help="Claim and run sessions until interrupted")
+    work_parser.add_argument("--name", help="Worker name (default <host>-<pid>)")
+    work_parser.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS,
+                             help=f"Lease length in seconds (default {DEFAULT_LEASE_SECONDS})")
+    args = parser.parse_args()
+
+    queue = JobQueue(args.queue)
+    try:
+        if args.command == "add":
+            return add_accounts(queue, args.config_files)
+        if args.command == "remove":
+            if not queue.remove(args.account):
+                print(f"No such account: {args.account}", file=sys.stderr)
+                return 1
+            return 0
+        if args.command == "status":
+            return print_status(queue)
+
+        from logger import Logger
+        from reaper import REAPER
+        logger = Logger()
+        REAPER.sweep()
+        worker = Worker(queue, logger, args.name, args.lease)
+        try:
+            worker.run()
+        except KeyboardInterrupt:
+            worker.stop()
+        finally:
+            REAPER.reap_own()
+            logger.shutdown()
+        return 0
+    finally:
+        queue.close()
+
+if __name__ == "__main__":
+    sys.exit(main())